@@ -5,7 +5,7 @@ from openerp import api, fields, models, _
 from openerp.osv import expression
 from openerp.exceptions import RedirectWarning, UserError
 from openerp.tools.misc import formatLang
-from openerp.tools import float_is_zero
+from openerp.tools import float_compare, float_is_zero
 from openerp.tools.safe_eval import safe_eval
 
 
@@ -714,61 +714,96 @@ class AccountMoveLine(models.Model):
     # Reconciliation methods
     ####################################################
 
-    def _get_pair_to_reconcile(self):
-        #field is either 'amount_residual' or 'amount_residual_currency' (if the reconciled account has a secondary currency set)
-        field = self[0].account_id.currency_id and 'amount_residual_currency' or 'amount_residual'
-        #target the pair of move in self that are the oldest
-        sorted_moves = sorted(self, key=lambda a: a.date)
-        debit = credit = False
-        for aml in sorted_moves:
-            if credit != False and debit != False:
-                break
-            if aml[field] > 0 and debit == False:
-                debit = aml
-            elif aml[field] < 0 and credit == False:
-                credit = aml
-        return debit, credit
-
     def auto_reconcile_lines(self):
-        """ This function iterates recursively on the recordset given as parameter as long as it
-            can find a debit and a credit to reconcile together. It returns the recordset of the
-            account move lines that were not reconciled during the process.
+        """ This function matches the debits and the credits of the recordset given as parameter, oldest
+            first, as long as it can find a debit and a credit to reconcile together. The lines are sorted
+            once and the matching is computed in a single pass on their residual amounts, so that the
+            partial reconciles can be created at once and the residual amounts of the lines recomputed
+            only at the end. It returns the recordset of the account move lines that were not reconciled
+            during the process.
         """
         if not self.ids:
             return self
         field = self[0].account_id.currency_id and 'amount_residual_currency' or 'amount_residual'
-        sm_debit_move, sm_credit_move = self._get_pair_to_reconcile()
-        #there is no more pair to reconcile so return what move_line are left
-        if not sm_credit_move or not sm_debit_move:
-            return self
-
-        #Reconcile the pair together
-        amount_reconcile = min(sm_debit_move[field], -sm_credit_move[field])
-        #Remove from recordset the one(s) that will be totally reconciled
-        if amount_reconcile == sm_debit_move[field]:
-            self -= sm_debit_move
-        if amount_reconcile == -sm_credit_move[field]:
-            self -= sm_credit_move
-
-        #Check for the currency and amount_currency we can set
-        currency = False
-        amount_reconcile_currency = 0
-        if sm_debit_move.currency_id == sm_credit_move.currency_id and sm_debit_move.currency_id.id:
-            currency = sm_credit_move.currency_id.id
-            amount_reconcile_currency = min(sm_debit_move.amount_residual_currency, -sm_credit_move.amount_residual_currency)
-
-        amount_reconcile = min(sm_debit_move.amount_residual, -sm_credit_move.amount_residual)
-
-        self.env['account.partial.reconcile'].create({
-            'debit_move_id': sm_debit_move.id,
-            'credit_move_id': sm_credit_move.id,
-            'amount': amount_reconcile,
-            'amount_currency': amount_reconcile_currency,
-            'currency_id': currency,
-        })
+        company_currency = self[0].account_id.company_id.currency_id
+        PartialReconcile = self.env['account.partial.reconcile']
+
+        #residual amounts are kept unsigned, as [line, amount_residual, amount_residual_currency]
+        debits = []
+        credits = []
+        for aml in sorted(self, key=lambda a: a.date):
+            if aml[field] > 0:
+                debits.append([aml, aml.amount_residual, aml.amount_residual_currency])
+            elif aml[field] < 0:
+                credits.append([aml, -aml.amount_residual, -aml.amount_residual_currency])
+        index = field == 'amount_residual_currency' and 2 or 1
+        rounding = (self[0].account_id.currency_id or company_currency).rounding
+
+        partials = []
+        reconciled_ids = []
+        debit_index = credit_index = 0
+        while debit_index < len(debits) and credit_index < len(credits):
+            debit, credit = debits[debit_index], credits[credit_index]
+            sm_debit_move, sm_credit_move = debit[0], credit[0]
+
+            #Skip the lines left with nothing to reconcile, e.g. after an exchange rate difference
+            if float_compare(debit[index], 0.0, precision_rounding=rounding) <= 0:
+                debit_index += 1
+                continue
+            if float_compare(credit[index], 0.0, precision_rounding=rounding) <= 0:
+                credit_index += 1
+                continue
 
-        #Iterate process again on self
-        return self.auto_reconcile_lines()
+            #Remove from the lines to match the one(s) that will be totally reconciled
+            amount_reconcile = min(debit[index], credit[index])
+            if amount_reconcile == debit[index]:
+                reconciled_ids.append(sm_debit_move.id)
+                debit_index += 1
+            if amount_reconcile == credit[index]:
+                reconciled_ids.append(sm_credit_move.id)
+                credit_index += 1
+
+            #Check for the currency and amount_currency we can set
+            currency = PartialReconcile.currency_id
+            amount_reconcile_currency = 0
+            if sm_debit_move.currency_id == sm_credit_move.currency_id and sm_debit_move.currency_id.id:
+                currency = sm_credit_move.currency_id
+                amount_reconcile_currency = min(debit[2], credit[2])
+
+            amount_reconcile = min(debit[1], credit[1])
+
+            partials.append({
+                'debit_move_id': sm_debit_move.id,
+                'credit_move_id': sm_credit_move.id,
+                'amount': amount_reconcile,
+                'amount_currency': amount_reconcile_currency,
+                'currency_id': currency.id,
+            })
+
+            #Update the residual amounts the way _amount_residual() would do after this matching
+            for item, counterpart in ((debit, sm_credit_move), (credit, sm_debit_move)):
+                line = item[0]
+                item[1] = company_currency.round(item[1] - amount_reconcile)
+                if line.currency_id:
+                    if currency and currency == line.currency_id:
+                        item[2] -= amount_reconcile_currency
+                    else:
+                        item[2] -= company_currency.with_context(date=counterpart.date).compute(amount_reconcile, line.currency_id)
+                    item[2] = line.currency_id.round(item[2])
+            #and the way the exchange rate difference booked by the partial reconcile would do
+            if currency and amount_reconcile_currency and sm_debit_move.amount_currency and sm_credit_move.amount_currency:
+                amount_diff = PartialReconcile._get_exchange_rate_difference(sm_debit_move, sm_credit_move, amount_reconcile_currency)
+                if amount_diff > 0:
+                    debit[1] = company_currency.round(debit[1] - amount_diff)
+                elif amount_diff < 0:
+                    credit[1] = company_currency.round(credit[1] + amount_diff)
+
+        #Create the partial reconciles, and recompute the residual amounts of the lines once
+        if partials:
+            with self.env.norecompute():
+                PartialReconcile.create(partials)
+            self.recompute()
+        return self - self.browse(reconciled_ids)
 
     @api.multi
     def reconcile(self, writeoff_acc_id=False, writeoff_journal_id=False):
@@ -1155,6 +1190,15 @@ class AccountPartialReconcile(models.Model):
         help='Utility field to express amount currency')
     company_id = fields.Many2one('res.company', related='debit_move_id.company_id', store=True, string='Currency')
 
+    @api.model
+    def _get_exchange_rate_difference(self, debit_move, credit_move, amount_currency):
+        """ Return the amount, in company currency, of the exchange rate difference to book when matching
+            `amount_currency` of `debit_move` with `credit_move`. Both lines are expected to have an amount in
+            foreign currency.
+        """
+        rate_diff = debit_move.debit / debit_move.amount_currency - credit_move.credit / -credit_move.amount_currency
+        return debit_move.company_id.currency_id.round(amount_currency * rate_diff)
+
     def create_exchange_rate_entry(self):
         """ Automatically create a journal entry to book the exchange rate difference between the `debit_move_id`
             and the `credit_move_id`, if both share the same currency, and at the prorata of the amount matched
@@ -1166,15 +1210,14 @@ class AccountPartialReconcile(models.Model):
         for rec in self:
             if rec.currency_id and rec.debit_move_id.amount_currency and rec.credit_move_id.amount_currency:
                 #create exchange rate difference journal entry
-                rate_diff = rec.debit_move_id.debit / rec.debit_move_id.amount_currency - rec.credit_move_id.credit / -rec.credit_move_id.amount_currency
-                if rec.amount_currency and rec.company_id.currency_id.round(rec.amount_currency * rate_diff):
+                amount_diff = rec._get_exchange_rate_difference(rec.debit_move_id, rec.credit_move_id, rec.amount_currency)
+                if rec.amount_currency and amount_diff:
                     if not rec.company_id.currency_exchange_journal_id:
                         raise UserError(_("You should configure the 'Exchange Rate Journal' in the accounting settings, to manage automatically the booking of accounting entries related to differences between exchange rates."))
-                    if not self.company_id.income_currency_exchange_account_id.id:
+                    if not rec.company_id.income_currency_exchange_account_id.id:
                         raise UserError(_("You should configure the 'Gain Exchange Rate Account' in the accounting settings, to manage automatically the booking of accounting entries related to differences between exchange rates."))
-                    if not self.company_id.expense_currency_exchange_account_id.id:
+                    if not rec.company_id.expense_currency_exchange_account_id.id:
                         raise UserError(_("You should configure the 'Loss Exchange Rate Account' in the accounting settings, to manage automatically the booking of accounting entries related to differences between exchange rates."))
-                    amount_diff = rec.company_id.currency_id.round(rec.amount_currency * rate_diff)
                     move = rec.env['account.move'].create({'journal_id': rec.company_id.currency_exchange_journal_id.id, 'rate_diff_partial_rec_id': rec.id})
                     line_to_reconcile = rec.env['account.move.line'].with_context(check_move_validity=False).create({
                         'name': _('Currency exchange rate difference'),
@@ -209,6 +209,60 @@ class TestReconciliation(AccountingTestCase):
             self.account_rcv.id: {'debit': 42.0, 'credit': 0.0, 'amount_currency': 50, 'currency_id': self.currency_swiss_id},
         })
 
+    def create_receivable_line(self, date, debit=0.0, credit=0.0, amount_currency=0.0, currency_id=False):
+        move = self.env['account.move'].create({
+            'journal_id': self.bank_journal_euro.id,
+            'date': date,
+            'line_ids': [
+                (0, 0, {'name': 'receivable', 'account_id': self.account_rcv.id, 'partner_id': self.partner_agrolait_id,
+                        'debit': debit, 'credit': credit, 'date_maturity': date,
+                        'amount_currency': amount_currency, 'currency_id': currency_id}),
+                (0, 0, {'name': 'counterpart', 'account_id': self.account_euro.id, 'partner_id': self.partner_agrolait_id,
+                        'debit': credit, 'credit': debit, 'date_maturity': date,
+                        'amount_currency': -amount_currency, 'currency_id': currency_id}),
+            ],
+        })
+        return move.line_ids.filtered(lambda l: l.account_id == self.account_rcv)
+
+    def test_reconcile_oldest_first(self):
+        year = time.strftime('%Y')
+        invoice_1 = self.create_receivable_line(year + '-07-01', debit=100.0)
+        invoice_2 = self.create_receivable_line(year + '-07-02', debit=100.0)
+        invoice_3 = self.create_receivable_line(year + '-07-03', debit=100.0)
+        payment_1 = self.create_receivable_line(year + '-07-10', credit=150.0)
+        payment_2 = self.create_receivable_line(year + '-07-11', credit=100.0)
+
+        (invoice_3 + payment_2 + invoice_1 + payment_1 + invoice_2).reconcile()
+
+        #the payments are matched with the oldest invoices first
+        self.assertTrue(invoice_1.reconciled)
+        self.assertTrue(invoice_2.reconciled)
+        self.assertFalse(invoice_3.reconciled)
+        self.assertAlmostEquals(invoice_3.amount_residual, 50.0)
+        self.assertTrue(payment_1.reconciled)
+        self.assertTrue(payment_2.reconciled)
+        self.assertEquals(invoice_1.matched_credit_ids.mapped('credit_move_id'), payment_1)
+        self.assertEquals(invoice_2.matched_credit_ids.mapped('credit_move_id'), payment_1 + payment_2)
+        self.assertEquals(invoice_3.matched_credit_ids.mapped('credit_move_id'), payment_2)
+        self.assertEquals(sorted(invoice_2.matched_credit_ids.mapped('amount')), [50.0, 50.0])
+
+    def test_reconcile_exchange_difference(self):
+        year = time.strftime('%Y')
+        # 100 USD invoiced for 100 EUR, paid when they were worth 50 EUR
+        invoice = self.create_receivable_line(year + '-07-01', debit=100.0, amount_currency=100.0, currency_id=self.currency_usd_id)
+        payment_1 = self.create_receivable_line(year + '-07-10', credit=50.0, amount_currency=-100.0, currency_id=self.currency_usd_id)
+        payment_2 = self.create_receivable_line(year + '-07-11', credit=50.0)
+
+        (invoice + payment_1 + payment_2).reconcile()
+
+        #the exchange rate difference settles the invoice, nothing is left to match with the second payment
+        self.assertTrue(invoice.reconciled)
+        self.assertTrue(payment_1.reconciled)
+        self.assertFalse(payment_2.reconciled)
+        self.assertFalse(payment_2.matched_debit_ids)
+        self.assertAlmostEquals(payment_2.amount_residual, -50.0)
+        self.assertEquals(sorted(invoice.matched_credit_ids.mapped('amount')), [50.0, 50.0])
+
     @unittest.skip('adapt to new accounting')
     def test_balanced_exchanges_gain_loss(self):
         # The point of this test is to show that we handle correctly the gain/loss exchanges during reconciliations in foreign currencies.
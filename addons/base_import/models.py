@@ -13,6 +13,8 @@ except ImportError:
 
 import psycopg2
 
+from openerp import SUPERUSER_ID
+from openerp.models import fix_import_export_id_paths
 from openerp.osv import orm, fields
 from openerp.tools.translate import _
 from openerp.tools import DEFAULT_SERVER_DATE_FORMAT, \
@@ -428,8 +430,13 @@ class ir_import(orm.TransientModel):
             }]
 
         _logger.info('importing %d rows...', len(data))
-        import_result = self.pool[record.res_model].load(
-            cr, uid, import_fields, data, context=context)
+        model = self.pool[record.res_model]
+        if options.get('bulk') and self._bulk_loadable(cr, uid, model, import_fields, context=context):
+            import_result = self._bulk_load(
+                cr, uid, model, import_fields, data, context=context)
+        else:
+            import_result = model.load(
+                cr, uid, import_fields, data, context=context)
         _logger.info('done')
 
         # If transaction aborted, RELEASE SAVEPOINT is going to raise
@@ -448,3 +455,150 @@ class ir_import(orm.TransientModel):
             pass
 
         return import_result['messages']
+
+    def _bulk_loadable(self, cr, uid, model, import_fields, context=None):
+        """ Checks whether the import can use :meth:`_bulk_load`: the model
+        must create its records with the generic ORM implementation (no
+        ``create`` override, no ``_inherits``, no workflow), and the imported
+        fields must be plain columns or many2one references, without
+        inverse.
+
+        :param model: model to import into
+        :param list(str) import_fields: imported fields, as given to ``load``
+        :rtype: bool
+        """
+        if model._inherits:
+            return False
+        for method in ('create', '_create'):
+            if getattr(type(model), method).im_func is not getattr(orm.BaseModel, method).im_func:
+                return False
+        cr.execute("SELECT 1 FROM wkf WHERE osv=%s AND on_create LIMIT 1", (model._name,))
+        if cr.fetchone():
+            return False
+        for path in map(fix_import_export_id_paths, import_fields):
+            if path[0] in ('id', '.id'):
+                continue
+            field = model._fields.get(path[0])
+            if field is None or field.inverse or not (field.column and field.column._classic_write):
+                return False
+            if len(path) > 1 and (field.type != 'many2one' or len(path) > 2):
+                return False
+        return True
+
+    def _bulk_references(self, cr, uid, model, import_fields, data, context=None):
+        """ Resolves the many2one references of the whole file with one query
+        per column, for the conversion of the records (see
+        ``_import_references`` in :meth:`ir.fields.converter.db_id_for`).
+        References which can not be resolved this way are left out, and go
+        through the regular per-value conversion.
+
+        :returns: {(comodel name, subfield, value): id}
+        :rtype: dict
+        """
+        references = {}
+        for index, path in enumerate(map(fix_import_export_id_paths, import_fields)):
+            if len(path) != 2 or path[0] in ('id', '.id'):
+                continue
+            field, subfield = model._fields[path[0]], path[1]
+            comodel = self.pool[field.comodel_name]
+            values = set(row[index] for row in data if row[index])
+            if subfield == 'id':
+                xmlids = {}
+                for value in values:
+                    if '.' not in value:
+                        xmlids[(context.get('_import_current_module', ''), value)] = value
+                    elif value.count('.') == 1:
+                        xmlids[tuple(value.split('.'))] = value
+                found = {}
+                for sub_xmlids in cr.split_for_in_conditions(list(xmlids)):
+                    cr.execute("""SELECT module, name, res_id FROM ir_model_data
+                                  WHERE model=%s AND (module, name) IN %s""",
+                               (comodel._name, tuple(sub_xmlids)))
+                    for module, name, res_id in cr.fetchall():
+                        found[xmlids[(module, name)]] = res_id
+                existing = set(comodel.exists(cr, uid, found.values(), context=context))
+                for value, res_id in found.iteritems():
+                    if res_id in existing:
+                        references[(comodel._name, 'id', value)] = res_id
+            elif subfield == '.id':
+                ids = set()
+                for value in values:
+                    try:
+                        ids.add(int(value))
+                    except ValueError:
+                        pass
+                for res_id in comodel.search(cr, uid, [('id', 'in', list(ids))], context=context):
+                    references[(comodel._name, '.id', str(res_id))] = res_id
+        return references
+
+    def _bulk_load(self, cr, uid, model, import_fields, data, context=None):
+        """ Loads the data matrix like :meth:`~openerp.models.BaseModel.load`,
+        but with set-based queries: many2one references are resolved for the
+        whole file at once, and the new records are created together and
+        written with PostgreSQL's ``COPY``. Rows updating existing records go
+        through the regular path.
+
+        Errors are reported per row as in ``load``: if the records can not be
+        created in bulk (e.g. an SQL constraint fails), the import falls back
+        to ``load`` for the whole file.
+
+        :returns: {ids: list(int)|False, messages: [Message]}
+        """
+        if context is None:
+            context = {}
+        ModelData = self.pool['ir.model.data']
+        fields = map(fix_import_export_id_paths, import_fields)
+        messages = []
+
+        convert_context = dict(context, _import_references=self._bulk_references(
+            cr, uid, model, import_fields, data, context=context))
+        records = list(model._convert_records(
+            cr, uid, model._extract_records(cr, uid, fields, data, context=context, log=messages.append),
+            context=convert_context, log=messages.append))
+        if any(message['type'] == 'error' for message in messages):
+            return {'ids': False, 'messages': messages}
+
+        # split records between the ones to create, and the ones to update
+        xmlids = {}
+        for id, xid, record, info in records:
+            if xid:
+                module, name = xid.split('.', 1) if '.' in xid else ('', xid)
+                xmlids[(module, name)] = xid
+        existing = set()
+        for sub_xmlids in cr.split_for_in_conditions(list(xmlids)):
+            cr.execute("SELECT module, name FROM ir_model_data WHERE (module, name) IN %s",
+                       (tuple(sub_xmlids),))
+            existing.update(xmlids[key] for key in cr.fetchall())
+
+        cr.execute('SAVEPOINT import_bulk')
+        try:
+            ids = [None] * len(records)
+            to_create = []
+            for index, (id, xid, record, info) in enumerate(records):
+                if id or (xid and xid in existing):
+                    ids[index] = ModelData._update(cr, uid, model._name, '', record,
+                                                   xml_id=xid, res_id=id, context=context)
+                else:
+                    to_create.append(index)
+            if to_create:
+                new_ids = model.create(cr, uid, [records[index][2] for index in to_create],
+                                       context=dict(context, create_copy=True))
+                data_vals = []
+                for index, res_id in itertools.izip(to_create, new_ids):
+                    ids[index] = res_id
+                    xid = records[index][1]
+                    if xid:
+                        module, name = xid.split('.', 1) if '.' in xid else ('', xid)
+                        data_vals.append({'name': name, 'model': model._name, 'module': module, 'res_id': res_id})
+                        ModelData.loads[(module, name)] = (model._name, res_id)
+                if data_vals:
+                    ModelData.create(cr, SUPERUSER_ID, data_vals, context=dict(context, create_copy=True))
+            cr.execute('RELEASE SAVEPOINT import_bulk')
+        except Exception:
+            # let the regular import report the errors row by row
+            _logger.info("Bulk import into %s failed, falling back to regular import",
+                         model._name, exc_info=True)
+            cr.execute('ROLLBACK TO SAVEPOINT import_bulk')
+            return model.load(cr, uid, import_fields, data, context=context)
+
+        return {'ids': ids, 'messages': messages}
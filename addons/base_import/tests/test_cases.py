@@ -513,3 +513,39 @@ class test_failures(TransactionCase):
             {'headers': True, 'separator': ',', 'quoting': '"'})
         self.assertFalse(
             results, "results should be empty on successful import")
+
+class test_bulk(TransactionCase):
+    def test_bulk_m2o(self):
+        """ Bulk imports resolve references for the whole file and report
+        the same errors as regular imports
+        """
+        Related = self.env['base_import.tests.models.m2o.related']
+        related = Related.create({'value': 42})
+        self.env['ir.model.data'].create({
+            'name': 'bulk_related', 'module': '__test__',
+            'model': Related._name, 'res_id': related.id,
+        })
+
+        Import = self.env['base_import.import']
+        options = {'headers': True, 'separator': ',', 'quoting': '"', 'bulk': True}
+        imp = Import.create({
+            'res_model': 'base_import.tests.models.m2o',
+            'file': 'id,value/id\n'
+                    'bulk_1,__test__.bulk_related\n'
+                    'bulk_2,__test__.bulk_related\n',
+            'file_type': 'text/csv',
+        })
+        self.assertFalse(imp.do(['id', 'value/id'], options))
+        xmlids = self.env['ir.model.data'].search([('name', 'in', ['bulk_1', 'bulk_2'])])
+        self.assertEqual(len(xmlids), 2)
+        for data in xmlids:
+            self.assertEqual(self.env[data.model].browse(data.res_id).value, related)
+
+        imp = Import.create({
+            'res_model': 'base_import.tests.models.m2o',
+            'file': 'value/id\n'
+                    '__test__.bulk_missing\n',
+            'file_type': 'text/csv',
+        })
+        [result] = imp.do(['value/id'], options)
+        self.assertEqual(result['type'], 'error')
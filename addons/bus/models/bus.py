@@ -6,6 +6,7 @@ import random
 import select
 import threading
 import time
+from collections import deque
 
 import openerp
 from openerp import api, fields, models
@@ -16,6 +17,9 @@ _logger = logging.getLogger(__name__)
 # longpolling timeout connection
 TIMEOUT = 50
 
+# delay after which a missing id of bus_bus is no longer expected to commit
+GAP_TIMEOUT = 10
+
 #----------------------------------------------------------
 # Bus
 #----------------------------------------------------------
@@ -44,26 +48,29 @@ class ImBus(models.Model):
 
     @api.model
     def sendmany(self, notifications):
-        channels = set()
+        if not notifications:
+            return
+        # insert all the notifications at once
+        params = []
         for channel, message in notifications:
-            channels.add(channel)
-            values = {
-                "channel": json_dump(channel),
-                "message": json_dump(message)
-            }
-            self.sudo().create(values)
-            if random.random() < 0.01:
-                self.gc()
-        if channels:
-            # The notifications must be commited in database because when calling `NOTIFY imbus`, some pertinent
-            # threads will be awakened and will fetch the notification in the bus table, but since the transaction
-            # is not commited, there will be nothing to fetch, the longpolling will return empty list of notification.
-            # For some reason, this happen when `sendmany` is called more than once on the same request.
-            # `self._cr.commit()` is prevented in a test environement, to allow test rollback.
-            if not openerp.tools.config['test_enable']:
-                self._cr.commit()
-            with openerp.sql_db.db_connect('postgres').cursor() as cr2:
-                cr2.execute("notify imbus, %s", (json_dump(list(channels)),))
+            params.extend([json_dump(channel), json_dump(message), self._uid, self._uid])
+        query = """INSERT INTO bus_bus (channel, message, create_uid, write_uid, create_date, write_date)
+                   VALUES %s""" % ", ".join(
+            ["(%s, %s, %s, %s, now() at time zone 'UTC', now() at time zone 'UTC')"] * len(notifications))
+        self._cr.execute(query, params)
+        if random.random() < 0.01 * len(notifications):
+            self.gc()
+        # The notifications must be commited in database because when calling `NOTIFY imbus`, some pertinent
+        # threads will be awakened and will fetch the notification in the bus table, but since the transaction
+        # is not commited, there will be nothing to fetch, the longpolling will return empty list of notification.
+        # For some reason, this happen when `sendmany` is called more than once on the same request.
+        # `self._cr.commit()` is prevented in a test environement, to allow test rollback.
+        if not openerp.tools.config['test_enable']:
+            self._cr.commit()
+        # a single notification per database: the listeners fetch the new
+        # rows of the database once for all their waiters
+        with openerp.sql_db.db_connect('postgres').cursor() as cr2:
+            cr2.execute("notify imbus, %s", (json_dump(self._cr.dbname),))
 
     @api.model
     def sendone(self, channel, message):
@@ -94,9 +101,126 @@ class ImBus(models.Model):
 #----------------------------------------------------------
 # Dispatcher
 #----------------------------------------------------------
+class ImBuffer(object):
+    """ In-memory buffer of the recent notifications of a database, indexed by
+        channel. The buffer contains all the notifications with an id greater
+        than ``start``.
+
+        The ids of ``bus_bus`` are not committed in order: a row may become
+        visible after rows with greater ids. The ids missing below the greatest
+        buffered one are kept as gaps for ``GAP_TIMEOUT`` seconds, and the rows
+        are fetched again from the lowest gap.
+    """
+    def __init__(self, start):
+        self.start = start
+        self.last = start           # greatest id added to the buffer
+        self.gaps = {}              # {id: time} of the missing ids below last
+        self.ids = set()            # ids of the buffered notifications
+        self.channels = {}          # {channel: deque([(id, notification)])}
+        self.history = deque()      # deque([(time, channel)]) in insertion order
+
+    def low(self):
+        """ Return the id after which the rows must be fetched. """
+        return min(self.gaps) - 1 if self.gaps else self.last
+
+    def add(self, rows):
+        """ Add the rows ``(id, channel, message)`` of ``bus_bus`` to the
+            buffer, and return the channels of the added notifications. The
+            rows that are already buffered, or that the buffer no longer
+            covers, are ignored.
+        """
+        now = time.time()
+        channels = set()
+        for id, channel, message in rows:
+            if id <= self.start or id in self.ids:
+                continue
+            if id > self.last:
+                for gap in xrange(self.last + 1, id):
+                    self.gaps[gap] = now
+                self.last = id
+            else:
+                self.gaps.pop(id, None)
+            notification = {
+                'id': id,
+                'channel': json.loads(channel),
+                'message': json.loads(message),
+            }
+            key = hashable(notification['channel'])
+            self.channels.setdefault(key, deque()).append((id, notification))
+            self.history.append((now, key))
+            self.ids.add(id)
+            channels.add(key)
+        # forget the notifications that the clients no longer expect
+        while self.history and self.history[0][0] < now - TIMEOUT:
+            key = self.history.popleft()[1]
+            queue = self.channels[key]
+            id = queue.popleft()[0]
+            self.ids.discard(id)
+            self.start = max(self.start, id)
+            if not queue:
+                del self.channels[key]
+        # forget the gaps of the rows that were rolled back, or that are too old
+        for gap, noticed in self.gaps.items():
+            if gap <= self.start or noticed < now - GAP_TIMEOUT:
+                del self.gaps[gap]
+        return channels
+
+    def get(self, channels, last):
+        """ Return the buffered notifications of ``channels`` after ``last``,
+            or ``None`` if the buffer does not contain all of them.
+        """
+        if last < self.start:
+            return None
+        result = []
+        for channel in channels:
+            # rows may be committed out of id order, the queues are not sorted
+            for id, notification in self.channels.get(hashable(channel), ()):
+                if id > last:
+                    result.append(notification)
+        result.sort(key=lambda notification: notification['id'])
+        return result
+
+
 class ImDispatch(object):
+    """ Event hub for longpolling requests: a single loop listens to the
+        database notifications, fetches the new rows of ``bus_bus`` once, and
+        wakes up the waiters of their channels. The waiters read their
+        notifications in the in-memory buffers of the hub.
+    """
     def __init__(self):
-        self.channels = {}
+        self.channels = {}          # {(dbname, channel): [event]}
+        self.buffers = {}           # {dbname: ImBuffer}
+        self.lock = threading.RLock()
+        self.wait = True            # whether the requests wait for notifications
+
+    def get_buffer(self, dbname):
+        buffer = self.buffers.get(dbname)
+        if buffer is None:
+            with openerp.sql_db.db_connect(dbname).cursor() as cr:
+                cr.execute("SELECT max(id) FROM bus_bus")
+                start = cr.fetchone()[0] or 0
+            with self.lock:
+                buffer = self.buffers.setdefault(dbname, ImBuffer(start))
+        return buffer
+
+    def fetch(self, dbname):
+        """ Fetch the new notifications of ``dbname``, and wake up their waiters. """
+        buffer = self.buffers.get(dbname)
+        if buffer is None:
+            # nobody waits for notifications in this database
+            return
+        with self.lock:
+            low = buffer.low()
+        with openerp.sql_db.db_connect(dbname).cursor() as cr:
+            cr.execute("SELECT id, channel, message FROM bus_bus WHERE id > %s ORDER BY id",
+                       (low,))
+            rows = cr.fetchall()
+        events = set()
+        with self.lock:
+            for channel in buffer.add(rows):
+                events.update(self.channels.pop((dbname, channel), []))
+        for event in events:
+            event.set()
 
     def poll(self, dbname, channels, last, timeout=TIMEOUT):
         # Dont hang ctrl-c for a poll request, we need to bypass private
@@ -109,22 +233,46 @@ class ImDispatch(object):
             current.setName("openerp.longpolling.request.%s" % current.ident)
 
         registry = openerp.registry(dbname)
+        if not self.wait:
+            # answer at once, the client polls again after a delay
+            with registry.cursor() as cr:
+                return registry['bus.bus'].poll(cr, openerp.SUPERUSER_ID, channels, last)
+
+        buffer = self.get_buffer(dbname)
 
         # immediatly returns if past notifications exist
-        with registry.cursor() as cr:
-            notifications = registry['bus.bus'].poll(cr, openerp.SUPERUSER_ID, channels, last)
+        with self.lock:
+            notifications = buffer.get(channels, last) if last else None
+        if notifications is None:
+            with registry.cursor() as cr:
+                notifications = registry['bus.bus'].poll(cr, openerp.SUPERUSER_ID, channels, last)
         # or wait for future ones
         if not notifications:
             event = self.Event()
-            for channel in channels:
-                self.channels.setdefault(hashable(channel), []).append(event)
-            try:
-                event.wait(timeout=timeout)
-                with registry.cursor() as cr:
-                    notifications = registry['bus.bus'].poll(cr, openerp.SUPERUSER_ID, channels, last)
-            except Exception:
-                # timeout
-                pass
+            with self.lock:
+                # the notifications after the ones in the database are buffered
+                last = max(last, buffer.start)
+                notifications = buffer.get(channels, last)
+                if not notifications:
+                    for channel in channels:
+                        self.channels.setdefault((dbname, hashable(channel)), []).append(event)
+            if not notifications:
+                try:
+                    event.wait(timeout=timeout)
+                except Exception:
+                    # timeout
+                    pass
+                with self.lock:
+                    notifications = buffer.get(channels, last)
+                    for channel in channels:
+                        waiters = self.channels.get((dbname, hashable(channel)))
+                        if waiters and event in waiters:
+                            waiters.remove(event)
+                            if not waiters:
+                                del self.channels[(dbname, hashable(channel))]
+                if notifications is None:
+                    with registry.cursor() as cr:
+                        notifications = registry['bus.bus'].poll(cr, openerp.SUPERUSER_ID, channels, last)
         return notifications
 
     def loop(self):
@@ -139,15 +287,15 @@ class ImDispatch(object):
                     pass
                 else:
                     conn.poll()
-                    channels = []
+                    dbnames = set()
                     while conn.notifies:
-                        channels.extend(json.loads(conn.notifies.pop().payload))
+                        dbnames.add(json.loads(conn.notifies.pop().payload))
                     # dispatch to local threads/greenlets
-                    events = set()
-                    for channel in channels:
-                        events.update(self.channels.pop(hashable(channel), []))
-                    for event in events:
-                        event.set()
+                    for dbname in dbnames:
+                        try:
+                            self.fetch(dbname)
+                        except Exception:
+                            _logger.exception("Bus.loop cannot fetch the notifications of %s", dbname)
 
     def run(self):
         while True:
@@ -164,8 +312,10 @@ class ImDispatch(object):
             self.Event = gevent.event.Event
             gevent.spawn(self.run)
         elif openerp.multi_process:
-            # disabled in prefork mode
-            return
+            # prefork mode: a waiting request would block a synchronous
+            # worker, the workers answer the requests at once; the gevent
+            # process, when running, serves actual longpolling requests
+            self.wait = False
         else:
             # threaded mode
             self.Event = threading.Event
@@ -7,6 +7,7 @@ var Widget = require('web.Widget');
 var bus = {};
 
 bus.ERROR_DELAY = 10000;
+bus.POLL_DELAY = 5000;  // delay after an empty poll, when the server does not wait
 bus.AWAY_TIMEOUT = 300000;  // 5 minutes
 
 bus.Bus = Widget.extend({
@@ -53,10 +54,16 @@ bus.Bus = Widget.extend({
         var self = this;
         self.activated = true;
         var data = {channels: self.channels, last: self.last, options : self.options};
+        var started = Date.now();
         session.rpc('/longpolling/poll', data, {shadow : true}).then(function(result) {
             self._notification_receive(result);
             if(!self.stop){
-                self.poll();
+                // servers without longpolling answer at once, poll them again later
+                if (_.isEmpty(result) && Date.now() - started < bus.POLL_DELAY) {
+                    setTimeout(_.bind(self.poll, self), bus.POLL_DELAY);
+                } else {
+                    self.poll();
+                }
             }
         }, function(unused, e) {
             // no error popup if request is interrupted or fails for any reason
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from mock import patch
+
+from openerp.addons.bus.models.bus import ImBuffer, GAP_TIMEOUT, TIMEOUT, json_dump
+
+
+def row(id, channel, message=None):
+    return (id, json_dump(channel), json_dump(message or 'm%s' % id))
+
+
+class TestImBuffer(unittest.TestCase):
+
+    def ids(self, notifications):
+        return [notification['id'] for notification in notifications]
+
+    def test_buffer(self):
+        buffer = ImBuffer(10)
+        self.assertEqual(buffer.add([row(11, 'c1'), row(12, 'c2'), row(13, 'c1')]), {'c1', 'c2'})
+        self.assertEqual(self.ids(buffer.get(['c1'], 10)), [11, 13])
+        self.assertEqual(self.ids(buffer.get(['c1', 'c2'], 11)), [12, 13])
+        self.assertEqual(buffer.get(['c3'], 10), [])
+        # the notifications before the buffer are not known
+        self.assertIsNone(buffer.get(['c1'], 9))
+
+    def test_out_of_order_rows(self):
+        buffer = ImBuffer(10)
+        # row 12 is committed before row 11
+        self.assertEqual(buffer.add([row(12, 'c1')]), {'c1'})
+        # the rows are read again, only the new one is added
+        self.assertEqual(buffer.add([row(11, 'c2'), row(12, 'c1')]), {'c2'})
+        self.assertEqual(buffer.add([row(11, 'c2'), row(12, 'c1')]), set())
+        self.assertEqual(self.ids(buffer.get(['c1', 'c2'], 10)), [11, 12])
+        # rows before the buffer are ignored
+        self.assertEqual(buffer.add([row(9, 'c1')]), set())
+        self.assertEqual(self.ids(buffer.get(['c1'], 10)), [12])
+
+    def test_gaps(self):
+        buffer = ImBuffer(10)
+        self.assertEqual(buffer.low(), 10)
+        with patch('time.time', return_value=1000.0):
+            # the rows 12 and 13 may not be committed yet
+            buffer.add([row(11, 'c1'), row(14, 'c1')])
+            self.assertEqual(buffer.low(), 11)
+            self.assertEqual(buffer.add([row(13, 'c2'), row(14, 'c1')]), {'c2'})
+            self.assertEqual(buffer.low(), 11)
+        # the row 12 is no longer expected
+        with patch('time.time', return_value=1000.0 + GAP_TIMEOUT + 1):
+            buffer.add([])
+        self.assertEqual(buffer.low(), 14)
+        self.assertEqual(self.ids(buffer.get(['c1', 'c2'], 10)), [11, 13, 14])
+
+    def test_gap_fallback(self):
+        buffer = ImBuffer(10)
+        with patch('time.time', return_value=1000.0):
+            buffer.add([row(11, 'c1'), row(12, 'c2')])
+        with patch('time.time', return_value=1000.0 + TIMEOUT + 1):
+            buffer.add([row(13, 'c1')])
+        # the expired notifications are forgotten
+        self.assertEqual(buffer.start, 12)
+        self.assertEqual(buffer.ids, {13})
+        self.assertEqual(self.ids(buffer.get(['c1', 'c2'], 12)), [13])
+        # the clients behind the buffer must read the database
+        self.assertIsNone(buffer.get(['c1', 'c2'], 11))
+        # a late row expired from the buffer is not added again
+        self.assertEqual(buffer.add([row(11, 'c1')]), set())
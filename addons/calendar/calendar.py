@@ -7,6 +7,7 @@ import openerp
 import openerp.service.report
 import uuid
 import collections
+import itertools
 import babel.dates
 from werkzeug.exceptions import BadRequest
 from datetime import datetime, timedelta
@@ -664,8 +665,12 @@ class calendar_event(osv.Model):
     def do_run_scheduler(self, cr, uid, id, context=None):
         self.pool['calendar.alarm_manager'].get_next_mail(cr, uid, context=context)
 
-    def get_recurrent_date_by_event(self, cr, uid, event, context=None):
+    def get_recurrent_date_by_event(self, cr, uid, event, date_from=None, date_to=None, context=None):
         """Get recurrent dates based on Rule string and all event where recurrent_id is child
+
+        @param date_from: if given, the (naive UTC) datetime before which dates are ignored
+        @param date_to: if given, the (naive UTC) datetime from which dates are ignored; the
+            recurrence is not expanded further
         """
         def todate(date):
             val = parser.parse(''.join((re.compile('\d')).findall(date)))
@@ -690,7 +695,37 @@ class calendar_event(osv.Model):
         all_events = self.browse(cr, uid, ids_depending, context=context)
         for ev in all_events:
             rset1._exdate.append(todate(ev.recurrent_id_date))
-        return [d.astimezone(pytz.UTC) for d in rset1]
+        dates = iter(rset1)
+        if date_from:
+            date_from = pytz.UTC.localize(date_from)
+            dates = itertools.dropwhile(lambda d: d < date_from, dates)
+        if date_to:
+            date_to = pytz.UTC.localize(date_to)
+            dates = itertools.takewhile(lambda d: d < date_to, dates)
+        return [d.astimezone(pytz.UTC) for d in dates]
+
+    def _get_recurrent_window(self, domain):
+        """ Return the window ``(date_from, date_to)`` of naive UTC datetimes out of
+            which no recurrent date can satisfy the date conditions of ``domain``, as
+            they are evaluated by get_recurrent_ids(). Either bound may be None.
+        """
+        date_from = date_to = None
+        if any(arg in ('|', '!') for arg in domain):
+            return date_from, date_to
+        for arg in domain:
+            if arg == '&' or str(arg[0]) not in ('start', 'stop', 'final_date') or not isinstance(arg[2], basestring):
+                continue
+            try:
+                day = datetime.strptime(arg[2][:10], DEFAULT_SERVER_DATE_FORMAT)
+            except ValueError:
+                continue
+            # the dates are compared by day
+            if arg[1] in ('=', '>', '>='):
+                date_from = max(date_from or day, day)
+            if arg[1] in ('=', '<', '<='):
+                next_day = day + timedelta(days=1)
+                date_to = min(date_to or next_day, next_day)
+        return date_from, date_to
 
     def _get_recurrency_end_date(self, cr, uid, id, context=None):
         data = self.read(cr, uid, id, ['final_date', 'recurrency', 'rrule_type', 'count', 'end_type', 'stop'], context=context)
@@ -1146,6 +1181,9 @@ class calendar_event(osv.Model):
         if 'id' not in order_fields:
             order_fields.append('id')
 
+        # only expand the recurrences within the dates the domain asks for
+        date_from, date_to = self._get_recurrent_window(domain)
+
         result_data = []
         result = []
         for ev in self.browse(cr, uid, ids_to_browse, context=context):
@@ -1153,9 +1191,10 @@ class calendar_event(osv.Model):
                 result.append(ev.id)
                 result_data.append(self.get_search_fields(ev, order_fields))
                 continue
-            rdates = self.get_recurrent_date_by_event(cr, uid, ev, context=context)
+            rdates = self.get_recurrent_date_by_event(cr, uid, ev, date_from=date_from, date_to=date_to, context=context)
 
             for r_date in rdates:
+                r_day = r_date.strftime('%Y-%m-%d')
                 # fix domain evaluation
                 # step 1: check date and replace expression by True or False, replace other expressions by True
                 # step 2: evaluation of & and |
@@ -1165,15 +1204,15 @@ class calendar_event(osv.Model):
                 for arg in domain:
                     if str(arg[0]) in ('start', 'stop', 'final_date'):
                         if (arg[1] == '='):
-                            ok = r_date.strftime('%Y-%m-%d') == arg[2]
+                            ok = r_day == arg[2]
                         if (arg[1] == '>'):
-                            ok = r_date.strftime('%Y-%m-%d') > arg[2]
+                            ok = r_day > arg[2]
                         if (arg[1] == '<'):
-                            ok = r_date.strftime('%Y-%m-%d') < arg[2]
+                            ok = r_day < arg[2]
                         if (arg[1] == '>='):
-                            ok = r_date.strftime('%Y-%m-%d') >= arg[2]
+                            ok = r_day >= arg[2]
                         if (arg[1] == '<='):
-                            ok = r_date.strftime('%Y-%m-%d') <= arg[2]
+                            ok = r_day <= arg[2]
                         pile.append(ok)
                     elif str(arg) == str('&') or str(arg) == str('|'):
                         pile.append(arg)
@@ -1734,15 +1773,6 @@ class mail_message(osv.Model):
                     args[index] = (args[index][0], args[index][1], map(lambda x: get_real_ids(x), args[index][2]))
         return super(mail_message, self).search(cr, uid, args, offset=offset, limit=limit, order=order, context=context, count=count)
 
-    def _find_allowed_model_wise(self, cr, uid, doc_model, doc_dict, context=None):
-        if context is None:
-            context = {}
-        if doc_model == 'calendar.event':
-            order = context.get('order', self._order)
-            for virtual_id in self.pool[doc_model].get_recurrent_ids(cr, uid, doc_dict.keys(), [], order=order, context=context):
-                doc_dict.setdefault(virtual_id, doc_dict[get_real_ids(virtual_id)])
-        return super(mail_message, self)._find_allowed_model_wise(cr, uid, doc_model, doc_dict, context=context)
-
 
 class ir_attachment(osv.Model):
     _inherit = "ir.attachment"
@@ -583,20 +583,63 @@ class Message(models.Model):
             cr.execute("""CREATE INDEX mail_message_model_res_id_idx ON mail_message (model, res_id)""")
 
     @api.model
-    def _find_allowed_model_wise(self, doc_model, doc_dict):
-        doc_ids = doc_dict.keys()
-        allowed_doc_ids = self.env[doc_model].with_context(active_test=False).search([('id', 'in', doc_ids)]).ids
-        return set([message_id for allowed_doc_id in allowed_doc_ids for message_id in doc_dict[allowed_doc_id]])
+    def _get_document_models(self):
+        """ Return the models of the documents messages are attached to. The
+        distinct models are read from the index on (model, res_id), with one
+        lookup per model instead of a scan of the whole table. """
+        self._cr.execute("""WITH RECURSIVE doc_model(model) AS (
+                (SELECT model FROM "%(table)s" WHERE model IS NOT NULL ORDER BY model LIMIT 1)
+                UNION ALL
+                SELECT (SELECT model FROM "%(table)s" WHERE model > doc_model.model ORDER BY model LIMIT 1)
+                FROM doc_model WHERE doc_model.model IS NOT NULL
+            )
+            SELECT model FROM doc_model WHERE model IS NOT NULL""" % {'table': self._table})
+        return [row[0] for row in self._cr.fetchall()]
 
     @api.model
-    def _find_allowed_doc_ids(self, model_ids):
+    def _get_allowed_doc_query(self, doc_model):
+        """ Return the SQL query, and its parameters, selecting the ids of the
+        records of ``doc_model`` the current user can read according to the
+        record rules. """
+        DocModel = self.env[doc_model]
+        query = DocModel._where_calc([], active_test=False)
+        DocModel._apply_ir_rules(query, 'read')
+        from_clause, where_clause, where_clause_params = query.get_sql()
+        where_str = where_clause and (" WHERE %s" % where_clause) or ''
+        return 'SELECT "%s".id FROM %s%s' % (DocModel._table, from_clause, where_str), where_clause_params
+
+    @api.model
+    def _get_access_clause(self):
+        """ Return the SQL condition, and its parameters, keeping the messages
+        the current user can read; see :meth:`_search` for the rules. """
+        pid = self.env.user.partner_id.id
+        clauses = [
+            '"%s".author_id = %%s' % self._table,
+            """EXISTS (SELECT 1 FROM "mail_message_res_partner_rel" partner_rel
+                WHERE partner_rel.mail_message_id = "%s".id AND partner_rel.res_partner_id = %%s)""" % self._table,
+            """EXISTS (SELECT 1 FROM "mail_message_mail_channel_rel" channel_rel
+                JOIN "mail_channel_partner" channel_partner ON channel_partner.channel_id = channel_rel.mail_channel_id
+                WHERE channel_rel.mail_message_id = "%s".id AND channel_partner.partner_id = %%s)""" % self._table,
+        ]
+        params = [pid, pid, pid]
         IrModelAccess = self.env['ir.model.access']
-        allowed_ids = set()
-        for doc_model, doc_dict in model_ids.iteritems():
-            if not IrModelAccess.check(doc_model, 'read', False):
+        doc_models = [
+            doc_model for doc_model in self._get_document_models()
+            if doc_model in self.env and IrModelAccess.check(doc_model, 'read', False)
+        ]
+        # abstract models, and models without table or view, have no records
+        tables = set()
+        if doc_models:
+            self._cr.execute("SELECT relname FROM pg_class WHERE relkind IN ('r','v') AND relname IN %s",
+                             (tuple(self.env[doc_model]._table for doc_model in doc_models),))
+            tables = set(row[0] for row in self._cr.fetchall())
+        for doc_model in doc_models:
+            if self.env[doc_model]._table not in tables:
                 continue
-            allowed_ids |= self._find_allowed_model_wise(doc_model, doc_dict)
-        return allowed_ids
+            doc_query, doc_params = self._get_allowed_doc_query(doc_model)
+            clauses.append('("%s".model = %%s AND "%s".res_id IN (%s))' % (self._table, self._table, doc_query))
+            params += [doc_model] + doc_params
+        return '(%s)' % ' OR '.join(clauses), params
 
     @api.model
     def _search(self, args, offset=0, limit=None, order=None, count=False, access_rights_uid=None):
@@ -607,12 +650,14 @@ class Message(models.Model):
         Non employees users see only message with subtype (aka do not see
         internal logs).
 
-        After having received ids of a classic search, keep only:
+        On top of the record rules, the search keeps only the messages where:
         - if author_id == pid, uid is the author, OR
         - uid belongs to a notified channel, OR
         - uid is in the specified recipients, OR
         - uid have read access to the related document is model, res_id
-        - otherwise: remove the id
+
+        Those rules are added to the SQL query, so that offset, limit and count
+        apply to the messages uid can actually see.
         """
         # Rules do not apply to administrator
         if self._uid == SUPERUSER_ID:
@@ -622,53 +667,30 @@ class Message(models.Model):
         # Non-employee see only messages with a subtype (aka, no internal logs)
         if not self.env['res.users'].has_group('base.group_user'):
             args = ['&', '&', ('subtype_id', '!=', False), ('subtype_id.internal', '=', False)] + list(args)
-        # Perform a super with count as False, to have the ids, not a counter
-        ids = super(Message, self)._search(
-            args, offset=offset, limit=limit, order=order,
-            count=False, access_rights_uid=access_rights_uid)
-        if not ids and count:
-            return 0
-        elif not ids:
-            return ids
 
-        pid = self.env.user.partner_id.id
-        author_ids, partner_ids, channel_ids, allowed_ids = set([]), set([]), set([]), set([])
-        model_ids = {}
-
-        # check read access rights before checking the actual rules on the given ids
+        # check read access rights before applying the actual rules in the query
         super(Message, self.sudo(access_rights_uid or self._uid)).check_access_rights('read')
 
-        self._cr.execute("""SELECT DISTINCT m.id, m.model, m.res_id, m.author_id, partner_rel.res_partner_id, channel_partner.channel_id as channel_id
-            FROM "%s" m
-            LEFT JOIN "mail_message_res_partner_rel" partner_rel
-            ON partner_rel.mail_message_id = m.id AND partner_rel.res_partner_id = (%%s)
-            LEFT JOIN "mail_message_mail_channel_rel" channel_rel
-            ON channel_rel.mail_message_id = m.id
-            LEFT JOIN "mail_channel" channel
-            ON channel.id = channel_rel.mail_channel_id
-            LEFT JOIN "mail_channel_partner" channel_partner
-            ON channel_partner.channel_id = channel.id AND channel_partner.partner_id = (%%s)
-            WHERE m.id = ANY (%%s)""" % self._table, (pid, pid, ids,))
-        for id, rmod, rid, author_id, partner_id, channel_id in self._cr.fetchall():
-            if author_id == pid:
-                author_ids.add(id)
-            elif partner_id == pid:
-                partner_ids.add(id)
-            elif channel_id:
-                channel_ids.add(id)
-            elif rmod and rid:
-                model_ids.setdefault(rmod, {}).setdefault(rid, set()).add(id)
-
-        allowed_ids = self._find_allowed_doc_ids(model_ids)
-
-        final_ids = author_ids | partner_ids | channel_ids | allowed_ids
+        query = self._where_calc(args)
+        self._apply_ir_rules(query, 'read')
+        access_clause, access_params = self._get_access_clause()
+        query.where_clause.append(access_clause)
+        query.where_clause_params.extend(access_params)
+        order_by = self._generate_order_by(order, query)
+        from_clause, where_clause, where_clause_params = query.get_sql()
+        where_str = where_clause and (" WHERE %s" % where_clause) or ''
 
         if count:
-            return len(final_ids)
-        else:
-            # re-construct a list based on ids, because set did not keep the original order
-            id_list = [id for id in ids if id in final_ids]
-            return id_list
+            self._cr.execute('SELECT count(1) FROM ' + from_clause + where_str, where_clause_params)
+            return self._cr.fetchone()[0]
+
+        limit_str = limit and ' limit %d' % limit or ''
+        offset_str = offset and ' offset %d' % offset or ''
+        query_str = 'SELECT "%s".id FROM ' % self._table + from_clause + where_str + order_by + limit_str + offset_str
+        self._cr.execute(query_str, where_clause_params)
+        # joins in the order may return the same message several times
+        seen = set()
+        return [row[0] for row in self._cr.fetchall() if row[0] not in seen and not seen.add(row[0])]
 
     @api.multi
     def check_access_rule(self, operation):
@@ -151,6 +151,12 @@ class TestMailMessage(TestMail):
         messages = self.env['mail.message'].sudo(self.user_employee).search([('subject', 'like', '_Test')])
         self.assertEqual(messages, msg3 | msg4 | msg5 | msg7 | msg8)
 
+        # Test: Raoul: limit and count apply to the messages Raoul can read
+        messages = self.env['mail.message'].sudo(self.user_employee).search([('subject', 'like', '_Test')], limit=4, order='id')
+        self.assertEqual(messages, msg3 | msg4 | msg5 | msg7)
+        count = self.env['mail.message'].sudo(self.user_employee).search_count([('subject', 'like', '_Test')])
+        self.assertEqual(count, 5)
+
         # Test: Admin: all messages
         messages = self.env['mail.message'].search([('subject', 'like', '_Test')])
         self.assertEqual(messages, msg1 | msg2 | msg3 | msg4 | msg5 | msg6 | msg7 | msg8)
@@ -164,6 +170,26 @@ class TestMailMessage(TestMail):
         messages = self.env['mail.message'].sudo(self.user_portal).search([('subject', 'like', '_Test')])
         self.assertEqual(messages, msg4 | msg5)
 
+    def test_mail_message_access_search_abstract_model(self):
+        # Data: a message on an abstract model readable by employees
+        self.env['ir.model.access'].create({
+            'name': 'mail.thread employee',
+            'model_id': self.env['ir.model'].search([('model', '=', 'mail.thread')]).id,
+            'group_id': self.ref('base.group_user'),
+            'perm_read': True,
+        })
+        msg_thread = self.env['mail.message'].create({
+            'subject': '_Test', 'body': 'A Thread', 'subtype_id': self.ref('mail.mt_comment')})
+        # abstract models have no record to create a message on
+        self.env.cr.execute("UPDATE mail_message SET model = 'mail.thread', res_id = %s WHERE id = %s",
+                            (self.group_pigs.id, msg_thread.id))
+        msg = self.env['mail.message'].sudo(self.user_employee).create({
+            'subject': '_Test', 'body': 'B', 'subtype_id': self.ref('mail.mt_comment')})
+
+        # Test: the abstract model has no records to read
+        messages = self.env['mail.message'].sudo(self.user_employee).search([('subject', 'like', '_Test')])
+        self.assertEqual(messages, msg)
+
     @mute_logger('openerp.addons.base.ir.ir_model', 'openerp.models')
     def test_mail_message_access_read_crash(self):
         # TODO: Change the except_orm to Warning ( Because here it's call check_access_rule
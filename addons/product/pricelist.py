@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
-from itertools import chain
 import time
 
 from openerp import tools
@@ -112,58 +111,122 @@ class product_pricelist(osv.osv):
     def _price_get_multi(self, cr, uid, pricelist, products_by_qty_by_partner, context=None):
         return dict((key, price[0]) for key, price in self._price_rule_get_multi(cr, uid, pricelist, products_by_qty_by_partner, context=context).items())
 
+    @tools.ormcache('pricelist_id', 'date', depends=('product.pricelist.item',))
+    def _get_price_rules(self, cr, uid, pricelist_id, date):
+        """ Return the items of the pricelist valid at ``date``, indexed by what
+            they apply on, as a dictionary with the keys:
+
+            * ``'product'``: ``{product_id: rules}`` for the items on a variant,
+            * ``'template'``: ``{template_id: rules}`` for the items on a product,
+            * ``'categ'``: ``{categ_id: rules}`` for the items on a category,
+            * ``'global'``: the list of the other rules,
+
+            where a rule is a dictionary with the values of an item, and its
+            rank in the evaluation order of the items under the key ``'rank'``.
+        """
+        cr.execute(
+            'SELECT id, min_quantity, product_tmpl_id, product_id, categ_id, '
+            '       base, base_pricelist_id, compute_price, fixed_price, percent_price, '
+            '       price_discount, price_round, price_surcharge, price_min_margin, price_max_margin '
+            'FROM product_pricelist_item '
+            'WHERE (pricelist_id = %s) '
+            'AND ((date_start IS NULL OR date_start<=%s) AND (date_end IS NULL OR date_end>=%s)) '
+            'ORDER BY applied_on, min_quantity desc',
+            (pricelist_id, date, date))
+        index = {'product': {}, 'template': {}, 'categ': {}, 'global': []}
+        for rank, rule in enumerate(cr.dictfetchall()):
+            rule['rank'] = rank
+            if rule['product_id']:
+                index['product'].setdefault(rule['product_id'], []).append(rule)
+            elif rule['product_tmpl_id']:
+                index['template'].setdefault(rule['product_tmpl_id'], []).append(rule)
+            elif rule['categ_id']:
+                index['categ'].setdefault(rule['categ_id'], []).append(rule)
+            else:
+                index['global'].append(rule)
+        return index
+
     def _price_rule_get_multi(self, cr, uid, pricelist, products_by_qty_by_partner, context=None):
         context = context or {}
         date = context.get('date') and context['date'][0:10] or time.strftime(DEFAULT_SERVER_DATE_FORMAT)
         products = map(lambda x: x[0], products_by_qty_by_partner)
         product_uom_obj = self.pool.get('product.uom')
+        currency_obj = self.pool['res.currency']
 
         if not products:
             return {}
 
-        categ_ids = {}
-        for p in products:
-            categ = p.categ_id
-            while categ:
-                categ_ids[categ.id] = True
-                categ = categ.parent_id
-        categ_ids = categ_ids.keys()
-
+        index = self._get_price_rules(cr, uid, pricelist.id, date)
         is_product_template = products[0]._name == "product.template"
-        if is_product_template:
-            prod_tmpl_ids = [tmpl.id for tmpl in products]
-            # all variants of all products
-            prod_ids = [p.id for p in
-                        list(chain.from_iterable([t.product_variant_ids for t in products]))]
-        else:
-            prod_ids = [product.id for product in products]
-            prod_tmpl_ids = [product.product_tmpl_id.id for product in products]
-
-        # Load all rules
-        cr.execute(
-            'SELECT i.id '
-            'FROM product_pricelist_item AS i '
-            'WHERE (product_tmpl_id IS NULL OR product_tmpl_id = any(%s))'
-            'AND (product_id IS NULL OR product_id = any(%s))'
-            'AND (categ_id IS NULL OR categ_id = any(%s)) '
-            'AND (pricelist_id = %s) '
-            'AND ((i.date_start IS NULL OR i.date_start<=%s) AND (i.date_end IS NULL OR i.date_end>=%s))'
-            'ORDER BY applied_on, min_quantity desc',
-            (prod_tmpl_ids, prod_ids, categ_ids, pricelist.id, date, date))
 
-        item_ids = [x[0] for x in cr.fetchall()]
-        items = self.pool.get('product.pricelist.item').browse(cr, uid, item_ids, context=context)
-        results = {}
+        def get_rule(product, qty_in_product_uom):
+            # the rules that may apply to the product, in evaluation order
+            categ_ids = set()
+            categ = product.categ_id
+            while categ:
+                categ_ids.add(categ.id)
+                categ = categ.parent_id
+            if is_product_template:
+                rules = list(index['template'].get(product.id, []))
+                # product rule acceptable on template if has only one variant
+                if product.product_variant_count <= 1 and product.product_variant_ids:
+                    rules += index['product'].get(product.product_variant_ids[0].id, [])
+            else:
+                rules = index['template'].get(product.product_tmpl_id.id, []) + \
+                        index['product'].get(product.id, [])
+            for categ_id in categ_ids:
+                rules += index['categ'].get(categ_id, [])
+            rules += index['global']
+            rules.sort(key=lambda rule: rule['rank'])
+
+            for rule in rules:
+                if rule['min_quantity'] and qty_in_product_uom < rule['min_quantity']:
+                    continue
+                if is_product_template:
+                    if rule['product_tmpl_id'] and product.id != rule['product_tmpl_id']:
+                        continue
+                    if rule['product_id'] and \
+                            (product.product_variant_count > 1 or product.product_variant_ids[0].id != rule['product_id']):
+                        continue
+                else:
+                    if rule['product_tmpl_id'] and product.product_tmpl_id.id != rule['product_tmpl_id']:
+                        continue
+                    if rule['product_id'] and product.id != rule['product_id']:
+                        continue
+                if rule['categ_id'] and rule['categ_id'] not in categ_ids:
+                    continue
+                return rule
+            return None
+
+        # if Public user try to access standard price from website sale, need to call _price_get.
+        # Base prices are computed once for all products, per type of price.
+        base_prices = {}
+        def get_base_price(product, base):
+            if base not in base_prices:
+                base_prices[base] = self.pool['product.template']._price_get(cr, uid, products, base, context=context)
+            return base_prices[base][product.id]
+
+        # Currency rates are computed once per currency.
+        rates = {}
+        to_currency = pricelist.currency_id
+        def convert(from_currency_id, amount, round=True):
+            from_currency_id = from_currency_id or to_currency.id
+            if from_currency_id != to_currency.id:
+                if from_currency_id not in rates:
+                    from_currency = currency_obj.browse(cr, uid, from_currency_id, context=context)
+                    rates[from_currency_id] = currency_obj._get_conversion_rate(
+                        cr, uid, from_currency, to_currency, context=context)
+                amount = amount * rates[from_currency_id]
+            return currency_obj.round(cr, uid, to_currency, amount) if round else amount
+
+        # select the rule of every product
+        selection = []
         for product, qty, partner in products_by_qty_by_partner:
-            results[product.id] = 0.0
-            suitable_rule = False
-
             # Final unit price is computed according to `qty` in the `qty_uom_id` UoM.
             # An intermediary unit price may be computed according to a different UoM, in
             # which case the price_uom_id contains that UoM.
             # The final price will be converted to match `qty_uom_id`.
             qty_uom_id = context.get('uom') or product.uom_id.id
-            price_uom_id = product.uom_id.id
             qty_in_product_uom = qty
             if qty_uom_id != product.uom_id.id:
                 try:
@@ -172,71 +235,78 @@ class product_pricelist(osv.osv):
                 except UserError:
                     # Ignored - incompatible UoM in context, use default product UoM
                     pass
-
-            # if Public user try to access standard price from website sale, need to call _price_get.
-            price = self.pool['product.template']._price_get(cr, uid, [product], 'list_price', context=context)[product.id]
-
+            selection.append((product, qty, partner, qty_uom_id, get_rule(product, qty_in_product_uom)))
+
+        # prices based on other pricelists are computed with one call per
+        # pricelist (and per occurrence of a product in the given products)
+        other_prices = {}
+        other_entries = {}
+        for index_entry, (product, qty, partner, qty_uom_id, rule) in enumerate(selection):
+            if rule and rule['base'] == 'pricelist' and rule['base_pricelist_id']:
+                other_entries.setdefault(rule['base_pricelist_id'], []).append((index_entry, (product, qty, partner)))
+        for base_pricelist_id, entries in other_entries.iteritems():
+            base_pricelist = self.browse(cr, uid, base_pricelist_id, context=context)
+            while entries:
+                batch, rest, seen = [], [], set()
+                for index_entry, entry in entries:
+                    (rest if entry[0].id in seen else batch).append((index_entry, entry))
+                    seen.add(entry[0].id)
+                prices = self._price_get_multi(cr, uid, base_pricelist, [entry for _index, entry in batch], context=context)
+                for index_entry, entry in batch:
+                    other_prices[index_entry] = prices[entry[0].id]
+                entries = rest
+
+        user_company = self.pool['res.users'].browse(cr, uid, uid, context=context).company_id
+        results = {}
+        for index_entry, (product, qty, partner, qty_uom_id, rule) in enumerate(selection):
+            price = get_base_price(product, 'list_price')
             price_uom_id = qty_uom_id
-            for rule in items:
-                if rule.min_quantity and qty_in_product_uom < rule.min_quantity:
-                    continue
-                if is_product_template:
-                    if rule.product_tmpl_id and product.id != rule.product_tmpl_id.id:
-                        continue
-                    if rule.product_id and \
-                            (product.product_variant_count > 1 or product.product_variant_ids[0].id != rule.product_id.id):
-                        # product rule acceptable on template if has only one variant
-                        continue
-                else:
-                    if rule.product_tmpl_id and product.product_tmpl_id.id != rule.product_tmpl_id.id:
-                        continue
-                    if rule.product_id and product.id != rule.product_id.id:
-                        continue
 
-                if rule.base == 'pricelist' and rule.base_pricelist_id:
-                    price_tmp = self._price_get_multi(cr, uid, rule.base_pricelist_id, [(product, qty, partner)], context=context)[product.id]
-                    ptype_src = rule.base_pricelist_id.currency_id.id
-                    price = self.pool['res.currency'].compute(cr, uid, ptype_src, pricelist.currency_id.id, price_tmp, round=False, context=context)
+            if rule:
+                if rule['base'] == 'pricelist' and rule['base_pricelist_id']:
+                    price_tmp = other_prices[index_entry]
+                    ptype_src = self.browse(cr, uid, rule['base_pricelist_id'], context=context).currency_id.id
+                    price = convert(ptype_src, price_tmp, round=False)
                 else:
                     # if base option is public price take sale price else cost price of product
                     # price_get returns the price in the context UoM, i.e. qty_uom_id
-                    price = self.pool['product.template']._price_get(cr, uid, [product], rule.base, context=context)[product.id]
+                    price = get_base_price(product, rule['base'])
 
                 convert_to_price_uom = (lambda price: product_uom_obj._compute_price(
                                             cr, uid, product.uom_id.id,
                                             price, price_uom_id))
 
                 if price is not False:
-                    if rule.compute_price == 'fixed':
-                        price = convert_to_price_uom(rule.fixed_price)
-                    elif rule.compute_price == 'percentage':
-                        price = (price - (price * (rule.percent_price / 100))) or 0.0
+                    if rule['compute_price'] == 'fixed':
+                        price = convert_to_price_uom(rule['fixed_price'])
+                    elif rule['compute_price'] == 'percentage':
+                        price = (price - (price * (rule['percent_price'] / 100))) or 0.0
                     else:
                         #complete formula
                         price_limit = price
-                        price = (price - (price * (rule.price_discount / 100))) or 0.0
-                        if rule.price_round:
-                            price = tools.float_round(price, precision_rounding=rule.price_round)
+                        price = (price - (price * (rule['price_discount'] / 100))) or 0.0
+                        if rule['price_round']:
+                            price = tools.float_round(price, precision_rounding=rule['price_round'])
 
-                        if rule.price_surcharge:
-                            price_surcharge = convert_to_price_uom(rule.price_surcharge)
+                        if rule['price_surcharge']:
+                            price_surcharge = convert_to_price_uom(rule['price_surcharge'])
                             price += price_surcharge
 
-                        if rule.price_min_margin:
-                            price_min_margin = convert_to_price_uom(rule.price_min_margin)
+                        if rule['price_min_margin']:
+                            price_min_margin = convert_to_price_uom(rule['price_min_margin'])
                             price = max(price, price_limit + price_min_margin)
 
-                        if rule.price_max_margin:
-                            price_max_margin = convert_to_price_uom(rule.price_max_margin)
+                        if rule['price_max_margin']:
+                            price_max_margin = convert_to_price_uom(rule['price_max_margin'])
                             price = min(price, price_limit + price_max_margin)
-                    suitable_rule = rule
-                break
+                else:
+                    rule = None
+
             # Final price conversion into pricelist currency
-            if suitable_rule and suitable_rule.compute_price != 'fixed' and suitable_rule.base != 'pricelist':
-                user_company = self.pool['res.users'].browse(cr, uid, uid, context=context).company_id
-                price = self.pool['res.currency'].compute(cr, uid, user_company.currency_id.id, pricelist.currency_id.id, price, context=context)
+            if rule and rule['compute_price'] != 'fixed' and rule['base'] != 'pricelist':
+                price = convert(user_company.currency_id.id, price)
 
-            results[product.id] = (price, suitable_rule and suitable_rule.id or False)
+            results[product.id] = (price, rule and rule['id'] or False)
         return results
 
     def price_get(self, cr, uid, ids, prod_id, qty, partner=None, context=None):
@@ -320,6 +390,22 @@ class product_pricelist_item(osv.osv):
         (_check_margin, 'Error! The minimum margin should be lower than the maximum margin.', ['price_min_margin', 'price_max_margin'])
     ]
 
+    # the rules indexed by product.pricelist._get_price_rules() depend on the items
+    def create(self, cr, uid, vals, context=None):
+        res = super(product_pricelist_item, self).create(cr, uid, vals, context=context)
+        self.clear_caches()
+        return res
+
+    def write(self, cr, uid, ids, vals, context=None):
+        res = super(product_pricelist_item, self).write(cr, uid, ids, vals, context=context)
+        self.clear_caches()
+        return res
+
+    def unlink(self, cr, uid, ids, context=None):
+        res = super(product_pricelist_item, self).unlink(cr, uid, ids, context=context)
+        self.clear_caches()
+        return res
+
 
 class product_pricelist_item_new(models.Model):
     _inherit = "product.pricelist.item"
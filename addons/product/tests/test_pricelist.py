@@ -109,3 +109,35 @@ class TestPricelist(TransactionCase):
         test_unit_price(3500, kg, (tonne_price - 10) / 1000.0)
         test_unit_price(2, tonne, tonne_price)
         test_unit_price(3, tonne, tonne_price - 10)
+
+    def test_30_pricelist_rules_index(self):
+        # Verify that the indexed rules follow the changes of the items, and
+        # that category rules only apply to the products of the category
+        cr, uid = self.cr, self.uid
+        pricelist_obj = self.registry('product.pricelist')
+        item_obj = self.registry('product.pricelist.item')
+        usb_adapter = self.product_product.browse(cr, uid, self.usb_adapter_id)
+        datacard = self.product_product.browse(cr, uid, self.datacard_id)
+        pricelist_id = self.sale_pricelist_id
+
+        def price_rule(product):
+            return pricelist_obj.price_rule_get(cr, uid, [pricelist_id], product.id, 1)[pricelist_id]
+
+        usb_adapter_price, item_id = price_rule(usb_adapter)
+        self.assertAlmostEqual(usb_adapter_price, usb_adapter.list_price * 0.9)
+
+        item_obj.write(cr, uid, [item_id], {'price_discount': 20})
+        self.assertAlmostEqual(price_rule(usb_adapter)[0], usb_adapter.list_price * 0.8)
+
+        categ_id = self.registry('product.category').create(cr, uid, {'name': 'Adapters'})
+        usb_adapter.write({'categ_id': categ_id})
+        item_obj.unlink(cr, uid, [item_id])
+        categ_item_id = item_obj.create(cr, uid, {
+            'pricelist_id': pricelist_id,
+            'applied_on': '2_product_category',
+            'categ_id': categ_id,
+            'compute_price': 'fixed',
+            'fixed_price': 42,
+        })
+        self.assertEqual(price_rule(usb_adapter), (42, categ_item_id))
+        self.assertNotEqual(price_rule(datacard)[1], categ_item_id)
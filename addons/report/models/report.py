@@ -19,13 +19,19 @@ import base64
 import logging
 import tempfile
 import lxml.html
+import multiprocessing
 import os
 import subprocess
+import threading
 from contextlib import closing
 from distutils.version import LooseVersion
 from functools import partial
+from multiprocessing.pool import ThreadPool
 from pyPdf import PdfFileWriter, PdfFileReader
 
+if os.name == 'posix':
+    import resource
+
 
 #--------------------------------------------------------------------------
 # Helpers
@@ -61,6 +67,58 @@ else:
         wkhtmltopdf_state = 'workers'
 
 
+#--------------------------------------------------------------------------
+# Pool of wkhtmltopdf processes
+#
+# The following options of the configuration file limit the wkhtmltopdf
+# processes run by an Odoo process:
+#  - wkhtmltopdf_processes: maximum number of simultaneous processes
+#    (default: the number of CPUs)
+#  - wkhtmltopdf_batch_size: maximum number of documents converted by one
+#    process, when their headers and footers allow it (default: 10)
+#  - limit_wkhtmltopdf_memory: maximum virtual memory of a process, in bytes
+#  - limit_wkhtmltopdf_time_cpu: maximum CPU time of a process, in seconds
+#--------------------------------------------------------------------------
+def _get_wkhtmltopdf_processes():
+    try:
+        return max(int(config.get('wkhtmltopdf_processes') or multiprocessing.cpu_count()), 1)
+    except NotImplementedError:
+        return 1
+
+wkhtmltopdf_processes = _get_wkhtmltopdf_processes()
+wkhtmltopdf_batch_size = max(int(config.get('wkhtmltopdf_batch_size') or 10), 1)
+wkhtmltopdf_semaphore = threading.BoundedSemaphore(wkhtmltopdf_processes)
+
+# headers and footers showing those wkhtmltopdf variables depend on the
+# position of the page in the pdf, their documents cannot be batched
+_re_wkhtmltopdf_page_variables = re.compile(
+    r'class=["\'][^"\']*\b(page|frompage|topage|sitepage|sitepages|section|subsection|subsubsection)\b')
+
+def _set_wkhtmltopdf_limits():
+    """ Set the resource limits of a wkhtmltopdf process (run in the child
+    process before executing wkhtmltopdf).
+    """
+    memory = int(config.get('limit_wkhtmltopdf_memory') or 0)
+    if memory:
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory if hard < 0 else min(memory, hard), hard))
+    cpu_time = int(config.get('limit_wkhtmltopdf_time_cpu') or 0)
+    if cpu_time:
+        soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_time if hard < 0 else min(cpu_time, hard), hard))
+
+def _run_wkhtmltopdf_process(command):
+    """ Run the wkhtmltopdf command line ``command`` once a slot of the pool
+    is available, and return the pair ``(returncode, stderr)``.
+    """
+    with wkhtmltopdf_semaphore:
+        preexec_fn = _set_wkhtmltopdf_limits if os.name == 'posix' else None
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   preexec_fn=preexec_fn)
+        out, err = process.communicate()
+        return process.returncode, err
+
+
 class Report(osv.Model):
     _name = "report"
     _description = "Report"
@@ -377,91 +435,120 @@ class Report(osv.Model):
             command_args.extend(['--orientation', 'landscape'])
 
         # Execute WKhtmltopdf
-        pdfdocuments = []
         temporary_files = []
 
-        for index, reporthtml in enumerate(bodies):
-            local_command_args = []
-            pdfreport_fd, pdfreport_path = tempfile.mkstemp(suffix='.pdf', prefix='report.tmp.')
-            temporary_files.append(pdfreport_path)
-
-            # Directly load the document if we already have it
-            if save_in_attachment and save_in_attachment['loaded_documents'].get(reporthtml[0]):
-                with closing(os.fdopen(pdfreport_fd, 'w')) as pdfreport:
-                    pdfreport.write(save_in_attachment['loaded_documents'][reporthtml[0]])
-                pdfdocuments.append(pdfreport_path)
-                continue
+        def temporary_file(content, suffix, prefix):
+            fd, path = tempfile.mkstemp(suffix=suffix, prefix=prefix)
+            temporary_files.append(path)
+            with closing(os.fdopen(fd, 'w')) as tmpfile:
+                tmpfile.write(content)
+            return path
+
+        try:
+            # Prepare the conversions: a document is either the path of a pdf
+            # loaded from the attachments, or a job converting a batch of
+            # bodies with the same header and footer. Bodies saved as
+            # attachments and bodies whose header or footer show the page
+            # numbers have their own job.
+            documents = []
+            jobs = []
+            for index, reporthtml in enumerate(bodies):
+                # Directly load the document if we already have it
+                if save_in_attachment and save_in_attachment['loaded_documents'].get(reporthtml[0]):
+                    documents.append(temporary_file(
+                        save_in_attachment['loaded_documents'][reporthtml[0]], '.pdf', 'report.tmp.'))
+                    continue
+
+                header = headers[index] if headers else None
+                footer = footers[index] if footers else None
+                saved = reporthtml[0] is not False and bool(save_in_attachment.get(reporthtml[0]))
+                batchable = not saved and not any(
+                    _re_wkhtmltopdf_page_variables.search(html)
+                    for html in (header, footer) if html
+                )
+
+                job = jobs[-1] if jobs and documents[-1] is jobs[-1] else None
+                if not (batchable and job and job['batchable'] and len(job['bodies']) < wkhtmltopdf_batch_size
+                        and job['header'] == header and job['footer'] == footer):
+                    job = {'header': header, 'footer': footer, 'bodies': [],
+                           'batchable': batchable, 'saved': saved}
+                    jobs.append(job)
+                    documents.append(job)
+                job['bodies'].append(reporthtml)
+
+            # Build the command lines; wkhtmltopdf handles header/footer as
+            # separate pages, create them if necessary.
+            commands = []
+            for job in jobs:
+                local_command_args = []
+                if job['header'] is not None:
+                    path = temporary_file(job['header'], '.html', 'report.header.tmp.')
+                    local_command_args.extend(['--header-html', path])
+                if job['footer'] is not None:
+                    path = temporary_file(job['footer'], '.html', 'report.footer.tmp.')
+                    local_command_args.extend(['--footer-html', path])
+                for reporthtml in job['bodies']:
+                    path = temporary_file(reporthtml[1], '.html', 'report.body.tmp.')
+                    local_command_args.append(path)
+                job['path'] = temporary_file('', '.pdf', 'report.tmp.')
+                commands.append([_get_wkhtmltopdf_bin()] + command_args + local_command_args + [job['path']])
+
+            # Run the conversions concurrently
+            if len(commands) > 1:
+                pool = ThreadPool(min(len(commands), wkhtmltopdf_processes))
+                try:
+                    results = pool.map(_run_wkhtmltopdf_process, commands)
+                finally:
+                    pool.close()
+                    pool.join()
             else:
-                os.close(pdfreport_fd)
-
-            # Wkhtmltopdf handles header/footer as separate pages. Create them if necessary.
-            if headers:
-                head_file_fd, head_file_path = tempfile.mkstemp(suffix='.html', prefix='report.header.tmp.')
-                temporary_files.append(head_file_path)
-                with closing(os.fdopen(head_file_fd, 'w')) as head_file:
-                    head_file.write(headers[index])
-                local_command_args.extend(['--header-html', head_file_path])
-            if footers:
-                foot_file_fd, foot_file_path = tempfile.mkstemp(suffix='.html', prefix='report.footer.tmp.')
-                temporary_files.append(foot_file_path)
-                with closing(os.fdopen(foot_file_fd, 'w')) as foot_file:
-                    foot_file.write(footers[index])
-                local_command_args.extend(['--footer-html', foot_file_path])
-
-            # Body stuff
-            content_file_fd, content_file_path = tempfile.mkstemp(suffix='.html', prefix='report.body.tmp.')
-            temporary_files.append(content_file_path)
-            with closing(os.fdopen(content_file_fd, 'w')) as content_file:
-                content_file.write(reporthtml[1])
-
-            try:
-                wkhtmltopdf = [_get_wkhtmltopdf_bin()] + command_args + local_command_args
-                wkhtmltopdf += [content_file_path] + [pdfreport_path]
-                process = subprocess.Popen(wkhtmltopdf, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                out, err = process.communicate()
-
-                if process.returncode not in [0, 1]:
+                results = map(_run_wkhtmltopdf_process, commands)
+
+            for returncode, err in results:
+                if returncode not in [0, 1]:
                     raise UserError(_('Wkhtmltopdf failed (error code: %s). '
-                                      'Message: %s') % (str(process.returncode), err))
-
-                # Save the pdf in attachment if marked
-                if reporthtml[0] is not False and save_in_attachment.get(reporthtml[0]):
-                    with open(pdfreport_path, 'rb') as pdfreport:
-                        attachment = {
-                            'name': save_in_attachment.get(reporthtml[0]),
-                            'datas': base64.encodestring(pdfreport.read()),
-                            'datas_fname': save_in_attachment.get(reporthtml[0]),
-                            'res_model': save_in_attachment.get('model'),
-                            'res_id': reporthtml[0],
-                        }
-                        try:
-                            self.pool['ir.attachment'].create(cr, uid, attachment)
-                        except AccessError:
-                            _logger.info("Cannot save PDF report %r as attachment", attachment['name'])
-                        else:
-                            _logger.info('The PDF document %s is now saved in the database',
-                                         attachment['name'])
-
-                pdfdocuments.append(pdfreport_path)
-            except:
-                raise
-
-        # Return the entire document
-        if len(pdfdocuments) == 1:
-            entire_report_path = pdfdocuments[0]
-        else:
-            entire_report_path = self._merge_pdf(pdfdocuments)
-            temporary_files.append(entire_report_path)
-
-        with open(entire_report_path, 'rb') as pdfdocument:
-            content = pdfdocument.read()
-
-        # Manual cleanup of the temporary files
-        for temporary_file in temporary_files:
-            try:
-                os.unlink(temporary_file)
-            except (OSError, IOError):
-                _logger.error('Error when trying to remove file %s' % temporary_file)
+                                      'Message: %s') % (str(returncode), err))
+
+            # Save the pdf in attachment if marked
+            for job in jobs:
+                if not job['saved']:
+                    continue
+                reporthtml = job['bodies'][0]
+                with open(job['path'], 'rb') as pdfreport:
+                    attachment = {
+                        'name': save_in_attachment.get(reporthtml[0]),
+                        'datas': base64.encodestring(pdfreport.read()),
+                        'datas_fname': save_in_attachment.get(reporthtml[0]),
+                        'res_model': save_in_attachment.get('model'),
+                        'res_id': reporthtml[0],
+                    }
+                    try:
+                        self.pool['ir.attachment'].create(cr, uid, attachment)
+                    except AccessError:
+                        _logger.info("Cannot save PDF report %r as attachment", attachment['name'])
+                    else:
+                        _logger.info('The PDF document %s is now saved in the database',
+                                     attachment['name'])
+
+            pdfdocuments = [doc['path'] if isinstance(doc, dict) else doc for doc in documents]
+
+            # Return the entire document
+            if len(pdfdocuments) == 1:
+                entire_report_path = pdfdocuments[0]
+            else:
+                entire_report_path = self._merge_pdf(pdfdocuments)
+                temporary_files.append(entire_report_path)
+
+            with open(entire_report_path, 'rb') as pdfdocument:
+                content = pdfdocument.read()
+
+        finally:
+            # Manual cleanup of the temporary files
+            for temporary_file_path in temporary_files:
+                try:
+                    os.unlink(temporary_file_path)
+                except (OSError, IOError):
+                    _logger.error('Error when trying to remove file %s' % temporary_file_path)
 
         return content
 
@@ -7,7 +7,7 @@ from dateutil.relativedelta import relativedelta
 from openerp.tools import DEFAULT_SERVER_DATE_FORMAT
 from operator import itemgetter
 
-from openerp import tools
+from openerp import tools, SUPERUSER_ID
 from openerp.osv import fields, osv
 from openerp.tools.float_utils import float_compare
 from openerp.tools.translate import _
@@ -57,8 +57,7 @@ class resource_calendar(osv.osv):
         intervals = sorted(intervals, key=itemgetter(0))  # sort on first datetime
         cleaned = []
         working_interval = None
-        while intervals:
-            current_interval = intervals.pop(0)
+        for current_interval in intervals:
             if not working_interval:  # init
                 working_interval = [current_interval[0], current_interval[1]]
             elif working_interval[1] < current_interval[0]:  # interval is disjoint
@@ -150,32 +149,101 @@ class resource_calendar(osv.osv):
                 break
         return results
 
+    # --------------------------------------------------
+    # Calendar data
+    # --------------------------------------------------
+
+    @tools.ormcache('id', depends=('resource.calendar.attendance',))
+    def _get_attendance_data(self, cr, uid, id):
+        """ Return the attendances of the calendar, sorted by weekday and
+        starting hour, as a tuple of tuples (dayofweek, date_from, date_to,
+        hour_from, hour_to, attendance_id). """
+        att_obj = self.pool['resource.calendar.attendance']
+        att_ids = att_obj.search(cr, SUPERUSER_ID, [('calendar_id', '=', id)])
+        atts = att_obj.read(cr, SUPERUSER_ID, att_ids, ['dayofweek', 'date_from', 'date_to', 'hour_from', 'hour_to'])
+        return tuple(
+            (int(att['dayofweek']), att['date_from'], att['date_to'], att['hour_from'], att['hour_to'], att['id'])
+            for att in atts
+        )
+
+    @tools.ormcache('id', depends=('resource.calendar.leaves',))
+    def _get_leave_data(self, cr, uid, id):
+        """ Return the leaves of the calendar as a tuple of tuples (date_from,
+        date_to, resource_id), with datetime bounds. """
+        leave_obj = self.pool['resource.calendar.leaves']
+        leave_ids = leave_obj.search(cr, SUPERUSER_ID, [('calendar_id', '=', id)])
+        leaves = leave_obj.read(cr, SUPERUSER_ID, leave_ids, ['date_from', 'date_to', 'resource_id'], load='_classic_write')
+        return tuple(
+            (datetime.datetime.strptime(leave['date_from'], tools.DEFAULT_SERVER_DATETIME_FORMAT),
+             datetime.datetime.strptime(leave['date_to'], tools.DEFAULT_SERVER_DATETIME_FORMAT),
+             leave['resource_id'])
+            for leave in leaves
+        )
+
+    def _get_attendances_of_day(self, cr, uid, id, date):
+        """ Return the attendance data of the calendar valid on ``date``. """
+        weekday = date.weekday()
+        date = date.strftime(DEFAULT_SERVER_DATE_FORMAT)
+        return [
+            att for att in self._get_attendance_data(cr, uid, id)
+            if att[0] == weekday and not ((att[1] and date < att[1]) or (att[2] and date > att[2]))
+        ]
+
+    def _prepare_days(self, cr, uid, id, compute_leaves=False, resource_id=None, context=None):
+        """ Load once what the computation of the working intervals of many
+        days needs: return the context of the days, with the timezone of the
+        user, and the leaves to take into account (``None`` if leaves are not
+        computed). The leaves are computed with the given context, as
+        overrides of ``get_leave_intervals`` may depend on its timezone. """
+        day_context = dict(context or {})
+        if not day_context.get('tz'):
+            tz = self.pool['res.users'].browse(cr, SUPERUSER_ID, uid).tz
+            if tz:
+                day_context['tz'] = tz
+        leaves = None
+        if id and compute_leaves:
+            leaves = self.get_leave_intervals(cr, uid, id, resource_id=resource_id, context=context)
+        return day_context, leaves
+
+    def _leaves_of_day(self, leaves, day_dt):
+        """ Return the leaves that can overlap the working intervals of the
+        day of ``day_dt``. As those intervals are converted to UTC, a margin of
+        one day is kept on both sides. """
+        if leaves is None:
+            return None
+        day_start = day_dt.replace(hour=0, minute=0, second=0) - datetime.timedelta(days=1)
+        day_end = day_start + datetime.timedelta(days=3)
+        return [leave for leave in leaves if leave[1] > day_start and leave[0] < day_end]
+
+    def _iter_days(self, cr, uid, id, start_dt, end_dt, context=None):
+        """ Generate the pairs (day_start_dt, day_end_dt) of the working days
+        of the calendar between ``start_dt`` and ``end_dt``. """
+        for day in rrule.rrule(rrule.DAILY, dtstart=start_dt,
+                               until=(end_dt + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0),
+                               byweekday=self.get_weekdays(cr, uid, id, context=context)):
+            day_start_dt = day.replace(hour=0, minute=0, second=0)
+            if start_dt and day.date() == start_dt.date():
+                day_start_dt = start_dt
+            day_end_dt = day.replace(hour=23, minute=59, second=59)
+            if end_dt and day.date() == end_dt.date():
+                day_end_dt = end_dt
+            yield day_start_dt, day_end_dt
+
     # --------------------------------------------------
     # Date and hours computation
     # --------------------------------------------------
 
     def get_attendances_for_weekday(self, cr, uid, id, date, context=None):
         """ Given a list of weekdays, return matching resource.calendar.attendance"""
-        calendar = self.browse(cr, uid, id, context=None)
-        weekday = date.weekday()
-        date = date.strftime(DEFAULT_SERVER_DATE_FORMAT)
-        res = []
-        for att in calendar.attendance_ids:
-            if int(att.dayofweek) == weekday:
-                if not ((att.date_from and date < att.date_from) or (att.date_to and date > att.date_to)):
-                    res.append(att)
-        return res
+        att_ids = [att[5] for att in self._get_attendances_of_day(cr, uid, id, date)]
+        return list(self.pool['resource.calendar.attendance'].browse(cr, uid, att_ids, context=context))
 
     def get_weekdays(self, cr, uid, id, default_weekdays=None, context=None):
         """ Return the list of weekdays that contain at least one working interval.
         If no id is given (no calendar), return default weekdays. """
         if id is None:
             return default_weekdays if default_weekdays is not None else [0, 1, 2, 3, 4]
-        calendar = self.browse(cr, uid, id, context=None)
-        weekdays = set()
-        for attendance in calendar.attendance_ids:
-            weekdays.add(int(attendance.dayofweek))
-        return list(weekdays)
+        return sorted(set(att[0] for att in self._get_attendance_data(cr, uid, id)))
 
     def get_next_day(self, cr, uid, id, day_date, context=None):
         """ Get following date of day_date, based on resource.calendar. If no
@@ -248,15 +316,12 @@ class resource_calendar(osv.osv):
         :return list leaves: list of tuples (start_datetime, end_datetime) of
                              leave intervals
         """
-        resource_calendar = self.browse(cr, uid, id, context=context)
         leaves = []
-        for leave in resource_calendar.leave_ids:
-            if leave.resource_id and not resource_id == leave.resource_id.id:
+        for date_from, date_to, leave_resource_id in self._get_leave_data(cr, uid, id):
+            if leave_resource_id and not resource_id == leave_resource_id:
                 continue
-            date_from = datetime.datetime.strptime(leave.date_from, tools.DEFAULT_SERVER_DATETIME_FORMAT)
             if end_datetime and date_from > end_datetime:
                 continue
-            date_to = datetime.datetime.strptime(leave.date_to, tools.DEFAULT_SERVER_DATETIME_FORMAT)
             if start_datetime and date_to < start_datetime:
                 continue
             leaves.append((date_from, date_to))
@@ -329,21 +394,22 @@ class resource_calendar(osv.osv):
 
         working_intervals = []
         tz_info = fields.datetime.context_timestamp(cr, uid, work_dt, context=context).tzinfo
-        for calendar_working_day in self.get_attendances_for_weekday(cr, uid, id, start_dt, context=context):
+        for _weekday, _date_from, _date_to, hour_from, hour_to, attendance_id in \
+                self._get_attendances_of_day(cr, uid, id, start_dt):
             if context and context.get('no_round_hours'):
-                min_from = int((calendar_working_day.hour_from - int(calendar_working_day.hour_from)) * 60)
-                min_to = int((calendar_working_day.hour_to - int(calendar_working_day.hour_to)) * 60)
-                dt_f = work_dt.replace(hour=int(calendar_working_day.hour_from), minute=min_from)
-                dt_t = work_dt.replace(hour=int(calendar_working_day.hour_to), minute=min_to)
+                min_from = int((hour_from - int(hour_from)) * 60)
+                min_to = int((hour_to - int(hour_to)) * 60)
+                dt_f = work_dt.replace(hour=int(hour_from), minute=min_from)
+                dt_t = work_dt.replace(hour=int(hour_to), minute=min_to)
             else:
-                dt_f = work_dt.replace(hour=int(calendar_working_day.hour_from))
-                dt_t = work_dt.replace(hour=int(calendar_working_day.hour_to))
+                dt_f = work_dt.replace(hour=int(hour_from))
+                dt_t = work_dt.replace(hour=int(hour_to))
 
             # adapt tz
             working_interval = (
                 dt_f.replace(tzinfo=tz_info).astimezone(pytz.UTC).replace(tzinfo=None),
                 dt_t.replace(tzinfo=tz_info).astimezone(pytz.UTC).replace(tzinfo=None),
-                calendar_working_day.id
+                attendance_id
             )
             working_intervals += self.interval_remove_leaves(cr, uid, working_interval, work_limits, context=context)
 
@@ -376,23 +442,49 @@ class resource_calendar(osv.osv):
 
     def get_working_hours(self, cr, uid, id, start_dt, end_dt, compute_leaves=False,
                           resource_id=None, default_interval=None, context=None):
+        day_context, leaves = self._prepare_days(cr, uid, id, compute_leaves, resource_id, context=context)
         hours = 0.0
-        for day in rrule.rrule(rrule.DAILY, dtstart=start_dt,
-                               until=(end_dt + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0),
-                               byweekday=self.get_weekdays(cr, uid, id, context=context)):
-            day_start_dt = day.replace(hour=0, minute=0, second=0)
-            if start_dt and day.date() == start_dt.date():
-                day_start_dt = start_dt
-            day_end_dt = day.replace(hour=23, minute=59, second=59)
-            if end_dt and day.date() == end_dt.date():
-                day_end_dt = end_dt
+        for day_start_dt, day_end_dt in self._iter_days(cr, uid, id, start_dt, end_dt, context=day_context):
             hours += self.get_working_hours_of_date(
                 cr, uid, id, start_dt=day_start_dt, end_dt=day_end_dt,
+                leaves=self._leaves_of_day(leaves, day_start_dt),
                 compute_leaves=compute_leaves, resource_id=resource_id,
                 default_interval=default_interval,
-                context=context)
+                context=day_context)
         return hours
 
+    def get_working_hours_multi(self, cr, uid, id, start_dt, end_dt, resource_ids,
+                                compute_leaves=True, default_interval=None, context=None):
+        """ Compute the working hours of several resources sharing a calendar.
+        The working intervals of the calendar are computed once, then the leaves
+        of each resource are removed from them.
+
+        :return dict: {resource_id: hours} """
+        day_context, _leaves = self._prepare_days(cr, uid, id, context=context)
+        days = [
+            (day_start_dt, self.get_working_intervals_of_day(
+                cr, uid, id, start_dt=day_start_dt, end_dt=day_end_dt,
+                default_interval=default_interval, context=day_context))
+            for day_start_dt, day_end_dt in self._iter_days(cr, uid, id, start_dt, end_dt, context=day_context)
+        ]
+        res = {}
+        for resource_id in resource_ids:
+            leaves = None
+            if id and compute_leaves:
+                leaves = self.get_leave_intervals(cr, uid, id, resource_id=resource_id, context=context)
+            total = datetime.timedelta()
+            for day_start_dt, intervals in days:
+                day_leaves = self._leaves_of_day(leaves, day_start_dt)
+                for interval in intervals:
+                    if day_leaves:
+                        work_intervals = self.interval_remove_leaves(cr, uid, interval, day_leaves, context=context)
+                    else:
+                        work_intervals = [interval]
+                    for work_interval in work_intervals:
+                        total += work_interval[1] - work_interval[0]
+            res[resource_id] = seconds(total) / 3600.0
+        return res
+
     # --------------------------------------------------
     # Hours scheduling
     # --------------------------------------------------
@@ -439,13 +531,15 @@ class resource_calendar(osv.osv):
         iterations = 0
         current_datetime = day_dt
 
-        call_args = dict(compute_leaves=compute_leaves, resource_id=resource_id, default_interval=default_interval, context=context)
+        day_context, leaves = self._prepare_days(cr, uid, id, compute_leaves, resource_id, context=context)
+        call_args = dict(compute_leaves=compute_leaves, resource_id=resource_id, default_interval=default_interval, context=day_context)
 
         while float_compare(remaining_hours, 0.0, precision_digits=2) in (1, 0) and iterations < 1000:
             if backwards:
                 call_args['end_dt'] = current_datetime
             else:
                 call_args['start_dt'] = current_datetime
+            call_args['leaves'] = self._leaves_of_day(leaves, current_datetime)
 
             working_intervals = self.get_working_intervals_of_day(cr, uid, id, **call_args)
 
@@ -536,13 +630,14 @@ class resource_calendar(osv.osv):
         planned_days = 0
         iterations = 0
         current_datetime = day_date.replace(hour=0, minute=0, second=0)
+        day_context, leaves = self._prepare_days(cr, uid, id, compute_leaves, resource_id, context=context)
 
         while planned_days < days and iterations < 100:
             working_intervals = self.get_working_intervals_of_day(
-                cr, uid, id, current_datetime,
+                cr, uid, id, current_datetime, leaves=self._leaves_of_day(leaves, current_datetime),
                 compute_leaves=compute_leaves, resource_id=resource_id,
                 default_interval=default_interval,
-                context=context)
+                context=day_context)
             if id is None or working_intervals:  # no calendar -> no working hours, but day is considered as worked
                 planned_days += 1
                 intervals += working_intervals
@@ -657,6 +752,18 @@ class resource_calendar_attendance(osv.osv):
         'dayofweek' : '0'
     }
 
+    def create(self, cr, uid, vals, context=None):
+        self.clear_caches()
+        return super(resource_calendar_attendance, self).create(cr, uid, vals, context=context)
+
+    def write(self, cr, uid, ids, vals, context=None):
+        self.clear_caches()
+        return super(resource_calendar_attendance, self).write(cr, uid, ids, vals, context=context)
+
+    def unlink(self, cr, uid, ids, context=None):
+        self.clear_caches()
+        return super(resource_calendar_attendance, self).unlink(cr, uid, ids, context=context)
+
 def hours_time_string(hours):
     """ convert a number of hours (float) into a string with format '%H:%M' """
     minutes = int(round(hours * 60))
@@ -714,6 +821,18 @@ class resource_calendar_leaves(osv.osv):
         (check_dates, 'Error! leave start-date must be lower then leave end-date.', ['date_from', 'date_to'])
     ]
 
+    def create(self, cr, uid, vals, context=None):
+        self.clear_caches()
+        return super(resource_calendar_leaves, self).create(cr, uid, vals, context=context)
+
+    def write(self, cr, uid, ids, vals, context=None):
+        self.clear_caches()
+        return super(resource_calendar_leaves, self).write(cr, uid, ids, vals, context=context)
+
+    def unlink(self, cr, uid, ids, context=None):
+        self.clear_caches()
+        return super(resource_calendar_leaves, self).unlink(cr, uid, ids, context=context)
+
     def onchange_resource(self, cr, uid, ids, resource, context=None):
         result = {}
         if resource:
@@ -392,6 +392,19 @@ class TestResource(TestResourceCommon):
             compute_leaves=True, resource_id=self.resource1_id, context=context)
         self.assertEqual(res, 33.0, 'resource_calendar: wrong get_working_hours computation')
 
+        # many resources at once
+        res = self.resource_calendar.get_working_hours_multi(
+            cr, uid, self.calendar_id,
+            self.date1.replace(hour=6, minute=0),
+            self.date2.replace(hour=23, minute=0) + relativedelta(days=7),
+            [self.resource1_id, None], compute_leaves=True, context=context)
+        self.assertEqual(res[self.resource1_id], 33.0, 'resource_calendar: wrong get_working_hours_multi computation')
+        self.assertEqual(res[None], self.resource_calendar.get_working_hours(
+            cr, uid, self.calendar_id,
+            self.date1.replace(hour=6, minute=0),
+            self.date2.replace(hour=23, minute=0) + relativedelta(days=7),
+            compute_leaves=True, context=context), 'resource_calendar: wrong get_working_hours_multi computation')
+
         # --------------------------------------------------
         # Test4: misc
         # --------------------------------------------------
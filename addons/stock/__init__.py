@@ -2,6 +2,7 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 from stock import *
+import stock_quantity
 import partner
 import product
 import procurement
@@ -43,11 +43,12 @@ class product_product(osv.osv):
             return _('Products: ')+self.pool.get('stock.location').browse(cr, user, context['active_id'], context).name
         return res
 
-    def _get_domain_locations(self, cr, uid, ids, context=None):
+    def _get_location_ids(self, cr, uid, context=None):
         '''
-        Parses the context and returns a list of location_ids based on it.
-        It will return all stock locations when no parameters are given
-        Possible parameters are shop, warehouse, location, force_company, compute_child
+        Parses the context and returns the list of location_ids it selects,
+        without their children.
+        It will return the view locations of all warehouses when no parameters are given
+        Possible parameters are shop, warehouse, location, force_company
         '''
         context = context or {}
 
@@ -81,6 +82,17 @@ class product_product(osv.osv):
 
             for w in warehouse_obj.browse(cr, uid, wids, context=context):
                 location_ids.append(w.view_location_id.id)
+        return location_ids
+
+    def _get_domain_locations(self, cr, uid, ids, context=None):
+        '''
+        Parses the context and returns a list of location_ids based on it.
+        It will return all stock locations when no parameters are given
+        Possible parameters are shop, warehouse, location, force_company, compute_child
+        '''
+        context = context or {}
+        location_obj = self.pool.get('stock.location')
+        location_ids = self._get_location_ids(cr, uid, context=context)
 
         operator = context.get('compute_child', True) and 'child_of' or 'in'
         domain = context.get('force_company', False) and ['&', ('company_id', '=', context['force_company'])] or []
@@ -118,10 +130,41 @@ class product_product(osv.osv):
             domain.append(('date', '<=', to_date))
         return domain
 
+    def _get_summary_quantities(self, cr, uid, ids, context=None):
+        """ Return the quantities of the products ``ids`` (all products if
+        ``None``) from the stock quantity summary, as a dict
+        ``{product_id: (qty_available, incoming_qty, outgoing_qty)}``, or
+        ``None`` if the context asks for what the summary does not keep.
+        """
+        context = context or {}
+        if context.get('from_date') or context.get('to_date') or context.get('package_id'):
+            return None
+        location_ids = self._get_location_ids(cr, uid, context=context)
+        if location_ids and context.get('compute_child', True):
+            location_ids = self.pool['stock.location'].search(
+                cr, uid, [('id', 'child_of', location_ids)], context=dict(context, active_test=False))
+        return self.pool['stock.quantity'].get_quantities(
+            cr, uid, ids, location_ids, lot_id=context.get('lot_id'), owner_id=context.get('owner_id'),
+            company_id=context.get('force_company'), context=context)
+
     def _product_available(self, cr, uid, ids, field_names=None, arg=False, context=None):
         context = context or {}
         field_names = field_names or []
 
+        quantities = self._get_summary_quantities(cr, uid, ids, context=context)
+        if quantities is not None:
+            res = {}
+            for product in self.browse(cr, uid, ids, context=context):
+                qty, incoming, outgoing = quantities.get(product.id, (0.0, 0.0, 0.0))
+                rounding = product.uom_id.rounding
+                res[product.id] = {
+                    'qty_available': float_round(qty, precision_rounding=rounding),
+                    'incoming_qty': float_round(incoming, precision_rounding=rounding),
+                    'outgoing_qty': float_round(outgoing, precision_rounding=rounding),
+                    'virtual_available': float_round(qty + incoming - outgoing, precision_rounding=rounding),
+                }
+            return res
+
         domain_products = [('product_id', 'in', ids)]
         domain_quant, domain_move_in, domain_move_out = [], [], []
         domain_quant_loc, domain_move_in_loc, domain_move_out_loc = self._get_domain_locations(cr, uid, ids, context=context)
@@ -190,6 +233,10 @@ class product_product(osv.osv):
         return res
 
     def _search_qty_available(self, cr, uid, operator, value, context):
+        quantities = self._get_summary_quantities(cr, uid, None, context=context)
+        if quantities is not None:
+            return [id for id, (qty, incoming, outgoing) in quantities.iteritems()
+                    if eval(str(qty) + operator + str(value))]
         domain_quant = []
         if context.get('lot_id'):
             domain_quant.append(('lot_id', '=', context['lot_id']))
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from openerp import api, fields, models, SUPERUSER_ID
+
+
+class stock_quantity(models.Model):
+    """ Summary of the quantities of quants and pending moves.
+
+    The table is maintained by triggers on ``stock_quant`` and ``stock_move``:
+    each change of a quant or of a pending move (neither draft, done nor
+    cancelled) inserts the difference it makes, so that concurrent
+    transactions never update the same rows. Quant rows have no destination
+    location. The rows of a same key are merged by :meth:`compact`.
+    """
+    _name = 'stock.quantity'
+    _description = 'Stock Quantities'
+    _auto = False
+
+    product_id = fields.Many2one('product.product', string='Product', readonly=True)
+    location_id = fields.Many2one('stock.location', string='Location', readonly=True)
+    location_dest_id = fields.Many2one('stock.location', string='Destination Location', readonly=True)
+    lot_id = fields.Many2one('stock.production.lot', string='Lot', readonly=True)
+    owner_id = fields.Many2one('res.partner', string='Owner', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    quantity = fields.Float(readonly=True)
+
+    def init(self, cr):
+        cr.execute("SELECT 1 FROM pg_class WHERE relname = 'stock_quantity' AND relkind = 'r'")
+        if not cr.fetchone():
+            cr.execute("""
+                CREATE TABLE stock_quantity (
+                    id serial PRIMARY KEY,
+                    product_id integer NOT NULL,
+                    location_id integer NOT NULL,
+                    location_dest_id integer,
+                    lot_id integer,
+                    owner_id integer,
+                    company_id integer,
+                    quantity double precision NOT NULL
+                )
+            """)
+            cr.execute("CREATE INDEX stock_quantity_product_id_index ON stock_quantity (product_id)")
+            self._fill(cr)
+
+        cr.execute("""
+            CREATE OR REPLACE FUNCTION stock_quantity_quant() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'UPDATE' AND
+                        (OLD.product_id, OLD.location_id, OLD.lot_id, OLD.owner_id, OLD.company_id, OLD.qty) IS NOT DISTINCT FROM
+                        (NEW.product_id, NEW.location_id, NEW.lot_id, NEW.owner_id, NEW.company_id, NEW.qty) THEN
+                    RETURN NULL;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    INSERT INTO stock_quantity (product_id, location_id, lot_id, owner_id, company_id, quantity)
+                    VALUES (OLD.product_id, OLD.location_id, OLD.lot_id, OLD.owner_id, OLD.company_id, -OLD.qty);
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO stock_quantity (product_id, location_id, lot_id, owner_id, company_id, quantity)
+                    VALUES (NEW.product_id, NEW.location_id, NEW.lot_id, NEW.owner_id, NEW.company_id, NEW.qty);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        cr.execute("""
+            CREATE OR REPLACE FUNCTION stock_quantity_move() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.state NOT IN ('draft', 'done', 'cancel') THEN
+                    INSERT INTO stock_quantity (product_id, location_id, location_dest_id, owner_id, company_id, quantity)
+                    VALUES (OLD.product_id, OLD.location_id, OLD.location_dest_id, OLD.restrict_partner_id, OLD.company_id, -OLD.product_qty);
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.state NOT IN ('draft', 'done', 'cancel') THEN
+                    INSERT INTO stock_quantity (product_id, location_id, location_dest_id, owner_id, company_id, quantity)
+                    VALUES (NEW.product_id, NEW.location_id, NEW.location_dest_id, NEW.restrict_partner_id, NEW.company_id, NEW.product_qty);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        cr.execute("DROP TRIGGER IF EXISTS stock_quantity_quant ON stock_quant")
+        cr.execute("""
+            CREATE TRIGGER stock_quantity_quant
+            AFTER INSERT OR DELETE OR UPDATE OF product_id, location_id, lot_id, owner_id, company_id, qty
+            ON stock_quant FOR EACH ROW EXECUTE PROCEDURE stock_quantity_quant()
+        """)
+        cr.execute("DROP TRIGGER IF EXISTS stock_quantity_move ON stock_move")
+        cr.execute("""
+            CREATE TRIGGER stock_quantity_move
+            AFTER INSERT OR DELETE OR UPDATE OF product_id, location_id, location_dest_id, restrict_partner_id, company_id, state, product_qty
+            ON stock_move FOR EACH ROW EXECUTE PROCEDURE stock_quantity_move()
+        """)
+
+    def _fill(self, cr):
+        cr.execute("""
+            INSERT INTO stock_quantity (product_id, location_id, lot_id, owner_id, company_id, quantity)
+            SELECT product_id, location_id, lot_id, owner_id, company_id, sum(qty)
+            FROM stock_quant
+            GROUP BY product_id, location_id, lot_id, owner_id, company_id
+        """)
+        cr.execute("""
+            INSERT INTO stock_quantity (product_id, location_id, location_dest_id, owner_id, company_id, quantity)
+            SELECT product_id, location_id, location_dest_id, restrict_partner_id, company_id, sum(product_qty)
+            FROM stock_move
+            WHERE state NOT IN ('draft', 'done', 'cancel')
+            GROUP BY product_id, location_id, location_dest_id, restrict_partner_id, company_id
+        """)
+
+    @api.model
+    def compact(self):
+        """ Merge the rows of a same key. Called by a cron job. """
+        self._cr.execute("""
+            WITH deleted AS (
+                DELETE FROM stock_quantity
+                RETURNING product_id, location_id, location_dest_id, lot_id, owner_id, company_id, quantity
+            )
+            INSERT INTO stock_quantity (product_id, location_id, location_dest_id, lot_id, owner_id, company_id, quantity)
+            SELECT product_id, location_id, location_dest_id, lot_id, owner_id, company_id, sum(quantity)
+            FROM deleted
+            GROUP BY product_id, location_id, location_dest_id, lot_id, owner_id, company_id
+            HAVING sum(quantity) != 0
+        """)
+        return True
+
+    @api.model
+    def refresh(self):
+        """ Rebuild the table from the quants and moves. """
+        self._cr.execute("LOCK stock_quant, stock_move IN SHARE MODE")
+        self._cr.execute("DELETE FROM stock_quantity")
+        self._fill(self._cr)
+        return True
+
+    @api.model
+    def get_quantities(self, product_ids, location_ids, lot_id=None, owner_id=None, company_id=None):
+        """ Return the quantities of products in a set of locations.
+
+        :param product_ids: the products, or ``None`` for all products
+        :param location_ids: the locations, including their children
+        :return: a dict ``{product_id: (qty_available, incoming_qty, outgoing_qty)}``
+        """
+        if not location_ids or product_ids is not None and not product_ids:
+            return {}
+        params = {'locations': tuple(location_ids)}
+        where = ["(location_id IN %(locations)s OR location_dest_id IN %(locations)s)"]
+        if product_ids is not None:
+            where.append("product_id IN %(products)s")
+            params['products'] = tuple(product_ids)
+        if lot_id:
+            # lots only restrict the quants
+            where.append("(location_dest_id IS NOT NULL OR lot_id = %(lot)s)")
+            params['lot'] = lot_id
+        if owner_id:
+            where.append("owner_id = %(owner)s")
+            params['owner'] = owner_id
+        if company_id:
+            where.append("company_id = %(company)s")
+            params['company'] = company_id
+        if self._uid != SUPERUSER_ID:
+            # same as the multi-company rule of stock.quantity, read by SQL here
+            companies = self.env['res.company'].sudo().search([('id', 'child_of', [self.env.user.company_id.id])])
+            where.append("(company_id IS NULL OR company_id IN %(companies)s)")
+            params['companies'] = tuple(companies.ids) or (None,)
+
+        self._cr.execute("""
+            SELECT product_id,
+                   sum(CASE WHEN location_dest_id IS NULL THEN quantity ELSE 0 END),
+                   sum(CASE WHEN location_dest_id IN %(locations)s AND location_id NOT IN %(locations)s
+                            THEN quantity ELSE 0 END),
+                   sum(CASE WHEN location_id IN %(locations)s AND location_dest_id NOT IN %(locations)s
+                            THEN quantity ELSE 0 END)
+            FROM stock_quantity
+            WHERE {}
+            GROUP BY product_id
+        """.format(" AND ".join(where)), params)
+        return dict((row[0], row[1:]) for row in self._cr.fetchall())
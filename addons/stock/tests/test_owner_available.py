@@ -70,3 +70,32 @@ class TestVirtualAvailable(TestStockCommon):
         self.picking_out.action_assign()
         self.picking_out_2.action_assign()
         self.assertAlmostEqual(5.0, prod_context.virtual_available)
+
+    def test_quantity_summary(self):
+        self.picking_out.action_assign()
+        self.picking_out_2.action_assign()
+        fields = ['qty_available', 'incoming_qty', 'outgoing_qty', 'virtual_available']
+        for product in (self.productA, self.productA.with_context(owner_id=self.ref('base.res_partner_4'))):
+            # dates are not kept in the summary: the quants and moves are read
+            expected = product.with_context(to_date='2100-01-01 00:00:00')
+            for field in fields:
+                self.assertAlmostEqual(expected[field], product[field])
+
+        self.env['stock.quantity'].compact()
+        self.productA.invalidate_cache()
+        self.assertAlmostEqual(40.0, self.productA.qty_available)
+        self.assertAlmostEqual(32.0, self.productA.virtual_available)
+
+    def test_quantity_summary_multi_company(self):
+        company = self.env['res.company'].create({'name': 'Other Company'})
+        user = self.env['res.users'].create({
+            'name': 'Other Company User',
+            'login': 'other_company_user',
+            'company_id': company.id,
+            'company_ids': [(6, 0, [company.id])],
+            'groups_id': [(6, 0, [self.ref('base.group_user')])],
+        })
+        domain = [('product_id', '=', self.productA.id)]
+        self.assertTrue(self.env['stock.quantity'].search(domain))
+        # the quantities of the other companies are not readable
+        self.assertFalse(self.env['stock.quantity'].sudo(user).search(domain))
@@ -38,6 +38,7 @@ from openerp.tools.translate import _
 from openerp.tools import ustr
 from openerp import http
 from openerp.http import request, serialize_exception as _serialize_exception
+from openerp.service.model import READONLY_METHODS
 from openerp.exceptions import AccessError
 
 _logger = logging.getLogger(__name__)
@@ -830,7 +831,7 @@ class Menu(http.Controller):
 
 class DataSet(http.Controller):
 
-    @http.route('/web/dataset/search_read', type='json', auth="user")
+    @http.route('/web/dataset/search_read', type='json', auth="user", readonly=True)
     def search_read(self, model, fields=False, offset=0, limit=False, domain=None, sort=None):
         return self.do_search_read(model, fields, offset, limit, domain, sort)
     def do_search_read(self, model, fields=False, offset=0, limit=False, domain=None
@@ -890,7 +891,8 @@ class DataSet(http.Controller):
     def call(self, model, method, args, domain_id=None, context_id=None):
         return self._call_kw(model, method, args, {})
 
-    @http.route(['/web/dataset/call_kw', '/web/dataset/call_kw/<path:path>'], type='json', auth="user")
+    @http.route(['/web/dataset/call_kw', '/web/dataset/call_kw/<path:path>'], type='json', auth="user",
+                readonly=lambda: request.params.get('method') in READONLY_METHODS)
     def call_kw(self, model, method, args, kwargs, path=None):
         return self._call_kw(model, method, args, kwargs)
 
@@ -1005,20 +1007,48 @@ class Binary(http.Controller):
         elif status != 200 and download:
             return request.not_found()
 
+        try:
+            width, height = int(width or 0), int(height or 0)
+        except ValueError:
+            raise werkzeug.exceptions.BadRequest()
         if content and (width or height):
             # resize maximum 500*500
-            if width > 500:
-                width = 500
-            if height > 500:
-                height = 500
-            content = openerp.tools.image_resize_image(base64_source=content, size=(width or None, height or None), encoding='base64', filetype='PNG')
-
-        image_base64 = content and base64.b64decode(content) or self.placeholder()
+            width = min(width, 500)
+            height = min(height, 500)
+            # resized images are cached in the filestore, keyed on the
+            # checksum of the source image and the requested size
+            checksum = self._image_checksum(xmlid, model, id, field, content)
+            size = (width, height)
+            retag = hashlib.md5('%s-%sx%s' % (checksum, width, height)).hexdigest()
+            headers = [(k, retag if k == 'ETag' else v) for k, v in headers]
+            if request.httprequest.headers.get('If-None-Match') == retag:
+                return werkzeug.wrappers.Response(status=304, headers=headers)
+            Attachment = request.env['ir.attachment']
+            image_base64 = Attachment._resized_image_get(checksum, size)
+            if image_base64 is None:
+                content = openerp.tools.image_resize_image(base64_source=content, size=(width or None, height or None), encoding='base64', filetype='PNG')
+                image_base64 = base64.b64decode(content)
+                Attachment._resized_image_set(checksum, size, image_base64)
+        else:
+            image_base64 = content and base64.b64decode(content) or self.placeholder()
         headers.append(('Content-Length', len(image_base64)))
         response = request.make_response(image_base64, headers)
         response.status_code = status
         return response
 
+    def _image_checksum(self, xmlid, model, id, field, content):
+        """ Return the checksum of the image, as stored on its attachment, or
+        computed from ``content`` if the image is not stored in an attachment.
+        """
+        record = request.env.ref(xmlid) if xmlid else request.env[model].browse(int(id))
+        Attachment = request.env['ir.attachment'].sudo()
+        if record._name == 'ir.attachment':
+            attachment = Attachment.browse(record.id) if field == 'datas' and record.type == 'binary' else Attachment
+        else:
+            attachment = Attachment.search([('res_model', '=', record._name), ('res_field', '=', field),
+                                            ('res_id', '=', record.id)], limit=1)
+        return attachment.checksum or hashlib.sha1(content).hexdigest()
+
     # backward compatibility
     @http.route(['/web/binary/image'], type='http', auth="public")
     def content_image_backward_compatibility(self, model, id, field, resize=None, **kw):
@@ -1293,6 +1323,8 @@ class Export(http.Controller):
 
 class ExportFormat(object):
     raw_data = False
+    # whether the format can be written incrementally (see from_data_chunks)
+    streaming = False
 
     @property
     def content_type(self):
@@ -1316,6 +1348,32 @@ class ExportFormat(object):
         """
         raise NotImplementedError()
 
+    def from_data_chunks(self, fields, chunks):
+        """ Streaming variant of :meth:`from_data`, only implemented by
+        formats with ``streaming`` set
+
+        :params list fields: a list of fields to export
+        :params chunks: an iterable of lists of records to export
+        :returns: an iterator over the successive parts of the output
+        """
+        raise NotImplementedError()
+
+    def export_chunks(self, model, ids, fields, context):
+        """ Return an iterator over the export data of the records, by chunks.
+        The response is streamed once the request's cursor has been closed, so
+        the records are read within a cursor of their own.
+        """
+        registry = openerp.registry(request.session.db)
+        uid = request.uid
+
+        def generate():
+            with Environment.manage(), registry.cursor() as cr:
+                records = Environment(cr, uid, context)[model].browse(ids)
+                for rows in records._export_data_chunks(fields, self.raw_data):
+                    yield rows
+
+        return generate()
+
     def base(self, data, token):
         params = json.loads(data)
         model, fields, ids, domain, import_compat = \
@@ -1331,21 +1389,27 @@ class ExportFormat(object):
             fields = [field for field in fields if field['name'] != 'id']
 
         field_names = map(operator.itemgetter('name'), fields)
-        import_data = Model.export_data(ids, field_names, self.raw_data, context=context).get('datas',[])
 
         if import_compat:
             columns_headers = field_names
         else:
             columns_headers = [val['label'].strip() for val in fields]
 
+        if self.streaming:
+            chunks = self.export_chunks(model, ids, field_names, context)
+            content = self.from_data_chunks(columns_headers, chunks)
+        else:
+            import_data = Model.export_data(ids, field_names, self.raw_data, context=context).get('datas',[])
+            content = self.from_data(columns_headers, import_data)
 
-        return request.make_response(self.from_data(columns_headers, import_data),
+        return request.make_response(content,
             headers=[('Content-Disposition',
                             content_disposition(self.filename(model))),
                      ('Content-Type', self.content_type)],
             cookies={'fileToken': token})
 
 class CSVExport(ExportFormat, http.Controller):
+    streaming = True
 
     @http.route('/web/export/csv', type='http', auth="user")
     @serialize_exception
@@ -1360,28 +1424,36 @@ class CSVExport(ExportFormat, http.Controller):
         return base + '.csv'
 
     def from_data(self, fields, rows):
+        return ''.join(self.from_data_chunks(fields, [rows]))
+
+    def from_data_chunks(self, fields, chunks):
         fp = StringIO()
         writer = csv.writer(fp, quoting=csv.QUOTE_ALL)
 
         writer.writerow([name.encode('utf-8') for name in fields])
 
-        for data in rows:
-            row = []
-            for d in data:
-                if isinstance(d, basestring):
-                    d = d.replace('\n',' ').replace('\t',' ')
-                    try:
-                        d = d.encode('utf-8')
-                    except UnicodeError:
-                        pass
-                if d is False: d = None
-                row.append(d)
-            writer.writerow(row)
+        for rows in chunks:
+            for data in rows:
+                row = []
+                for d in data:
+                    if isinstance(d, basestring):
+                        d = d.replace('\n',' ').replace('\t',' ')
+                        try:
+                            d = d.encode('utf-8')
+                        except UnicodeError:
+                            pass
+                    if d is False: d = None
+                    row.append(d)
+                writer.writerow(row)
+            # flush what has been written so far
+            yield fp.getvalue()
+            fp.seek(0)
+            fp.truncate()
 
-        fp.seek(0)
-        data = fp.read()
+        data = fp.getvalue()
         fp.close()
-        return data
+        if data:
+            yield data
 
 class ExcelExport(ExportFormat, http.Controller):
     # Excel needs raw data to correctly handle numbers and date values
@@ -1,6 +1,4 @@
 # -*- coding: utf-8 -*-
-import datetime
-from itertools import islice
 import json
 import xml.etree.ElementTree as ET
 
@@ -21,8 +19,6 @@ logger = logging.getLogger(__name__)
 
 # Completely arbitrary limits
 MAX_IMAGE_WIDTH, MAX_IMAGE_HEIGHT = IMAGE_LIMITS = (1024, 768)
-LOC_PER_SITEMAP = 45000
-SITEMAP_CACHE_TIME = datetime.timedelta(hours=12)
 
 class Website(openerp.addons.web.controllers.main.Home):
     #------------------------------------------------------
@@ -68,7 +64,8 @@ class Website(openerp.addons.web.controllers.main.Home):
         redirect.set_cookie('website_lang', lang)
         return redirect
 
-    @http.route('/page/<page:page>', type='http', auth="public", website=True, cache=300)
+    @http.route('/page/<page:page>', type='http', auth="public", website=True, cache=300,
+                readonly=lambda: not request.session.uid)
     def page(self, page, **opt):
         values = {
             'path': page,
@@ -100,64 +97,18 @@ class Website(openerp.addons.web.controllers.main.Home):
     def sitemap_xml_index(self):
         cr, uid, context = request.cr, openerp.SUPERUSER_ID, request.context
         ira = request.registry['ir.attachment']
-        iuv = request.registry['ir.ui.view']
         mimetype ='application/xml;charset=utf-8'
-        content = None
-
-        def create_sitemap(url, content):
-            ira.create(cr, uid, dict(
-                datas=content.encode('base64'),
-                mimetype=mimetype,
-                type='binary',
-                name=url,
-                url=url,
-            ), context=context)
-
-        sitemap = ira.search_read(cr, uid, [('url', '=' , '/sitemap.xml'), ('type', '=', 'binary')], ('datas', 'create_date'), context=context)
-        if sitemap:
-            # Check if stored version is still valid
-            server_format = openerp.tools.misc.DEFAULT_SERVER_DATETIME_FORMAT
-            create_date = datetime.datetime.strptime(sitemap[0]['create_date'], server_format)
-            delta = datetime.datetime.now() - create_date
-            if delta < SITEMAP_CACHE_TIME:
-                content = sitemap[0]['datas'].decode('base64')
-
-        if not content:
-            # Remove all sitemaps in ir.attachments as we're going to regenerated them
-            sitemap_ids = ira.search(cr, uid, [('url', '=like' , '/sitemap%.xml'), ('type', '=', 'binary')], context=context)
-            if sitemap_ids:
-                ira.unlink(cr, uid, sitemap_ids, context=context)
-
-            pages = 0
-            first_page = None
-            locs = request.website.sudo(user=request.website.user_id.id).enumerate_pages()
-            while True:
-                start = pages * LOC_PER_SITEMAP
-                values = {
-                    'locs': islice(locs, start, start + LOC_PER_SITEMAP),
-                    'url_root': request.httprequest.url_root[:-1],
-                }
-                urls = iuv.render(cr, uid, 'website.sitemap_locs', values, context=context)
-                if urls.strip():
-                    page = iuv.render(cr, uid, 'website.sitemap_xml', dict(content=urls), context=context)
-                    if not first_page:
-                        first_page = page
-                    pages += 1
-                    create_sitemap('/sitemap-%d.xml' % pages, page)
-                else:
-                    break
-            if not pages:
-                return request.not_found()
-            elif pages == 1:
-                content = first_page
-            else:
-                # Sitemaps must be split in several smaller files with a sitemap index
-                content = iuv.render(cr, uid, 'website.sitemap_index_xml', dict(
-                    pages=range(1, pages + 1),
-                    url_root=request.httprequest.url_root,
-                ), context=context)
-            create_sitemap('/sitemap.xml', content)
 
+        # the sitemap files are kept up to date by a cron job, they are only
+        # generated here if they have never been
+        domain = [('url', '=' , '/sitemap.xml'), ('type', '=', 'binary')]
+        sitemap = ira.search_read(cr, uid, domain, ('datas',), context=context)
+        if not sitemap:
+            request.registry['website'].sitemap_refresh(cr, uid, [request.website.id], context=context)
+            sitemap = ira.search_read(cr, uid, domain, ('datas',), context=context)
+        if not sitemap:
+            return request.not_found()
+        content = sitemap[0]['datas'].decode('base64')
         return request.make_response(content, [('Content-Type', mimetype)])
 
     @http.route('/website/info', type='http', auth="public", website=True)
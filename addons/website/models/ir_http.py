@@ -90,6 +90,11 @@ class ir_http(orm.AbstractModel):
                 record = self._geoip_resolver.record_by_addr(request.httprequest.remote_addr) or {}
             request.session['geoip'] = record
 
+    def _rebind_request(self):
+        super(ir_http, self)._rebind_request()
+        if getattr(request, 'website', None):
+            request.website = request.website.with_env(request.website.env(cr=request.cr))
+
     def get_page_key(self):
         return (self._name, "cache", request.uid, request.lang, request.httprequest.full_path)
 
@@ -103,6 +108,7 @@ class ir_http(orm.AbstractModel):
                 return werkzeug.utils.redirect(new_url, 301)
             func, arguments = self._find_handler()
             request.website_enabled = func.routing.get('website', False)
+            request.readonly = func.routing.get('readonly', False)
         except werkzeug.exceptions.NotFound:
             # either we have a language prefixed route, either a real 404
             # in all cases, website processes them
@@ -188,6 +194,9 @@ class ir_http(orm.AbstractModel):
         else:
             request.cache_save = key if cache_enable else False
             resp = super(ir_http, self)._dispatch()
+            # a page rendered on a lagging replica may be stale already
+            if request.cache_save and request._cr and request._cr.replica:
+                request.cache_save = False
 
         if request.website_enabled and cook_lang != request.lang and hasattr(resp, 'set_cookie'):
             resp.set_cookie('website_lang', request.lang)
@@ -329,7 +338,7 @@ class ModelConverter(ir.ir_http.ModelConverter):
             request.cr, _uid, record_id, context=request.context)
 
     def generate(self, cr, uid, query=None, args=None, context=None):
-        obj = request.registry[self.model]
+        obj = openerp.registry(cr.dbname)[self.model]
         domain = eval( self.domain, (args or {}).copy())
         if query:
             domain.append((obj._rec_name, 'ilike', '%'+query+'%'))
@@ -339,8 +348,11 @@ class ModelConverter(ir.ir_http.ModelConverter):
 
 class PageConverter(werkzeug.routing.PathConverter):
     """ Only point of this converter is to bundle pages enumeration logic """
+    # model of the generated pages
+    model = 'ir.ui.view'
+
     def generate(self, cr, uid, query=None, args={}, context=None):
-        View = request.registry['ir.ui.view']
+        View = openerp.registry(cr.dbname)['ir.ui.view']
         domain = [('page', '=', True)]
         query = query and query.startswith('website.') and query[8:] or query
         if query:
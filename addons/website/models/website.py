@@ -6,6 +6,8 @@ import unicodedata
 import re
 import urlparse
 import hashlib
+import json
+from itertools import count, islice
 
 from sys import maxint
 
@@ -26,6 +28,8 @@ from werkzeug.exceptions import NotFound
 
 logger = logging.getLogger(__name__)
 
+LOC_PER_SITEMAP = 45000
+
 def url_for(path_or_uri, lang=None):
     if isinstance(path_or_uri, unicode):
         path_or_uri = path_or_uri.encode('utf-8')
@@ -512,45 +516,183 @@ class website(osv.osv):
                   of the same.
         :rtype: list({name: str, url: str})
         """
-        router = request.httprequest.app.get_db_router(request.db)
+        router = self.pool['ir.http'].routing_map()
         # Force enumeration to be performed as public user
-        url_list = []
+        url_list = set()
         for rule in router.iter_rules():
             if not self.rule_is_enumerable(rule):
                 continue
+            for page in self._enumerate_rule_pages(cr, uid, rule, query_string, context=context):
+                if page['loc'] in url_list:
+                    continue
+                url_list.add(page['loc'])
+                yield page
 
-            converters = rule._converters or {}
-            if query_string and not converters and (query_string not in rule.build([{}], append_unknown=False)[1]):
+    def _enumerate_rule_pages(self, cr, uid, rule, query_string=None, context=None):
+        """ Generate the pages of an enumerable routing rule. """
+        converters = rule._converters or {}
+        if query_string and not converters and (query_string not in rule.build([{}], append_unknown=False)[1]):
+            return
+        values = [{}]
+        convitems = converters.items()
+        # converters with a domain are processed after the other ones
+        gd = lambda x: hasattr(x[1], 'domain') and (x[1].domain <> '[]')
+        convitems.sort(lambda x, y: cmp(gd(x), gd(y)))
+        for (i,(name, converter)) in enumerate(convitems):
+            newval = []
+            for val in values:
+                query = i==(len(convitems)-1) and query_string
+                for v in converter.generate(cr, uid, query=query, args=val, context=context):
+                    newval.append( val.copy() )
+                    v[name] = v['loc']
+                    del v['loc']
+                    newval[-1].update(v)
+            values = newval
+
+        for value in values:
+            domain_part, url = rule.build(value, append_unknown=False)
+            page = {'loc': url}
+            for key,val in value.items():
+                if key.startswith('__'):
+                    page[key[2:]] = val
+            if url in ('/sitemap.xml',):
                 continue
-            values = [{}]
-            convitems = converters.items()
-            # converters with a domain are processed after the other ones
-            gd = lambda x: hasattr(x[1], 'domain') and (x[1].domain <> '[]')
-            convitems.sort(lambda x, y: cmp(gd(x), gd(y)))
-            for (i,(name, converter)) in enumerate(convitems):
-                newval = []
-                for val in values:
-                    query = i==(len(convitems)-1) and query_string
-                    for v in converter.generate(request.cr, uid, query=query, args=val, context=context):
-                        newval.append( val.copy() )
-                        v[name] = v['loc']
-                        del v['loc']
-                        newval[-1].update(v)
-                values = newval
-
-            for value in values:
-                domain_part, url = rule.build(value, append_unknown=False)
-                page = {'loc': url}
-                for key,val in value.items():
-                    if key.startswith('__'):
-                        page[key[2:]] = val
-                if url in ('/sitemap.xml',):
-                    continue
-                if url in url_list:
+            yield page
+
+    def _sitemap_groups(self, cr, uid, ids, context=None):
+        """ Return the enumerable rules grouped by the models their pages are
+        generated from, as a list of ``(models, rules)``. Converters without a
+        model make their rules always outdated (``models`` is ``None``).
+        """
+        router = self.pool['ir.http'].routing_map()
+        groups = {}
+        for rule in router.iter_rules():
+            if not self.rule_is_enumerable(rule):
+                continue
+            models = set()
+            for converter in (rule._converters or {}).itervalues():
+                if getattr(converter, 'model', False) in self.pool:
+                    models.add(converter.model)
+                else:
+                    models = None
+                    break
+            key = tuple(sorted(models)) if models is not None else rule.rule
+            groups.setdefault(key, (models, []))[1].append(rule)
+        return [groups[key] for key in sorted(groups)]
+
+    def _sitemap_signature(self, cr, uid, models, context=None):
+        """ Return a value that changes whenever records of ``models`` are
+        created, modified or deleted.
+        """
+        signature = []
+        for name in sorted(models):
+            model = self.pool[name]
+            if model._log_access:
+                cr.execute('SELECT count(1), max(write_date) FROM "%s"' % model._table)
+            else:
+                cr.execute('SELECT count(1), max(id) FROM "%s"' % model._table)
+            signature.append([name] + list(cr.fetchone()))
+        return signature
+
+    def sitemap_refresh(self, cr, uid, ids=None, context=None):
+        """ Bring the stored sitemap files of the website up to date.
+
+        The pages of the rules are stored in chunks of ``LOC_PER_SITEMAP``
+        urls, and each chunk records the state of the models it has been
+        generated from. Only the rules whose models have changed since the
+        last refresh are enumerated and rendered again.
+        """
+        if not ids:
+            ids = self.search(cr, uid, [], limit=1, context=context)
+        website = self.browse(cr, openerp.SUPERUSER_ID, ids[0], context=context)
+        Attachment = self.pool['ir.attachment']
+        View = self.pool['ir.ui.view']
+        mimetype = 'application/xml;charset=utf-8'
+        url_root = self.pool['ir.config_parameter'].get_param(cr, openerp.SUPERUSER_ID, 'web.base.url', context=context)
+
+        # stored chunks, by description
+        chunks = {}
+        attachments = Attachment.search_read(cr, openerp.SUPERUSER_ID, [
+            ('url', '=like', '/sitemap-%.xml'), ('type', '=', 'binary'),
+        ], ['url', 'description'], context=context)
+        for attachment in attachments:
+            chunks.setdefault(attachment['description'] or None, []).append(attachment)
+
+        kept, created = [], []
+        for models, rules in self._sitemap_groups(cr, uid, ids, context=context):
+            if models is None:
+                description = None
+            else:
+                description = json.dumps({
+                    'rules': [rule.rule for rule in rules],
+                    'signature': self._sitemap_signature(cr, uid, models, context=context),
+                }, sort_keys=True)
+                if description in chunks:
+                    kept.extend(chunks.pop(description))
                     continue
-                url_list.append(url)
 
-                yield page
+            def pages():
+                url_list = set()
+                for rule in rules:
+                    for page in self._enumerate_rule_pages(cr, website.user_id.id, rule, context=context):
+                        if page['loc'] not in url_list:
+                            url_list.add(page['loc'])
+                            yield page
+
+            locs = pages()
+            while True:
+                values = {
+                    'locs': islice(locs, LOC_PER_SITEMAP),
+                    'url_root': url_root,
+                }
+                urls = View.render(cr, openerp.SUPERUSER_ID, 'website.sitemap_locs', values, context=context)
+                if not urls.strip():
+                    break
+                content = View.render(cr, openerp.SUPERUSER_ID, 'website.sitemap_xml', dict(content=urls), context=context)
+                created.append((description, content))
+
+        outdated = [attachment['id'] for group in chunks.itervalues() for attachment in group]
+        index_ids = Attachment.search(cr, openerp.SUPERUSER_ID, [
+            ('url', '=', '/sitemap.xml'), ('type', '=', 'binary'),
+        ], context=context)
+        if index_ids and not outdated and not created:
+            return True
+        Attachment.unlink(cr, openerp.SUPERUSER_ID, outdated + index_ids, context=context)
+
+        # number the new chunks with the numbers left by the outdated ones
+        pages = [int(attachment['url'][9:-4]) for attachment in kept]
+        numbers = (number for number in count(1) if number not in pages)
+        for description, content in created:
+            pages.append(next(numbers))
+            url = '/sitemap-%d.xml' % pages[-1]
+            Attachment.create(cr, openerp.SUPERUSER_ID, dict(
+                datas=content.encode('base64'),
+                mimetype=mimetype,
+                type='binary',
+                name=url,
+                url=url,
+                description=description,
+            ), context=context)
+
+        if not pages:
+            return True
+        elif len(pages) == 1:
+            content = created[0][1] if created else \
+                Attachment.read(cr, openerp.SUPERUSER_ID, kept[0]['id'], ['datas'], context=context)['datas'].decode('base64')
+        else:
+            # Sitemaps must be split in several smaller files with a sitemap index
+            content = View.render(cr, openerp.SUPERUSER_ID, 'website.sitemap_index_xml', dict(
+                pages=sorted(pages),
+                url_root=url_root + '/',
+            ), context=context)
+        Attachment.create(cr, openerp.SUPERUSER_ID, dict(
+            datas=content.encode('base64'),
+            mimetype=mimetype,
+            type='binary',
+            name='/sitemap.xml',
+            url='/sitemap.xml',
+        ), context=context)
+        return True
 
     def search_pages(self, cr, uid, ids, needle=None, limit=None, context=None):
         name = re.sub(r"^/p(a(g(e(/(w(e(b(s(i(t(e(\.)?)?)?)?)?)?)?)?)?)?)?)?", "", needle or "")
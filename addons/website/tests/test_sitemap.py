@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+import openerp.tests
+
+
+class TestSitemap(openerp.tests.TransactionCase):
+
+    def _chunks(self):
+        Attachment = self.registry('ir.attachment')
+        ids = Attachment.search(self.cr, self.uid, [('url', '=like', '/sitemap-%.xml'), ('type', '=', 'binary')])
+        return set(ids)
+
+    def test_sitemap_refresh(self):
+        Website = self.registry('website')
+        website_id = self.ref('website.default_website')
+        Website.sitemap_refresh(self.cr, self.uid, [website_id])
+        self.assertTrue(self._chunks())
+
+        # a new page is added to the sitemap at the next refresh
+        page = Website.new_page(self.cr, self.uid, 'Sitemap Test Page')
+        Website.sitemap_refresh(self.cr, self.uid, [website_id])
+        Attachment = self.registry('ir.attachment')
+        contents = ''.join(
+            attachment['datas'].decode('base64')
+            for attachment in Attachment.read(self.cr, self.uid, list(self._chunks()), ['datas'])
+        )
+        self.assertIn('/page/%s' % page.split('.')[1], contents)
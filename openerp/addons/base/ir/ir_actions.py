@@ -413,7 +413,7 @@ class ir_actions_act_window(osv.osv):
         return existing
 
     @openerp.api.model
-    @ormcache()
+    @ormcache(depends=())
     def _existing(self):
         self._cr.execute("SELECT id FROM %s" % self._table)
         return set(row[0] for row in self._cr.fetchall())
@@ -178,6 +178,77 @@ class ir_attachment(osv.osv):
                 # Harmless and needed for race conditions
                 _logger.info("_file_delete could not unlink %s", full_path, exc_info=True)
 
+    # resized images cache, stored in the filestore next to the attachments
+    def _resized_image_path(self, cr, uid, checksum, size):
+        """ Return the full path of the cached version of the image with the
+            given checksum resized to ``size`` (a ``(width, height)`` tuple)
+        """
+        width, height = size
+        fname = 'resized/%s/%s_%sx%s' % (checksum[:2], checksum, width or 0, height or 0)
+        return self._full_path(cr, uid, fname)
+
+    def _resized_image_get(self, cr, uid, checksum, size):
+        """ Return the cached resized image (binary) or ``None`` if the image
+            has not been resized to this size yet.
+        """
+        full_path = self._resized_image_path(cr, uid, checksum, size)
+        try:
+            with open(full_path, 'rb') as fp:
+                bin_data = fp.read()
+            # bump the access time, used to evict the least recently used images
+            os.utime(full_path, None)
+        except (IOError, OSError):
+            return None
+        return bin_data
+
+    def _resized_image_set(self, cr, uid, checksum, size, bin_data):
+        """ Store the resized image ``bin_data`` (binary) in the cache """
+        full_path = self._resized_image_path(cr, uid, checksum, size)
+        try:
+            dirname = os.path.dirname(full_path)
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+            # write to a temporary file and rename it, so that concurrent
+            # workers never read a partially written image
+            tmp_path = '%s.%s.tmp' % (full_path, os.getpid())
+            with open(tmp_path, 'wb') as fp:
+                fp.write(bin_data)
+            os.rename(tmp_path, full_path)
+        except (IOError, OSError):
+            _logger.info("_resized_image_set writing %s", full_path, exc_info=True)
+
+    def _gc_resized_images(self, cr, uid, context=None):
+        """ Evict the least recently used resized images until the cache fits
+            in ``ir_attachment.resized_image_cache_size`` bytes (100MB by default)
+        """
+        max_size = int(self.pool['ir.config_parameter'].get_param(
+            cr, SUPERUSER_ID, 'ir_attachment.resized_image_cache_size', 100 * 1024 * 1024))
+        root = self._full_path(cr, uid, 'resized')
+        entries = []
+        total = 0
+        for dirpath, dirnames, filenames in os.walk(root):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, full_path))
+                total += stat.st_size
+        removed = 0
+        for mtime, size, full_path in sorted(entries):
+            if total <= max_size:
+                break
+            try:
+                os.unlink(full_path)
+            except OSError:
+                _logger.info("_gc_resized_images could not unlink %s", full_path, exc_info=True)
+                continue
+            total -= size
+            removed += 1
+        _logger.info("GC'd %d resized images", removed)
+        return True
+
     def _data_get(self, cr, uid, ids, name, arg, context=None):
         if context is None:
             context = {}
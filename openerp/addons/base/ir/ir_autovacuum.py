@@ -27,7 +27,11 @@ class AutoVacuum(models.TransientModel):
         """)
         _logger.info("GC'd %d user log entries", cr.rowcount)
 
+    def _gc_resized_images(self, cr, uid, *args, **kwargs):
+        self.pool['ir.attachment']._gc_resized_images(cr, uid)
+
     def power_on(self, cr, uid, *args, **kwargs):
         self._gc_transient_models(cr, uid, *args, **kwargs)
         self._gc_user_logs(cr, uid, *args, **kwargs)
+        self._gc_resized_images(cr, uid, *args, **kwargs)
         return True
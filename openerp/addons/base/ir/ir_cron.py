@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 import logging
+import os
+import socket
 import threading
 import time
 import psycopg2
@@ -21,6 +23,10 @@ _logger = logging.getLogger(__name__)
 
 BASE_VERSION = load_information_from_description_file('base')['version']
 
+# duration (in seconds) of the lease taken by a worker on the job it runs; the
+# lease is renewed while the job runs, and expires if the worker dies
+CRON_LEASE_DURATION = int(openerp.tools.config.get('cron_lease_duration') or 300)
+
 def str2tuple(s):
     return eval('tuple(%s)' % (s or ''))
 
@@ -57,7 +63,11 @@ class ir_cron(osv.osv):
         'model': fields.char('Object', help="Model name on which the method to be called is located, e.g. 'res.partner'."),
         'function': fields.char('Method', help="Name of the method to be called when this job is processed."),
         'args': fields.text('Arguments', help="Arguments to be passed to the method, e.g. (uid,)."),
-        'priority': fields.integer('Priority', help='The priority of the job, as an integer: 0 means higher priority, 10 means lower priority.')
+        'priority': fields.integer('Priority', help='The priority of the job, as an integer: 0 means higher priority, 10 means lower priority.'),
+        'lease_until': fields.datetime('Leased Until', readonly=True, copy=False,
+            help="The job is being run by a worker until this date, unless its lease is renewed."),
+        'lease_owner': fields.char('Leased By', readonly=True, copy=False,
+            help="Worker process and thread running the job."),
     }
 
     _defaults = {
@@ -145,8 +155,8 @@ class ir_cron(osv.osv):
 
         :param job_cr: cursor to use to execute the job, safe to commit/rollback
         :param job: job to be run (as a dictionary).
-        :param cron_cr: cursor holding lock on the cron job row, to use to update the next exec date,
-            must not be committed/rolled back!
+        :param cron_cr: cursor to use to update the next exec date and release
+            the lease of the job, must not be committed/rolled back!
         """
         try:
             with api.Environment.manage():
@@ -166,8 +176,10 @@ class ir_cron(osv.osv):
                 addsql = ''
                 if not numbercall:
                     addsql = ', active=False'
-                cron_cr.execute("UPDATE ir_cron SET nextcall=%s, numbercall=%s"+addsql+" WHERE id=%s",
-                           (nextcall.astimezone(pytz.UTC).strftime(DEFAULT_SERVER_DATETIME_FORMAT), numbercall, job['id']))
+                # release the lease, unless it expired and another worker took it
+                cron_cr.execute("UPDATE ir_cron SET nextcall=%s, numbercall=%s, lease_until=NULL, lease_owner=NULL"+addsql+
+                                " WHERE id=%s AND lease_owner IS NOT DISTINCT FROM %s",
+                           (nextcall.astimezone(pytz.UTC).strftime(DEFAULT_SERVER_DATETIME_FORMAT), numbercall, job['id'], job.get('lease_owner')))
                 self.invalidate_cache(job_cr, SUPERUSER_ID)
 
         finally:
@@ -177,12 +189,13 @@ class ir_cron(osv.osv):
     @classmethod
     def _acquire_job(cls, db_name):
         # TODO remove 'check' argument from addons/base_action_rule/base_action_rule.py
-        """ Try to process one cron job.
+        """ Try to process the cron jobs of a database.
 
-        This selects in database all the jobs that should be processed. It then
-        tries to lock each of them and, if it succeeds, run the cron job (if it
-        doesn't succeed, it means the job was already locked to be taken care
-        of by another thread) and return.
+        This selects in database all the jobs that should be processed and are
+        not leased. It then tries to lease each of them and, if it succeeds,
+        runs the cron job (if it doesn't succeed, it means the job was already
+        taken by another thread or process). The lease is renewed while the
+        job runs, so that other workers run the other jobs meanwhile.
 
         If a job was processed, returns True, otherwise returns False.
         """
@@ -198,6 +211,7 @@ class ir_cron(osv.osv):
                 cr.execute("""SELECT * FROM ir_cron
                               WHERE numbercall != 0
                                   AND active AND nextcall <= (now() at time zone 'UTC')
+                                  AND (lease_until IS NULL OR lease_until < (now() at time zone 'UTC'))
                               ORDER BY priority""")
                 jobs = cr.dictfetchall()
             else:
@@ -214,50 +228,92 @@ class ir_cron(osv.osv):
         finally:
             cr.close()
 
+        owner = '%s:%s:%s' % (socket.gethostname(), os.getpid(), threading.current_thread().name)
+        processed = False
         for job in jobs:
-            lock_cr = db.cursor()
+            leased_job = cls._lease_job(db, job['id'], owner)
+            if not leased_job:
+                _logger.debug("Job `%s` already taken by another process/thread. skipping it", job['name'])
+                continue
+            job = leased_job
+            processed = True
+            # Got the lease on the job, run its code
+            _logger.debug('Starting job `%s`.', job['name'])
+            stop = threading.Event()
+            keeper = threading.Thread(target=cls._keep_lease, args=(db, job, stop),
+                                      name='%s.lease' % threading.current_thread().name)
+            keeper.setDaemon(True)
+            keeper.start()
+            job_cr = db.cursor()
+            cron_cr = db.cursor()
             try:
-                # Try to grab an exclusive lock on the job row from within the task transaction
-                # Restrict to the same conditions as for the search since the job may have already
-                # been run by an other thread when cron is running in multi thread
-                lock_cr.execute("""SELECT *
-                                   FROM ir_cron
-                                   WHERE numbercall != 0
-                                      AND active
-                                      AND nextcall <= (now() at time zone 'UTC')
-                                      AND id=%s
-                                   FOR UPDATE NOWAIT""",
-                               (job['id'],), log_exceptions=False)
-
-                locked_job = lock_cr.fetchone()
-                if not locked_job:
-                    _logger.debug("Job `%s` already executed by another process/thread. skipping it", job['name'])
-                    continue
-                # Got the lock on the job row, run its code
-                _logger.debug('Starting job `%s`.', job['name'])
-                job_cr = db.cursor()
-                try:
-                    registry = openerp.registry(db_name)
-                    registry[cls._name]._process_job(job_cr, job, lock_cr)
-                except Exception:
-                    _logger.exception('Unexpected exception while processing cron job %r', job)
-                finally:
-                    job_cr.close()
-
-            except psycopg2.OperationalError, e:
-                if e.pgcode == '55P03':
-                    # Class 55: Object not in prerequisite state; 55P03: lock_not_available
-                    _logger.debug('Another process/thread is already busy executing job `%s`, skipping it.', job['name'])
-                    continue
-                else:
-                    # Unexpected OperationalError
-                    raise
+                registry = openerp.registry(db_name)
+                registry[cls._name]._process_job(job_cr, job, cron_cr)
+            except Exception:
+                _logger.exception('Unexpected exception while processing cron job %r', job)
             finally:
-                # we're exiting due to an exception while acquiring the lock
-                lock_cr.close()
+                stop.set()
+                keeper.join()
+                job_cr.close()
+                cron_cr.close()
 
         if hasattr(threading.current_thread(), 'dbname'): # cron job could have removed it as side-effect
             del threading.current_thread().dbname
+        return processed
+
+    @classmethod
+    def _lease_job(cls, db, job_id, owner):
+        """ Try to lease the job ``job_id`` for ``owner``, and return the job
+        (as a dictionary), or ``None`` if the job is not due anymore or is
+        already leased.
+        """
+        cr = db.cursor()
+        try:
+            # Restrict to the same conditions as for the search since the job
+            # may have already been taken by another thread or process
+            cr.execute("""SELECT id FROM ir_cron
+                          WHERE numbercall != 0
+                             AND active
+                             AND nextcall <= (now() at time zone 'UTC')
+                             AND (lease_until IS NULL OR lease_until < (now() at time zone 'UTC'))
+                             AND id=%s
+                          FOR UPDATE NOWAIT""",
+                       (job_id,), log_exceptions=False)
+            if not cr.fetchone():
+                return None
+            cr.execute("""UPDATE ir_cron
+                          SET lease_until=(now() at time zone 'UTC') + %s * interval '1 second',
+                              lease_owner=%s
+                          WHERE id=%s
+                          RETURNING *""",
+                       (CRON_LEASE_DURATION, owner, job_id))
+            job = cr.dictfetchone()
+            cr.commit()
+            return job
+        except psycopg2.OperationalError, e:
+            if e.pgcode == '55P03':
+                # Class 55: Object not in prerequisite state; 55P03: lock_not_available
+                return None
+            # Unexpected OperationalError
+            raise
+        finally:
+            cr.close()
+
+    @classmethod
+    def _keep_lease(cls, db, job, stop):
+        """ Renew the lease of ``job`` until ``stop`` is set. """
+        while not stop.wait(CRON_LEASE_DURATION / 3.0):
+            cr = db.cursor()
+            try:
+                cr.execute("""UPDATE ir_cron
+                              SET lease_until=(now() at time zone 'UTC') + %s * interval '1 second'
+                              WHERE id=%s AND lease_owner=%s""",
+                           (CRON_LEASE_DURATION, job['id'], job['lease_owner']))
+                cr.commit()
+            except Exception:
+                _logger.warning('Could not renew the lease of cron job `%s`', job['name'], exc_info=True)
+            finally:
+                cr.close()
 
     def _try_lock(self, cr, uid, ids, context=None):
         """Try to grab a dummy exclusive write-lock to the rows with the given ids,
@@ -266,7 +322,13 @@ class ir_cron(osv.osv):
         try:
             cr.execute("""SELECT id FROM "%s" WHERE id IN %%s FOR UPDATE NOWAIT""" % self._table,
                        (tuple(ids),), log_exceptions=False)
+            # jobs being run are leased rather than locked
+            cr.execute("""SELECT id FROM "%s" WHERE id IN %%s AND lease_until >= (now() at time zone 'UTC')""" % self._table,
+                       (tuple(ids),))
+            leased = cr.fetchone()
         except psycopg2.OperationalError:
+            leased = True
+        if leased:
             cr.rollback() # early rollback to allow translations to work for the user feedback
             raise UserError(_("Record cannot be modified right now: "
                                 "This cron task is currently being executed and may not be modified "
@@ -311,6 +311,13 @@ class ir_fields_converter(models.AbstractModel):
             action['domain'] = [('model', '=', field.comodel_name)]
 
         RelatedModel = self.env[field.comodel_name]
+        # references resolved beforehand for a whole file, see
+        # ``_import_references`` in the context
+        references = self._context.get('_import_references')
+        if references and (field.comodel_name, subfield, value) in references:
+            id = references[(field.comodel_name, subfield, value)]
+            return id, _(u"external id") if subfield == 'id' else _(u"database id"), warnings
+
         if subfield == '.id':
             field_type = _(u"database id")
             try: tentative_id = int(value)
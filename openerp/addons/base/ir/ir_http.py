@@ -71,6 +71,11 @@ class ir_http(osv.AbstractModel):
     def _get_converters(self):
         return {'model': ModelConverter, 'models': ModelsConverter, 'int': SignedIntConverter}
 
+    def _rebind_request(self):
+        """ Bind the records kept on the request to the cursor of the request,
+        after that cursor has been replaced. """
+        pass
+
     def _find_handler(self, return_rule=False):
         return self.routing_map().bind_to_environ(request.httprequest.environ).match(return_rule=return_rule)
 
@@ -166,6 +171,9 @@ class ir_http(osv.AbstractModel):
         except werkzeug.exceptions.NotFound, e:
             return self._handle_exception(e)
 
+        # cursors of read-only routes may be opened on a replica
+        request.readonly = func.routing.get('readonly', False)
+
         # check authentication level
         try:
             auth_method = self._authenticate(func.routing["auth"])
@@ -200,7 +208,7 @@ class ir_http(osv.AbstractModel):
     def routing_map(self):
         if not hasattr(self, '_routing_map'):
             _logger.info("Generating routing map")
-            installed = request.registry._init_modules - {'web'}
+            installed = self.pool._init_modules - {'web'}
             if openerp.tools.config['test_enable']:
                 installed.add(openerp.modules.module.current_test)
             mods = [''] + openerp.conf.server_wide_modules + sorted(installed)
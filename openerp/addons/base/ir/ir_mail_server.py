@@ -12,6 +12,7 @@ import logging
 import re
 import smtplib
 import threading
+import time
 
 from openerp import SUPERUSER_ID
 from openerp.osv import osv, fields
@@ -104,6 +105,70 @@ def encode_header_param(param_text):
     return param_text_ascii if param_text_ascii\
          else Charset('utf8').header_encode(param_text_utf8)
 
+class SMTPConnectionPool(object):
+    """ Pool of authenticated SMTP connections, shared by the threads of the
+        current process. Idle connections are kept per server and credentials,
+        and are checked with a NOOP before being reused.
+    """
+    def __init__(self, size=4, timeout=60):
+        self.size = size                # max idle connections per server
+        self.timeout = timeout          # max idle time of a connection (s)
+        self._idle = {}                 # {key: [(connection, last_used)]}
+        self._lock = threading.Lock()
+
+    def borrow(self, key, connect):
+        """ Return a connection for ``key``, either an idle one that is still
+            alive, or a new one returned by ``connect()``.
+        """
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    break
+                connection, last_used = idle.pop()
+            if time.time() - last_used < self.timeout:
+                try:
+                    if connection.noop()[0] == 250:
+                        return connection
+                except smtplib.SMTPException:
+                    pass
+                except Exception:
+                    _logger.debug("SMTP connection health check failed", exc_info=True)
+            self.discard(connection)
+        return connect()
+
+    def release(self, key, connection):
+        """ Give back a connection after a successful use. """
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.size:
+                idle.append((connection, time.time()))
+                return
+        self.discard(connection)
+
+    def discard(self, connection):
+        """ Close a connection that must not be reused. """
+        try:
+            connection.quit()
+        except Exception:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def clear(self):
+        """ Close all idle connections. """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.itervalues():
+            for connection, last_used in connections:
+                self.discard(connection)
+
+smtp_pool = SMTPConnectionPool(
+    size=int(tools.config.get('smtp_pool_size') or 4),
+    timeout=int(tools.config.get('smtp_pool_timeout') or 60),
+)
+
 # TODO master, remove me, no longer used internaly
 name_with_email_pattern = re.compile(r'("[^<@>]+")\s*<([^ ,<@]+@[^> ,]+)>')
 address_pattern = re.compile(r'([^ ,<@]+@[^> ,]+)')
@@ -468,13 +533,23 @@ class ir_mail_server(osv.osv):
                 mdir.add(message.as_string(True))
                 return message_id
 
-            smtp = None
+            # connections are pooled per server and credentials, and reused
+            # for the next messages; a pooled connection closed by the server
+            # in the meantime is replaced by a new one
+            key = (smtp_server, smtp_port, smtp_user, smtp_password, smtp_encryption or False, smtp_debug)
+            connect = lambda: self.connect(smtp_server, smtp_port, smtp_user, smtp_password, smtp_encryption or False, smtp_debug)
+            smtp = smtp_pool.borrow(key, connect)
             try:
-                smtp = self.connect(smtp_server, smtp_port, smtp_user, smtp_password, smtp_encryption or False, smtp_debug)
-                smtp.sendmail(smtp_from, smtp_to_list, message.as_string())
-            finally:
-                if smtp is not None:
-                    smtp.quit()
+                try:
+                    smtp.sendmail(smtp_from, smtp_to_list, message.as_string())
+                except smtplib.SMTPServerDisconnected:
+                    smtp_pool.discard(smtp)
+                    smtp = connect()
+                    smtp.sendmail(smtp_from, smtp_to_list, message.as_string())
+            except Exception:
+                smtp_pool.discard(smtp)
+                raise
+            smtp_pool.release(key, smtp)
         except Exception, e:
             msg = _("Mail delivery failed via SMTP server '%s'.\n%s: %s") % (tools.ustr(smtp_server),
                                                                              e.__class__.__name__,
@@ -87,11 +87,13 @@ class FileSystemLoader(object):
                 return arch
 
 class QWebContext(dict):
-    def __init__(self, cr, uid, data, loader=None, context=None):
+    def __init__(self, cr, uid, data, loader=None, context=None, compiled=None):
         self.cr = cr
         self.uid = uid
         self.loader = loader
         self.context = context
+        # compiled children of the elements of the template being rendered
+        self.compiled = compiled if compiled is not None else {}
         dic = dict(data)
         super(QWebContext, self).__init__(dic)
         self['defined'] = lambda key: key in self
@@ -109,7 +111,8 @@ class QWebContext(dict):
         """
         return QWebContext(self.cr, self.uid, dict.copy(self),
                            loader=self.loader,
-                           context=self.context)
+                           context=self.context,
+                           compiled=self.compiled)
 
     def __copy__(self):
         return self.copy()
@@ -168,11 +171,21 @@ class QWeb(orm.AbstractModel):
 
     def get_template(self, name, qwebcontext):
         origin_template = qwebcontext.get('__caller__') or qwebcontext['__stack__'][0]
+        document = self._load_document(name, qwebcontext)
+        return self._parse_template(document, name, origin_template)
+
+    def _load_document(self, name, qwebcontext):
+        """ Return the document that contains the template ``name``, as given
+        by the loader of ``qwebcontext``.
+        """
         try:
-            document = qwebcontext.loader(name)
+            return qwebcontext.loader(name)
         except ValueError:
+            origin_template = qwebcontext.get('__caller__') or qwebcontext['__stack__'][0]
             raise_qweb_exception(QWebTemplateNotFound, message="Loader could not find template %r" % name, template=origin_template)
 
+    def _parse_template(self, document, name, origin_template=None):
+        """ Return the root element of the template ``name`` in ``document``. """
         if hasattr(document, 'documentElement'):
             dom = document
         elif document.startswith("<?xml"):
@@ -249,59 +262,132 @@ class QWeb(orm.AbstractModel):
         qwebcontext['__stack__'] = stack
         qwebcontext['xmlid'] = str(stack[0]) # Temporary fix
 
-        element = self.get_template(id_or_xml_id, qwebcontext)
-        element.attrib.pop("name", False)
-        return self.render_node(element, qwebcontext, generated_attributes=qwebcontext.pop('generated_attributes', ''))
+        origin_template = qwebcontext.get('__caller__') or stack[0]
+        document = self._load_document(id_or_xml_id, qwebcontext)
+        render, compiled = self._compile_template(cr, uid, document, id_or_xml_id, origin_template)
 
-    def render_node(self, element, qwebcontext, generated_attributes=''):
+        # the compiled children of the template's elements are looked up by
+        # render_element(); restore the caller's ones once done
+        caller_compiled, qwebcontext.compiled = qwebcontext.compiled, compiled
+        try:
+            return render(qwebcontext, qwebcontext.pop('generated_attributes', ''))
+        finally:
+            qwebcontext.compiled = caller_compiled
+
+    # compiled templates are shared by all renderings, they are invalidated
+    # together with the templates returned by ir.ui.view.read_template()
+    @openerp.tools.conditional(not openerp.tools.config['dev_mode'],
+        openerp.tools.ormcache('document', 'name', size=512,
+                               depends=('ir.ui.view', 'ir.translation', 'res.groups')))
+    def _compile_template(self, cr, uid, document, name, origin_template=None):
+        """ Parse the template ``name`` in ``document`` and compile it.
+
+        :returns: a pair ``(render, compiled)`` where ``render(qwebcontext,
+                  generated_attributes)`` renders the template, and
+                  ``compiled`` maps every element of the template to the
+                  compiled functions of its children
+        """
+        element = self._parse_template(document, name, origin_template)
+        element.attrib.pop("name", False)
+        compiled = {}
+        return self.compile_node(element, compiled), compiled
+
+    def compile_node(self, element, compiled=None):
+        """ Compile ``element`` into a function ``render(qwebcontext,
+        generated_attributes='')`` that renders the element and its tail. The
+        attributes of the element are analyzed once for all: the function only
+        evaluates the dynamic parts of the element.
+
+        If ``compiled`` is given, the descendants of ``element`` are compiled
+        as well, and the compiled functions of the children of every element
+        are stored in ``compiled``. Otherwise they are compiled when rendered.
+        """
+        debugger = element.get('t-debug')
+        groups = None
         t_render = None
         template_attributes = {}
-
-        debugger = element.get('t-debug')
-        if debugger is not None:
-            if openerp.tools.config['dev_mode']:
-                __import__(debugger).set_trace()  # pdb, ipdb, pudb, ...
-            else:
-                _logger.warning("@t-debug in template '%s' is only available in --dev mode" % qwebcontext['__template__'])
+        # generated attributes: either a string, or a triple (handler, name,
+        # value) where handler is None for a plain attribute
+        parts = []
+        static_attributes = type(self).render_attribute.im_func is QWeb.render_attribute.im_func
 
         for (attribute_name, attribute_value) in element.attrib.iteritems():
             attribute_name = unicode(attribute_name)
             if attribute_name == "groups":
-                cr = qwebcontext.get('request') and qwebcontext['request'].cr or None
-                uid = qwebcontext.get('request') and qwebcontext['request'].uid or None
-                can_see = self.user_has_groups(cr, uid, groups=attribute_value) if cr and uid else False
-                if not can_see:
-                    return element.tail and self.render_tail(element.tail, element, qwebcontext) or ''
+                groups = attribute_value
 
             attribute_value = attribute_value.encode("utf8")
 
             if attribute_name.startswith("t-"):
                 for attribute in self._render_att:
                     if attribute_name[2:].startswith(attribute):
-                        attrs = self._render_att[attribute](
-                            self, element, attribute_name, attribute_value, qwebcontext)
-                        for att, val in attrs:
-                            if not val: continue
-                            generated_attributes += self.render_attribute(element, att, val, qwebcontext)
+                        parts.append((self._render_att[attribute], attribute_name, attribute_value))
                         break
                 else:
                     if attribute_name[2:] in self._render_tag:
                         t_render = attribute_name[2:]
                     template_attributes[attribute_name[2:]] = attribute_value
+            elif static_attributes:
+                attribute = self.render_attribute(element, attribute_name, attribute_value, None)
+                if parts and isinstance(parts[-1], str):
+                    parts[-1] += attribute
+                else:
+                    parts.append(attribute)
             else:
-                generated_attributes += self.render_attribute(element, attribute_name, attribute_value, qwebcontext)
+                parts.append((None, attribute_name, attribute_value))
 
-        if t_render:
-            result = self._render_tag[t_render](self, element, template_attributes, generated_attributes, qwebcontext)
-        else:
-            result = self.render_element(element, template_attributes, generated_attributes, qwebcontext)
+        render_tag = self._render_tag[t_render] if t_render else None
+        tail = element.tail
+
+        if compiled is not None:
+            compiled[element] = [
+                (child, self.compile_node(child, compiled))
+                for child in element.iterchildren(tag=etree.Element)
+            ]
+
+        def render(qwebcontext, generated_attributes=''):
+            if debugger is not None:
+                if openerp.tools.config['dev_mode']:
+                    __import__(debugger).set_trace()  # pdb, ipdb, pudb, ...
+                else:
+                    _logger.warning("@t-debug in template '%s' is only available in --dev mode" % qwebcontext['__template__'])
+
+            if groups is not None:
+                cr = qwebcontext.get('request') and qwebcontext['request'].cr or None
+                uid = qwebcontext.get('request') and qwebcontext['request'].uid or None
+                can_see = self.user_has_groups(cr, uid, groups=groups) if cr and uid else False
+                if not can_see:
+                    return tail and self.render_tail(tail, element, qwebcontext) or ''
+
+            for part in parts:
+                if isinstance(part, str):
+                    generated_attributes += part
+                    continue
+                handler, attribute_name, attribute_value = part
+                if handler is None:
+                    generated_attributes += self.render_attribute(element, attribute_name, attribute_value, qwebcontext)
+                    continue
+                for att, val in handler(self, element, attribute_name, attribute_value, qwebcontext):
+                    if not val: continue
+                    generated_attributes += self.render_attribute(element, att, val, qwebcontext)
+
+            # tag handlers are allowed to alter template_attributes
+            if render_tag:
+                result = render_tag(self, element, dict(template_attributes), generated_attributes, qwebcontext)
+            else:
+                result = self.render_element(element, template_attributes, generated_attributes, qwebcontext)
 
-        if element.tail:
-            result += self.render_tail(element.tail, element, qwebcontext)
+            if tail:
+                result += self.render_tail(tail, element, qwebcontext)
 
-        if isinstance(result, unicode):
-            return result.encode('utf-8')
-        return result
+            if isinstance(result, unicode):
+                return result.encode('utf-8')
+            return result
+
+        return render
+
+    def render_node(self, element, qwebcontext, generated_attributes=''):
+        return self.compile_node(element)(qwebcontext, generated_attributes)
 
     def render_element(self, element, template_attributes, generated_attributes, qwebcontext, inner=None):
         # element: element
@@ -314,10 +400,16 @@ class QWeb(orm.AbstractModel):
             g_inner = inner.encode('utf-8') if isinstance(inner, unicode) else inner
         else:
             g_inner = [] if element.text is None else [self.render_text(element.text, element, qwebcontext)]
-            for current_node in element.iterchildren(tag=etree.Element):
+            children = getattr(qwebcontext, 'compiled', {}).get(element)
+            if children is None:
+                children = [
+                    (child, self.compile_node(child))
+                    for child in element.iterchildren(tag=etree.Element)
+                ]
+            for current_node, render_node in children:
                 try:
-                    g_inner.append(self.render_node(current_node, qwebcontext,
-                        generated_attributes= name == "t" and generated_attributes or ''))
+                    g_inner.append(render_node(qwebcontext,
+                        name == "t" and generated_attributes or ''))
                 except QWebException:
                     raise
                 except Exception:
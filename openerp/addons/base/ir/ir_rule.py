@@ -85,7 +85,7 @@ class ir_rule(osv.osv):
         (_check_model_name, 'Rules can not be applied on the Record Rules model.', ['model_id']),
     ]
 
-    @tools.ormcache('uid', 'model_name', 'mode')
+    @tools.ormcache('uid', 'model_name', 'mode', size=2048, depends=('res.groups', 'res.users', 'res.company'))
     def _compute_domain(self, cr, uid, model_name, mode="read"):
         if mode not in self._MODES:
             raise ValueError('Invalid mode: %r' % (mode,))
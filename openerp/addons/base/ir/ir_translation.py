@@ -360,7 +360,7 @@ class ir_translation(osv.osv):
         
         return (query, params)
 
-    @tools.ormcache('name', 'types', 'lang', 'source', 'res_id')
+    @tools.ormcache('name', 'types', 'lang', 'source', 'res_id', size=8192, depends=())
     def __get_source(self, cr, uid, name, types, lang, source, res_id):
         # res_id is a tuple or None, otherwise ormcache cannot cache it!
         query, params = self._get_source_query(cr, uid, name, types, lang, source, res_id)
@@ -476,7 +476,7 @@ class ir_translation(osv.osv):
         discarded.unlink()
 
     @api.model
-    @tools.ormcache_context('model_name', keys=('lang',))
+    @tools.ormcache_context('model_name', keys=('lang',), depends=('ir.model.fields',))
     def get_field_string(self, model_name):
         """ Return the translation of fields strings in the context's language.
         Note that the result contains the available translations only.
@@ -488,7 +488,7 @@ class ir_translation(osv.osv):
         return {field.name: field.field_description for field in fields}
 
     @api.model
-    @tools.ormcache_context('model_name', keys=('lang',))
+    @tools.ormcache_context('model_name', keys=('lang',), depends=('ir.model.fields',))
     def get_field_help(self, model_name):
         """ Return the translation of fields help in the context's language.
         Note that the result contains the available translations only.
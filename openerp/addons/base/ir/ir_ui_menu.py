@@ -15,6 +15,9 @@ from openerp.tools.translate import _
 
 MENU_ITEM_SEPARATOR = "/"
 
+# models whose changes may alter the visibility of menus
+MENU_CACHE_DEPENDS = ('res.groups', 'ir.model.access', 'ir.actions.act_window')
+
 
 class ir_ui_menu(osv.osv):
     _name = 'ir.ui.menu'
@@ -24,7 +27,8 @@ class ir_ui_menu(osv.osv):
         self.pool['ir.model.access'].register_cache_clearing_method(self._name, 'clear_caches')
 
     @api.model
-    @tools.ormcache('frozenset(self.env.user.groups_id.ids)', 'debug')
+    @tools.ormcache('frozenset(self.env.user.groups_id.ids)', 'debug',
+                    depends=MENU_CACHE_DEPENDS)
     def _visible_menu_ids(self, debug=False):
         """ Return the ids of the menu items visible to the user. """
         # retrieve all menus, and determine which ones are visible
@@ -238,7 +242,7 @@ class ir_ui_menu(osv.osv):
         return self.search(cr, uid, menu_domain, context=context)
 
     @api.cr_uid_context
-    @tools.ormcache_context('uid', keys=('lang',))
+    @tools.ormcache_context('uid', keys=('lang',), depends=MENU_CACHE_DEPENDS + ('ir.translation',))
     def load_menus_root(self, cr, uid, context=None):
         fields = ['name', 'sequence', 'parent_id', 'action', 'web_icon_data']
         menu_root_ids = self.get_user_roots(cr, uid, context=context)
@@ -252,7 +256,7 @@ class ir_ui_menu(osv.osv):
         }
 
     @api.cr_uid_context
-    @tools.ormcache_context('uid', 'debug', keys=('lang',))
+    @tools.ormcache_context('uid', 'debug', keys=('lang',), depends=MENU_CACHE_DEPENDS + ('ir.translation',))
     def load_menus(self, cr, uid, debug, context=None):
         """ Loads all menu items (all applications and their sub-menus).
 
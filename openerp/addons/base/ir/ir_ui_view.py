@@ -918,7 +918,8 @@ class view(osv.osv):
     # apply ormcache_context decorator unless in dev mode...
     @tools.conditional(not config['dev_mode'],
         tools.ormcache_context('uid', 'view_id',
-            keys=('lang', 'inherit_branding', 'editable', 'translatable', 'edit_translations')))
+            keys=('lang', 'inherit_branding', 'editable', 'translatable', 'edit_translations'),
+            size=4096, depends=('ir.translation', 'res.groups')))
     def _read_template(self, cr, uid, view_id, context=None):
         arch = self.read_combined(cr, uid, view_id, fields=['arch'], context=context)['arch']
         arch_tree = etree.fromstring(arch)
@@ -1019,7 +1020,7 @@ class view(osv.osv):
         # Deprecated: templates are translated once read from database
         return arch
 
-    @openerp.tools.ormcache('uid', 'id')
+    @openerp.tools.ormcache('uid', 'id', depends=('ir.model.data',))
     def get_view_xmlid(self, cr, uid, id):
         imd = self.pool['ir.model.data']
         domain = [('model', '=', 'ir.ui.view'), ('res_id', '=', id)]
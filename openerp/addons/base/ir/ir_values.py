@@ -319,7 +319,7 @@ class ir_values(osv.osv):
         return defaults.values()
 
     # use ormcache: this is called a lot by BaseModel.default_get()!
-    @tools.ormcache('uid', 'model', 'condition')
+    @tools.ormcache('uid', 'model', 'condition', depends=())
     def get_defaults_dict(self, cr, uid, model, condition=False):
         """ Returns a dictionary mapping field names with their corresponding
             default value. This method simply improves the returned value of
@@ -369,7 +369,8 @@ class ir_values(osv.osv):
             'value': action,
         })
 
-    @tools.ormcache_context('uid', 'action_slot', 'model', 'res_id', keys=('lang',))
+    @tools.ormcache_context('uid', 'action_slot', 'model', 'res_id', keys=('lang',),
+                            depends=('ir.translation', 'res.groups', 'ir.actions.act_window'))
     def get_actions(self, cr, uid, action_slot, model, res_id=False, context=None):
         """Retrieves the list of actions bound to the given model's action slot.
            See the class description for more details about the various action
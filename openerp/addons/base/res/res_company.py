@@ -164,7 +164,7 @@ class res_company(osv.osv):
         """
         return self.pool['res.users']._get_company(cr, uid, context=context)
 
-    @tools.ormcache('uid', 'company')
+    @tools.ormcache('uid', 'company', depends=())
     def _get_company_children(self, cr, uid=None, company=None):
         if not company:
             return []
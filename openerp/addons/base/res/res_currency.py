@@ -4,6 +4,8 @@
 import re
 import time
 import math
+import datetime
+from bisect import bisect_right
 
 from openerp import api, fields as fields2
 from openerp import tools
@@ -18,23 +20,45 @@ class res_currency(osv.osv):
     def _get_current_rate(self, cr, uid, ids, name, arg, context=None):
         if context is None:
             context = {}
-        res = {}
-
         date = context.get('date') or fields2.Datetime.now()
         company_id = context.get('company_id') or self.pool['res.users']._get_company(cr, uid, context=context)
-        for id in ids:
-            cr.execute("""SELECT rate FROM res_currency_rate 
-                           WHERE currency_id = %s
-                             AND name <= %s
-                             AND (company_id is null
-                                 OR company_id = %s)
-                        ORDER BY company_id, name desc LIMIT 1""",
-                       (id, date, company_id))
-            if cr.rowcount:
-                res[id] = cr.fetchone()[0]
-            else:
-                res[id] = 1
-        return res
+        return dict((id, self._get_rate(cr, uid, id, date, company_id)) for id in ids)
+
+    @tools.ormcache('currency_id', 'company_id', depends=('res.currency.rate',))
+    def _get_rate_timeline(self, cr, uid, currency_id, company_id):
+        """ Return the rates of a currency for a company, as a pair of
+            timelines: the rates of the company, then the rates shared by all
+            companies. Each timeline is a pair ``(dates, rates)`` of tuples
+            sorted by date.
+        """
+        cr.execute("""SELECT company_id, name, rate FROM res_currency_rate
+                       WHERE currency_id = %s
+                         AND (company_id is null
+                             OR company_id = %s)
+                    ORDER BY name, id""",
+                   (currency_id, company_id))
+        rows = cr.fetchall()
+        company_rates = [(name, rate) for rate_company_id, name, rate in rows if rate_company_id]
+        shared_rates = [(name, rate) for rate_company_id, name, rate in rows if not rate_company_id]
+        return tuple(tuple(zip(*rates)) or ((), ()) for rates in (company_rates, shared_rates))
+
+    def _get_rate(self, cr, uid, currency_id, date, company_id):
+        """ Return the rate of a currency at ``date`` for a company: the last
+            rate of the company at that date, or the last shared rate if the
+            company has none, or 1 if there is no rate at all.
+        """
+        if isinstance(date, datetime.datetime):
+            date = fields2.Datetime.to_string(date)
+        elif isinstance(date, datetime.date):
+            date = fields2.Date.to_string(date)
+        if len(date) == 10:
+            # a date (without time) stands for its midnight
+            date += ' 00:00:00'
+        for dates, rates in self._get_rate_timeline(cr, uid, currency_id, company_id):
+            index = bisect_right(dates, date)
+            if index:
+                return rates[index - 1]
+        return 1
 
     def _decimal_places(self, cr, uid, ids, name, arg, context=None):
         res = {}
@@ -171,10 +195,10 @@ class res_currency(osv.osv):
     def _get_conversion_rate(self, cr, uid, from_currency, to_currency, context=None):
         if context is None:
             context = {}
-        ctx = context.copy()
-        from_currency = self.browse(cr, uid, from_currency.id, context=ctx)
-        to_currency = self.browse(cr, uid, to_currency.id, context=ctx)
-        return to_currency.rate/from_currency.rate
+        date = context.get('date') or fields2.Datetime.now()
+        company_id = context.get('company_id') or self.pool['res.users']._get_company(cr, uid, context=context)
+        return self._get_rate(cr, uid, to_currency.id, date, company_id) / \
+            self._get_rate(cr, uid, from_currency.id, date, company_id)
 
     def _compute(self, cr, uid, from_currency, to_currency, from_amount, round=True, context=None):
         if (to_currency.id == from_currency.id):
@@ -215,6 +239,32 @@ class res_currency(osv.osv):
         # apply rounding
         return to_currency.round(to_amount) if round else to_amount
 
+    @api.v8
+    def compute_many(self, amounts, to_currency, round=True):
+        """ Convert the pairs ``(amount, date)`` of `amounts` from currency
+            `self` to `to_currency`, each amount at the rate of its date, and
+            return the list of the converted amounts. An empty date stands for
+            the date given in context, or now.
+        """
+        assert self, "compute from unknown currency"
+        assert to_currency, "compute to unknown currency"
+        if self == to_currency:
+            to_amounts = [amount for amount, date in amounts]
+        else:
+            default_date = self._context.get('date') or fields2.Datetime.now()
+            company_id = self._context.get('company_id') or self.env['res.users']._get_company()
+            rates = {}
+            to_amounts = []
+            for amount, date in amounts:
+                date = date or default_date
+                if date not in rates:
+                    rates[date] = self._get_rate(to_currency.id, date, company_id) / \
+                        self._get_rate(self.id, date, company_id)
+                to_amounts.append(amount * rates[date])
+        if round:
+            return [to_currency.round(amount) for amount in to_amounts]
+        return to_amounts
+
     @api.v7
     def get_format_currencies_js_function(self, cr, uid, context=None):
         """ Returns a string that can be used to instanciate a javascript function that formats numbers as currencies.
@@ -251,6 +301,18 @@ class res_currency_rate(osv.osv):
     }
     _order = "name desc"
 
+    def create(self, cr, uid, vals, context=None):
+        self.clear_caches()
+        return super(res_currency_rate, self).create(cr, uid, vals, context=context)
+
+    def write(self, cr, uid, ids, vals, context=None):
+        self.clear_caches()
+        return super(res_currency_rate, self).write(cr, uid, ids, vals, context=context)
+
+    def unlink(self, cr, uid, ids, context=None):
+        self.clear_caches()
+        return super(res_currency_rate, self).unlink(cr, uid, ids, context=context)
+
     def name_search(self, cr, user, name, args=None, operator='ilike', context=None, limit=80):
         if operator in ['=', '!=']:
             try:
@@ -179,14 +179,14 @@ class lang(osv.osv):
         (_check_grouping, "The Separator Format should be like [,n] where 0 < n :starting from Unit digit.-1 will end the separation. e.g. [3,2,-1] will represent 106500 to be 1,06,500;[1,2,-1] will represent it to be 106,50,0;[3] will represent it as 106,500. Provided ',' as the thousand separator in each case.", ['grouping'])
     ]
 
-    @tools.ormcache('lang')
+    @tools.ormcache('lang', depends=())
     def _lang_get(self, cr, uid, lang):
         lang_ids = self.search(cr, uid, [('code', '=', lang)]) or \
                    self.search(cr, uid, [('code', '=', 'en_US')]) or \
                    self.search(cr, uid, [])
         return lang_ids[0]
 
-    @tools.ormcache('lang', 'monetary')
+    @tools.ormcache('lang', 'monetary', depends=())
     def _lang_data_get(self, cr, uid, lang, monetary=False):
         if type(lang) in (str, unicode):
             lang = self._lang_get(cr, uid, lang)
@@ -197,13 +197,13 @@ class lang(osv.osv):
         grouping = lang_obj.grouping
         return grouping, thousands_sep, decimal_point
 
-    @tools.ormcache()
+    @tools.ormcache(depends=())
     def get_available(self, cr, uid, context=None):
         """ Return the available languages as a list of (code, name) sorted by name. """
         langs = self.browse(cr, uid, self.search(cr, uid, [], context={'active_test': False}))
         return sorted([(lang.code, lang.name) for lang in langs], key=itemgetter(1))
 
-    @tools.ormcache()
+    @tools.ormcache(depends=())
     def get_installed(self, cr, uid, context=None):
         """ Return the installed languages as a list of (code, name) sorted by name. """
         langs = self.browse(cr, uid, self.search(cr, uid, []))
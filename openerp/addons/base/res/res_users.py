@@ -407,7 +407,7 @@ class res_users(osv.osv):
             default['login'] = _("%s (copy)") % user2copy['login']
         return super(res_users, self).copy(cr, uid, id, default, context)
 
-    @tools.ormcache('uid')
+    @tools.ormcache('uid', depends=())
     def context_get(self, cr, uid, context=None):
         user = self.browse(cr, SUPERUSER_ID, uid, context)
         result = {}
@@ -531,7 +531,7 @@ class res_users(osv.osv):
             'target': 'new',
         }
 
-    @tools.ormcache('uid', 'group_ext_id')
+    @tools.ormcache('uid', 'group_ext_id', depends=('res.groups', 'ir.model.data'))
     def has_group(self, cr, uid, group_ext_id):
         """Checks whether user belongs to given group.
 
@@ -5,6 +5,7 @@ import test_basecase
 import test_db_cursor
 import test_expression
 import test_func
+import test_http_session
 import test_ir_actions
 import test_ir_attachment
 import test_ir_filters
@@ -18,7 +19,9 @@ import test_ormcache
 import test_osv
 import test_qweb
 import test_res_config
+import test_res_currency
 import test_res_lang
+import test_safe_eval
 import test_search
 import test_translate
 #import test_uninstall
@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import json
+import threading
 import unittest
 
+from mock import Mock, patch
+import psycopg2
+from werkzeug.test import EnvironBuilder
+
 import openerp
 from openerp.tools.misc import mute_logger
 from openerp.tests import common
@@ -27,3 +33,151 @@ class test_cr_execute(unittest.TestCase):
                 cr.execute("SELECT id FROM res_users WHERE id=%s", 1)
             with self.assertRaises(ValueError):
                 cr.execute("SELECT id FROM res_users WHERE id=%s", '1')
+
+
+class test_connection_pool(unittest.TestCase):
+    """ Check the waiting and reuse of connections in the pool """
+
+    def setUp(self):
+        self.dsn = openerp.sql_db.dsn(common.get_db_name())[1]
+        self.pool = openerp.sql_db.ConnectionPool(maxconn=1, timeout=0.2)
+        self.addCleanup(self.pool.close_all)
+
+    def test_reuse(self):
+        cnx = self.pool.borrow(self.dsn)
+        self.pool.give_back(cnx)
+        self.assertIs(self.pool.borrow(self.dsn), cnx)
+        stats = self.pool.stats()
+        self.assertEqual((stats['borrowed'], stats['created'], stats['used']), (2, 1, 1))
+
+    @mute_logger('openerp.sql_db')
+    def test_wait(self):
+        cnx = self.pool.borrow(self.dsn)
+        with self.assertRaises(openerp.sql_db.PoolError):
+            self.pool.borrow(self.dsn)
+        self.assertEqual(self.pool.stats()['timeouts'], 1)
+
+        # a connection given back while waiting is handed over
+        timer = threading.Timer(0.05, self.pool.give_back, [cnx])
+        timer.start()
+        self.assertIs(self.pool.borrow(self.dsn), cnx)
+        timer.join()
+        stats = self.pool.stats()
+        self.assertEqual((stats['waited'], stats['timeouts'], stats['waiting']), (2, 1, 0))
+
+
+class ReadOnlyConnection(openerp.sql_db.Connection):
+    """ A connection to the database that behaves like a replica """
+    def cursor(self, serialized=True):
+        cr = super(ReadOnlyConnection, self).cursor(serialized=serialized)
+        cr.execute("SET TRANSACTION READ ONLY")
+        return cr
+
+# a query that modifies nothing, but cannot be executed on a replica
+WRITE_QUERY = "UPDATE res_users SET login = login WHERE id IS NULL"
+
+
+class test_replicas(unittest.TestCase):
+    """ Check the routing of read-only cursors to replicas """
+
+    def replica(self):
+        def db_connect_replica(db_name):
+            uri = openerp.sql_db.dsn(db_name)[1]
+            return ReadOnlyConnection(openerp.sql_db._get_pool(), db_name, uri, replica=True)
+        return patch('openerp.sql_db.db_connect_replica', db_connect_replica)
+
+    def http_request(self, method, type='http'):
+        if type == 'json':
+            builder = EnvironBuilder(path='/test_replica', method=method, content_type='application/json',
+                                     data=json.dumps({'jsonrpc': '2.0', 'method': 'call', 'params': {}}))
+        else:
+            builder = EnvironBuilder(path='/test_replica', method=method)
+        httprequest = builder.get_request()
+        httprequest.session = Mock(db=common.get_db_name(), uid=None, context={})
+        if type == 'json':
+            return openerp.http.JsonRequest(httprequest)
+        return openerp.http.HttpRequest(httprequest)
+
+    def test_replica_dsns(self):
+        with patch.dict(openerp.tools.config.options, {'db_replicas': 'replica1:5433, replica2', 'db_port': 5432}):
+            uris = openerp.sql_db.replica_dsns('foo')
+        self.assertEqual(len(uris), 2)
+        self.assertTrue(uris[0].startswith('host=replica1 port=5433 '))
+        self.assertTrue(uris[1].startswith('host=replica2 port=5432 '))
+        self.assertTrue(all(uri.endswith('dbname=foo') for uri in uris))
+
+    def test_replica_check(self):
+        # the replication status functions exist on the server; the database
+        # itself is not in recovery, hence never lagging
+        db_name = common.get_db_name()
+        uri = openerp.sql_db.dsn(db_name)[1]
+        with patch.dict(openerp.sql_db._replica_status, clear=True):
+            self.assertTrue(openerp.sql_db._replica_available(db_name, uri))
+
+    def test_no_replica(self):
+        # without replica, read-only cursors are opened on the database
+        with patch.dict(openerp.tools.config.options, {'db_replicas': ''}):
+            self.assertIsNone(openerp.sql_db.db_connect_replica(common.get_db_name()))
+            with registry().cursor(readonly=True) as cr:
+                self.assertFalse(cr.replica)
+
+    @mute_logger('openerp.sql_db')
+    def test_readonly_cursor(self):
+        with self.replica():
+            with registry().cursor(readonly=True) as cr:
+                self.assertTrue(cr.replica)
+                cr.execute("SELECT 1")
+                with self.assertRaises(psycopg2.InternalError):
+                    cr.execute(WRITE_QUERY)
+            with registry().cursor() as cr:
+                self.assertFalse(cr.replica)
+
+    @mute_logger('openerp.sql_db', 'openerp.service.model')
+    def test_execute_retry(self):
+        # a read-only method that writes is executed again on the database
+        replicas = []
+        def execute_cr(cr, uid, obj, method, *args, **kw):
+            replicas.append(cr.replica)
+            cr.execute(WRITE_QUERY)
+            return True
+        with self.replica(), patch('openerp.service.model.execute_cr', execute_cr):
+            res = openerp.service.model.execute(common.get_db_name(), ADMIN_USER_ID, 'res.users', 'search', [])
+        self.assertTrue(res)
+        self.assertEqual(replicas, [True, False])
+
+    def _test_request(self, method, type='http'):
+        replicas = []
+        request = self.http_request(method, type)
+        def endpoint():
+            replicas.append(request.cr.replica)
+            request.cr.execute(WRITE_QUERY)
+            # the environment is bound to the cursor of the request
+            self.assertIs(request.env.cr, request.cr)
+            return 'ok'
+        endpoint.routing = {'type': type}
+        endpoint.first_arg_is_req = False
+        request.set_handler(endpoint, {}, 'none')
+        request.readonly = True
+        with self.replica():
+            with request:
+                return request._call_function(), replicas
+
+    @mute_logger('openerp.sql_db', 'openerp.http')
+    def test_request_retry(self):
+        # a read-only GET request that writes is handled again on the database
+        result, replicas = self._test_request('GET')
+        self.assertEqual(result, 'ok')
+        self.assertEqual(replicas, [True, False])
+
+    @mute_logger('openerp.sql_db', 'openerp.http')
+    def test_request_no_retry(self):
+        # other requests are not handled again, as they may have side effects
+        with self.assertRaises(psycopg2.InternalError):
+            self._test_request('POST')
+
+    @mute_logger('openerp.sql_db', 'openerp.http')
+    def test_json_request_retry(self):
+        # JSON-RPC calls are handled again, like the calls to execute()
+        result, replicas = self._test_request('POST', 'json')
+        self.assertEqual(result, 'ok')
+        self.assertEqual(replicas, [True, False])
@@ -520,6 +520,34 @@ class test_expression(common.TransactionCase):
         self.assertEqual(expression.distribute_not(source), expect,
             "distribute_not on long expression applied wrongly")
 
+    def test_50_compiled_domain(self):
+        Partner = self.registry('res.partner')
+        cr, uid = self.cr, self.uid
+        a = Partner.create(cr, uid, {'name': 'Compiled A', 'ref': 'CA', 'color': 3})
+        b = Partner.create(cr, uid, {'name': 'Compiled B', 'color': 5})
+
+        # domains with the same shape share the same translation
+        sql1 = expression.domain_to_sql(cr, uid, [('color', '=', 3)], Partner)
+        sql2 = expression.domain_to_sql(cr, uid, [('color', '=', 5)], Partner)
+        self.assertEqual(sql1[:2], sql2[:2])
+        self.assertEqual(sql1[2], [3])
+        self.assertEqual(sql2[2], [5])
+
+        # the translation depends on the values that change the query
+        sql1 = expression.domain_to_sql(cr, uid, [('ref', 'ilike', 'C')], Partner)
+        sql2 = expression.domain_to_sql(cr, uid, [('ref', 'ilike', '')], Partner)
+        self.assertNotEqual(sql1[1], sql2[1])
+        sql1 = expression.domain_to_sql(cr, uid, [('id', 'in', [a])], Partner)
+        sql2 = expression.domain_to_sql(cr, uid, [('id', 'in', [a, b])], Partner)
+        self.assertNotEqual(sql1[1], sql2[1])
+
+        # the results of repeated searches are consistent
+        for _ in range(2):
+            self.assertEqual(Partner.search(cr, uid, [('name', 'like', 'Compiled'), ('color', '=', 3)]), [a])
+            self.assertEqual(Partner.search(cr, uid, [('name', 'like', 'Compiled'), ('color', '=', 5)]), [b])
+            self.assertEqual(Partner.search(cr, uid, [('name', 'like', 'Compiled'), ('ref', '=', False)]), [b])
+            self.assertEqual(Partner.search(cr, uid, [('id', 'in', [a, b, False]), ('ref', '!=', False)]), [a])
+
     def test_translate_search(self):
         Country = self.registry('res.country')
         be = self.ref('base.be')
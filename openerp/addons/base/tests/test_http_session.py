@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+import tempfile
+import unittest
+
+from openerp.http import OpenERPSession, PostgreSQLSessionStore
+from openerp.tests import common
+
+
+class test_postgresql_session_store(unittest.TestCase):
+    """ Check the storage of http sessions in the database """
+
+    def setUp(self):
+        self.store = PostgreSQLSessionStore(common.get_db_name(), tempfile.gettempdir(),
+                                            session_class=OpenERPSession)
+        self.session = self.store.new()
+        self.addCleanup(self.store.delete, self.session)
+
+    def test_save_get(self):
+        self.session['foo'] = 'bar'
+        self.store.save(self.session)
+        self.assertEqual(self.store.get(self.session.sid)['foo'], 'bar')
+        self.assertIn(self.session.sid, self.store.list())
+
+        # a session modified by another server is reloaded from the table
+        other_store = PostgreSQLSessionStore(common.get_db_name(), tempfile.gettempdir(),
+                                             session_class=OpenERPSession)
+        session = other_store.get(self.session.sid)
+        session['foo'] = 'baz'
+        other_store.save(session)
+        self.assertEqual(self.store.get(self.session.sid)['foo'], 'baz')
+
+    def test_delete_gc(self):
+        self.session['foo'] = 'bar'
+        self.store.save(self.session)
+        self.store.delete(self.session)
+        self.assertNotIn('foo', self.store.get(self.session.sid))
+
+        self.store.save(self.session)
+        with self.store.cursor() as cr:
+            cr.execute("UPDATE http_session SET expiry = expiry - interval '1 year' WHERE sid=%s",
+                       (self.session.sid,))
+        self.store.gc()
+        self.assertNotIn(self.session.sid, self.store.list())
@@ -90,3 +90,18 @@ class test_ir_attachment(openerp.tests.common.TransactionCase):
 
         new_a2_fn = os.path.join(self.filestore, new_a2_store_fname)
         self.assertTrue(os.path.isfile(new_a2_fn))
+
+    def test_06_resized_image_cache(self):
+        registry, cr, uid = self.registry, self.cr, self.uid
+
+        checksum = hashlib.sha1(self.blob1).hexdigest()
+        self.assertIsNone(self.ira._resized_image_get(cr, uid, checksum, (64, 64)))
+
+        self.ira._resized_image_set(cr, uid, checksum, (64, 64), 'resized1')
+        self.assertEqual(self.ira._resized_image_get(cr, uid, checksum, (64, 64)), 'resized1')
+        self.assertIsNone(self.ira._resized_image_get(cr, uid, checksum, (128, 0)))
+
+        # an empty cache budget evicts every resized image
+        registry('ir.config_parameter').set_param(cr, uid, 'ir_attachment.resized_image_cache_size', '0')
+        self.ira._gc_resized_images(cr, uid)
+        self.assertIsNone(self.ira._resized_image_get(cr, uid, checksum, (64, 64)))
@@ -6,6 +6,7 @@
 
 import unittest
 
+from openerp.addons.base.ir.ir_mail_server import SMTPConnectionPool
 from openerp.tools import html_sanitize, html_email_clean, append_content_to_html, plaintext2html, email_split
 import test_mail_examples
 
@@ -388,5 +389,38 @@ class TestEmailTools(unittest.TestCase):
         for text, expected in cases:
             self.assertEqual(email_split(text), expected, 'email_split is broken')
 
+
+class FakeSMTP(object):
+    def __init__(self):
+        self.alive = True
+
+    def noop(self):
+        return (250, 'OK') if self.alive else (421, 'closing')
+
+    def quit(self):
+        self.alive = False
+
+class TestSMTPConnectionPool(unittest.TestCase):
+    """ Test the reuse of SMTP connections """
+
+    def test_reuse(self):
+        pool = SMTPConnectionPool(size=1)
+        key = ('localhost', 25, None, None, False, False)
+
+        smtp = pool.borrow(key, FakeSMTP)
+        pool.release(key, smtp)
+        self.assertIs(pool.borrow(key, FakeSMTP), smtp, 'idle connection should be reused')
+
+        # the pool only keeps 'size' idle connections per server
+        other = pool.borrow(key, FakeSMTP)
+        self.assertIsNot(other, smtp)
+        pool.release(key, smtp)
+        pool.release(key, other)
+        self.assertFalse(other.alive, 'extra connection should be closed')
+
+        # dead connections are replaced
+        smtp.alive = False
+        self.assertIsNot(pool.borrow(key, FakeSMTP), smtp)
+
 if __name__ == '__main__':
     unittest.main()
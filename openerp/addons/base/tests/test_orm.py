@@ -182,6 +182,33 @@ class TestORM(common.TransactionCase):
         group_user.write({'users': [(3, user.id)]})
         self.assertTrue(user.share)
 
+    def test_create_batch(self):
+        Category = self.env['res.partner.category']
+        parent = Category.create({'name': 'Parent'})
+        categories = Category.create([
+            {'name': 'A', 'parent_id': parent.id},
+            {'name': 'B', 'parent_id': parent.id},
+            {'name': 'C'},
+        ])
+        self.assertEqual(categories.mapped('name'), ['A', 'B', 'C'])
+        self.assertEqual(parent.child_ids, categories[:2])
+
+        # parent_left/parent_right are maintained for the whole batch
+        for category in categories[:2]:
+            self.assertTrue(parent.parent_left < category.parent_left < category.parent_right < parent.parent_right)
+        self.assertEqual(Category.search([('id', 'child_of', parent.id)]), parent + categories[:2])
+
+        # the old API returns a list of ids
+        ids = self.registry('res.partner.category').create(self.cr, self.uid, [{'name': 'D'}, {'name': 'E'}])
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(Category.browse(ids).mapped('name'), ['D', 'E'])
+
+    def test_export_data_chunks(self):
+        partners = self.env['res.partner'].search([])
+        fields = ['name', 'parent_id/id']
+        chunks = list(partners._export_data_chunks(fields))
+        self.assertEqual(sum(chunks, []), partners.export_data(fields)['datas'])
+
 
 class TestInherits(common.TransactionCase):
     """ test the behavior of the orm for models that use _inherits;
@@ -34,3 +34,62 @@ class TestOrmcache(common.TransactionCase):
         self.assertEqual(counter.hit, hit + 2)
         self.assertEqual(counter.miss, miss + 1)
         self.assertIn(key, cache)
+
+    def test_ormcache_partitions(self):
+        """ Test that clearing a cache partition leaves the others intact. """
+        IMD = self.env['ir.model.data']
+        Rule = self.env['ir.rule']
+        Access = self.env['ir.model.access']
+        XMLID = 'base.group_no_one'
+
+        # populate the cache of ir.model.data.xmlid_lookup
+        cache, key, counter = get_cache_key_counter(IMD.xmlid_lookup, self.cr, self.uid, XMLID)
+        self.env.ref(XMLID)
+        self.assertIn(key, cache)
+
+        # a change on an unrelated model does not clear the partition
+        Rule.clear_caches()
+        self.assertIn(key, cache)
+        Access.check.clear_cache(Access)
+        self.assertIn(key, cache)
+
+        # a change on the model itself does
+        IMD.clear_caches()
+        self.assertNotIn(key, cache)
+
+    def test_ormcache_depends(self):
+        """ Test that a change on a dependency clears the cache partition. """
+        Access = self.registry('ir.model.access')
+        Rule = self.env['ir.rule']
+        demo = self.env.ref('base.user_demo')
+
+        cache, key, counter = get_cache_key_counter(Access.check, self.cr, demo.id, 'res.partner', 'read', False)
+        Access.check(self.cr, demo.id, 'res.partner', 'read', False)
+        self.assertIn(key, cache)
+
+        # ir.model.access.check() does not depend on ir.rule
+        Rule.clear_caches()
+        self.assertIn(key, cache)
+
+        # ir.model.access.check() depends on res.groups
+        self.env['res.groups'].clear_caches()
+        self.assertNotIn(key, cache)
+
+    def test_ormcache_replica(self):
+        """ Test that the values computed on a replica are not cached. """
+        IMD = self.env['ir.model.data']
+        XMLID = 'base.group_no_one'
+
+        cache, key, counter = get_cache_key_counter(IMD.xmlid_lookup, self.cr, self.uid, XMLID)
+        IMD.xmlid_lookup.clear_cache(IMD)
+
+        # the replica may be stale, its value is not stored
+        self.cr.replica = True
+        try:
+            self.env.ref(XMLID)
+        finally:
+            del self.cr.replica
+        self.assertNotIn(key, cache)
+
+        self.env.ref(XMLID)
+        self.assertIn(key, cache)
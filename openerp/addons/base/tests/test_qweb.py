@@ -11,6 +11,7 @@ from openerp.addons.base.ir.ir_qweb import QWebContext, FileSystemLoader
 import openerp.modules
 
 from openerp.tests import common
+from openerp.tools import get_cache_key_counter
 from openerp.addons.base.ir import ir_qweb
 
 class TestQWebTField(common.TransactionCase):
@@ -81,6 +82,27 @@ class TestQWebTField(common.TransactionCase):
                 'company': None
             }))
 
+class TestQWebCompile(common.TransactionCase):
+    def test_compiled_template(self):
+        """ A template is compiled once, then rendered with different values """
+        arch = ('<?xml version="1.0" encoding="utf-8"?><templates>'
+                '<t t-name="test"><p t-att-class="cls" id="p"><t t-esc="value"/></p></t>'
+                '</templates>')
+        qweb = self.registry('ir.qweb')
+        loader = lambda name: arch
+
+        result = qweb.render(self.cr, self.uid, 'test', {'cls': 'a', 'value': 1}, loader=loader)
+        self.assertEqual(result, '<p class="a" id="p">1</p>')
+
+        cache, key, counter = get_cache_key_counter(qweb._compile_template, self.cr, self.uid, arch, 'test')
+        self.assertIn(key, cache)
+        hit, miss = counter.hit, counter.miss
+
+        result = qweb.render(self.cr, self.uid, 'test', {'cls': 'b', 'value': 2}, loader=loader)
+        self.assertEqual(result, '<p class="b" id="p">2</p>')
+        self.assertEqual(counter.hit, hit + 1)
+        self.assertEqual(counter.miss, miss)
+
 class TestQWeb(common.TransactionCase):
     matcher = re.compile('^qweb-test-(.*)\.xml$')
 
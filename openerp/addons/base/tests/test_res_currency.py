@@ -0,0 +1,53 @@
+import openerp.tests.common as common
+
+
+class test_res_currency(common.TransactionCase):
+
+    def setUp(self):
+        super(test_res_currency, self).setUp()
+        self.company = self.env.user.company_id
+        self.currency = self.env['res.currency'].create({'name': 'XTS', 'rounding': 0.01})
+        self.other_currency = self.env['res.currency'].create({'name': 'XTT', 'rounding': 0.01})
+        for name, rate, company in [('2015-01-01 00:00:00', 2.0, False),
+                                    ('2015-03-01 00:00:00', 4.0, False),
+                                    ('2015-02-01 00:00:00', 3.0, self.company.id)]:
+            self.env['res.currency.rate'].create({
+                'name': name, 'rate': rate, 'currency_id': self.currency.id, 'company_id': company,
+            })
+
+    def rate(self, date, company=None):
+        company = company or self.company
+        self.currency.invalidate_cache(['rate'])
+        return self.currency.with_context(date=date, company_id=company.id).rate
+
+    def test_rate(self):
+        other_company = self.env['res.company'].create({'name': 'Company XTS', 'currency_id': self.other_currency.id})
+
+        self.assertEqual(self.rate('2014-12-31'), 1)
+        self.assertEqual(self.rate('2015-01-01'), 2.0)
+        self.assertEqual(self.rate('2015-01-31 23:59:59'), 2.0)
+        # the rates of the company take precedence over the shared ones
+        self.assertEqual(self.rate('2015-02-01'), 3.0)
+        self.assertEqual(self.rate('2015-04-01'), 3.0)
+        self.assertEqual(self.rate('2015-04-01', other_company), 4.0)
+
+        # the rates are reloaded when they change
+        self.env['res.currency.rate'].create({
+            'name': '2015-04-01 00:00:00', 'rate': 5.0, 'currency_id': self.currency.id, 'company_id': self.company.id,
+        })
+        self.assertEqual(self.rate('2015-04-01'), 5.0)
+        self.currency.rate_ids.filtered(lambda rate: rate.rate == 5.0).write({'rate': 6.0})
+        self.assertEqual(self.rate('2015-04-01'), 6.0)
+        self.currency.rate_ids.filtered(lambda rate: rate.company_id).unlink()
+        self.assertEqual(self.rate('2015-04-01'), 4.0)
+
+    def test_compute_many(self):
+        currency = self.currency.with_context(company_id=self.company.id)
+        amounts = [(10.0, '2014-06-01'), (10.0, '2015-01-15'), (10.0, '2015-02-15'), (1.0, '2015-02-15')]
+        self.assertEqual(currency.compute_many(amounts, self.other_currency), [10.0, 5.0, 3.33, 0.33])
+        self.assertEqual(currency.compute_many(amounts, currency), [10.0, 10.0, 10.0, 1.0])
+        for amount, date in amounts:
+            self.assertEqual(
+                currency.compute_many([(amount, date)], self.other_currency, round=False),
+                [currency.with_context(date=date).compute(amount, self.other_currency, round=False)],
+            )
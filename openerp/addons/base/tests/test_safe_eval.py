@@ -0,0 +1,27 @@
+import unittest
+
+from openerp.tools import safe_eval as safe_eval_module
+from openerp.tools.safe_eval import safe_eval
+
+
+class test_safe_eval(unittest.TestCase):
+    def test_code_cache(self):
+        stat = safe_eval_module._code_cache_stat
+        expr = "a + b * 2  # test_code_cache"
+        hit, miss = stat.hit, stat.miss
+        self.assertEqual(safe_eval(expr, {'a': 1, 'b': 2}), 5)
+        self.assertEqual((stat.hit, stat.miss), (hit, miss + 1))
+        self.assertEqual(safe_eval(expr, {'a': 3, 'b': 4}), 11)
+        self.assertEqual((stat.hit, stat.miss), (hit + 1, miss + 1))
+
+        # the same expression in another mode is checked again
+        safe_eval(expr, {'a': 1, 'b': 2}, mode="exec")
+        self.assertEqual((stat.hit, stat.miss), (hit + 1, miss + 2))
+
+    def test_forbidden_code(self):
+        # invalid expressions are rejected at every call
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                safe_eval("open('/etc/passwd')")
+            with self.assertRaises(NameError):
+                safe_eval("__import__('os')")
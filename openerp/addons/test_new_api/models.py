@@ -199,6 +199,7 @@ class MixedModel(models.Model):
     _name = 'test_new_api.mixed'
 
     number = fields.Float(digits=(10, 2), default=3.14)
+    code = fields.Char(default=lambda self: self.env['ir.sequence'].next_by_code('test_new_api.mixed'))
     date = fields.Date()
     now = fields.Datetime(compute='_compute_now')
     lang = fields.Selection(string='Language', selection='_get_lang')
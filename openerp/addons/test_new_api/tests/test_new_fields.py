@@ -130,6 +130,54 @@ class TestNewFields(common.TransactionCase):
         })
         check_stored(discussion3)
 
+    def test_11_stored_batch(self):
+        """ test stored fields recomputed with different values in batch """
+        user_root = self.env.ref('base.user_root')
+        user_demo = self.env.ref('base.user_demo')
+        discussion = self.env['test_new_api.discussion'].create({
+            'name': 'Stuff',
+            'participants': [(4, user_root.id), (4, user_demo.id)],
+            'messages': [
+                (0, 0, {'author': user_root.id, 'body': 'one'}),
+                (0, 0, {'author': user_demo.id, 'body': 'two'}),
+                (0, 0, {'author': user_root.id, 'body': 'three'}),
+            ],
+        })
+        discussion.name = 'Other stuff'
+
+        # check the values written in database
+        self.cr.execute("SELECT id, name FROM test_new_api_message WHERE id IN %s",
+                        [tuple(discussion.messages.ids)])
+        names = dict(self.cr.fetchall())
+        for message in discussion.messages:
+            self.assertEqual(names[message.id], "[Other stuff] %s" % message.author.name)
+
+    def test_11_stored_batch_unlink(self):
+        """ test stored fields recomputed in batch after some records are deleted """
+        user_root = self.env.ref('base.user_root')
+        user_demo = self.env.ref('base.user_demo')
+        discussion = self.env['test_new_api.discussion'].sudo(user_demo).create({
+            'name': 'Stuff',
+            'participants': [(4, user_root.id), (4, user_demo.id)],
+            'messages': [
+                (0, 0, {'author': user_root.id, 'body': 'one'}),
+                (0, 0, {'author': user_demo.id, 'body': 'two'}),
+                (0, 0, {'author': user_root.id, 'body': 'three'}),
+            ],
+        })
+        message = discussion.messages[0]
+        with discussion.env.norecompute():
+            discussion.name = 'Other stuff'
+            message.unlink()
+        discussion.recompute()
+
+        self.cr.execute("SELECT id, name FROM test_new_api_message WHERE id IN %s",
+                        [tuple(discussion.messages.ids)])
+        names = dict(self.cr.fetchall())
+        self.assertEqual(len(names), 2)
+        for message in discussion.messages:
+            self.assertEqual(names[message.id], "[Other stuff] %s" % message.author.name)
+
     def test_12_recursive(self):
         """ test recursively dependent fields """
         Category = self.env['test_new_api.category']
@@ -428,6 +476,21 @@ class TestNewFields(common.TransactionCase):
         defaults = self.env['test_new_api.mixed'].default_get(['number'])
         self.assertEqual(defaults, {'number': 3.14})
 
+    def test_42_defaults_batch(self):
+        """ test default values when creating several records at once. """
+        self.env['ir.sequence'].create({'name': 'Mixed', 'code': 'test_new_api.mixed', 'prefix': 'MIX'})
+        records = self.env['test_new_api.mixed'].create([{}, {}, {'number': 1.0}])
+
+        # a callable default is evaluated for every record
+        codes = records.mapped('code')
+        self.assertTrue(all(codes))
+        self.assertEqual(len(set(codes)), 3)
+        self.assertEqual(records.mapped('number'), [3.14, 3.14, 1.0])
+
+        # unless it is given by the context
+        records = self.env['test_new_api.mixed'].with_context(default_code='X').create([{}, {}])
+        self.assertEqual(records.mapped('code'), ['X', 'X'])
+
 
 class TestMagicFields(common.TransactionCase):
 
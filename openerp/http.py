@@ -5,6 +5,7 @@
 import ast
 import collections
 import contextlib
+import cPickle as pickle
 import datetime
 import functools
 import hashlib
@@ -27,6 +28,7 @@ from zlib import adler32
 import babel.core
 import passlib.utils
 import psycopg2
+import psycopg2.errorcodes
 import json
 import werkzeug.contrib.sessions
 import werkzeug.datastructures
@@ -46,6 +48,7 @@ import openerp
 from openerp.service.server import memory_info
 from openerp.service import security, model as service_model
 from openerp.tools.func import lazy_property
+from openerp.tools.lru import LRU
 from openerp.tools import ustr, consteq
 
 _logger = logging.getLogger(__name__)
@@ -176,6 +179,11 @@ class WebRequest(object):
         :class:`~collections.Mapping` of request parameters, not generally
         useful as they're provided directly to the handler method as keyword
         arguments
+
+    .. attribute:: readonly
+
+        whether the cursor of the request may be opened on a replica of the
+        database, given by the ``readonly`` parameter of the route
     """
     def __init__(self, httprequest):
         self.httprequest = httprequest
@@ -186,6 +194,7 @@ class WebRequest(object):
         self.endpoint = None
         self.endpoint_arguments = None
         self.auth_method = None
+        self.readonly = False
         self._cr = None
 
         # prevents transaction commit, use when you catch an exception during handling
@@ -244,7 +253,10 @@ class WebRequest(object):
         if not self.db:
             return RuntimeError('request not bound to a database')
         if not self._cr:
-            self._cr = self.registry.cursor()
+            readonly = self.readonly
+            if callable(readonly):
+                readonly = readonly()
+            self._cr = self.registry.cursor(readonly=readonly)
         return self._cr
 
     def __enter__(self):
@@ -306,10 +318,28 @@ class WebRequest(object):
             if self._cr:
                 self._cr.rollback()
                 self.env.clear()
-            result = self.endpoint(*a, **kw)
-            if isinstance(result, Response) and result.is_qweb:
-                # Early rendering of lazy responses to benefit from @service_model.check protection
-                result.flatten()
+            try:
+                result = self.endpoint(*a, **kw)
+                if isinstance(result, Response) and result.is_qweb:
+                    # Early rendering of lazy responses to benefit from @service_model.check protection
+                    result.flatten()
+            except psycopg2.InternalError, e:
+                if not (self._cr and self._cr.replica and e.pgcode == psycopg2.errorcodes.READ_ONLY_SQL_TRANSACTION):
+                    raise
+                # only safe requests and JSON-RPC calls are handled again, as
+                # the other side effects of the endpoint would be repeated
+                if self.httprequest.method not in ('GET', 'HEAD') and self._request_type != 'json':
+                    _logger.warning('%s cannot be handled on a replica, it should not be read-only', self.httprequest.path)
+                    raise
+                # the request writes after all, handle it on the primary database
+                _logger.info('%s cannot be handled on a replica, retrying on the primary database', self.httprequest.path)
+                self._cr.close()
+                self._cr = None
+                self.readonly = False
+                # bind the environment and the records of the request to the new cursor
+                self.__dict__.pop('env', None)
+                self.registry['ir.http']._rebind_request()
+                return checked_call(___dbname, *a, **kw)
             return result
 
         if self.db:
@@ -444,6 +474,13 @@ def route(route=None, **kw):
     :param methods: A sequence of http methods this route applies to. If not
                     specified, all methods are allowed.
     :param cors: The Access-Control-Allow-Origin cors directive value.
+    :param readonly: Whether the request may be handled on a replica of the
+                     database, when replicas are configured. Either a boolean,
+                     or a function returning a boolean, called when the cursor
+                     of the request is opened. A request that modifies the
+                     database anyway is handled again on the primary
+                     database if it is a GET or HEAD request, or a JSON-RPC
+                     call, and fails otherwise.
     :param bool csrf: Whether CSRF protection should be enabled for the route.
 
                       Defaults to ``True``.
@@ -1291,17 +1328,123 @@ class OpenERPSession(werkzeug.contrib.sessions.Session):
                     pass
 
 
+# we keep session one week
+SESSION_LIFETIME = 60*60*24*7
+
 def session_gc(session_store):
     if random.random() < 0.001:
-        # we keep session one week
-        last_week = time.time() - 60*60*24*7
-        for fname in os.listdir(session_store.path):
-            path = os.path.join(session_store.path, fname)
-            try:
-                if os.path.getmtime(path) < last_week:
-                    os.unlink(path)
-            except OSError:
-                pass
+        session_store.gc()
+
+def _gc_files(path):
+    """ Remove the files in ``path`` older than the lifetime of sessions. """
+    expired = time.time() - SESSION_LIFETIME
+    for fname in os.listdir(path):
+        fpath = os.path.join(path, fname)
+        try:
+            if os.path.getmtime(fpath) < expired:
+                os.unlink(fpath)
+        except OSError:
+            pass
+
+class FilesystemSessionStore(werkzeug.contrib.sessions.FilesystemSessionStore):
+    """ Store the sessions in one file per session in the directory ``path``. """
+    def gc(self):
+        _gc_files(self.path)
+
+class PostgreSQLSessionStore(werkzeug.contrib.sessions.SessionStore):
+    """ Store the sessions in the table ``http_session`` of the database
+    ``db_name``, which may be shared by several servers.
+
+    The serialized sessions are kept in an LRU cache of ``cache_size``
+    entries, together with their version in the table. A cached session is
+    only loaded from the table when its version has changed. Expired sessions
+    are deleted by batches of ``gc_batch_size``.
+
+    The files of the request data saved in sessions (see
+    :meth:`OpenERPSession.save_request_data`) are stored in the directory
+    ``path``.
+    """
+    def __init__(self, db_name, path, session_class=None, cache_size=1024, gc_batch_size=1000):
+        super(PostgreSQLSessionStore, self).__init__(session_class)
+        self.db_name = db_name
+        self.path = path
+        self.cache = LRU(cache_size)        # {sid: (version, data)}
+        self.gc_batch_size = gc_batch_size
+        self._table_ready = False
+
+    def cursor(self):
+        cr = openerp.sql_db.db_connect(self.db_name).cursor()
+        if not self._table_ready:
+            cr.execute("SELECT 1 FROM information_schema.tables WHERE table_name='http_session'")
+            if not cr.fetchone():
+                cr.execute("""CREATE TABLE http_session (
+                                  sid varchar PRIMARY KEY,
+                                  data bytea NOT NULL,
+                                  version integer NOT NULL,
+                                  expiry timestamp NOT NULL)""")
+                cr.execute("CREATE INDEX http_session_expiry_index ON http_session (expiry)")
+                cr.commit()
+            self._table_ready = True
+        return cr
+
+    def save(self, session):
+        data = pickle.dumps(dict(session), pickle.HIGHEST_PROTOCOL)
+        expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=SESSION_LIFETIME)
+        with self.cursor() as cr:
+            cr.execute("""UPDATE http_session SET data=%s, version=version+1, expiry=%s
+                          WHERE sid=%s RETURNING version""",
+                       (psycopg2.Binary(data), expiry, session.sid))
+            row = cr.fetchone()
+            if row is None:
+                cr.execute("""INSERT INTO http_session (sid, data, version, expiry)
+                              VALUES (%s, %s, 1, %s) RETURNING version""",
+                           (session.sid, psycopg2.Binary(data), expiry))
+                row = cr.fetchone()
+        self.cache[session.sid] = (row[0], data)
+
+    def delete(self, session):
+        with self.cursor() as cr:
+            cr.execute("DELETE FROM http_session WHERE sid=%s", (session.sid,))
+        try:
+            self.cache.pop(session.sid)
+        except KeyError:
+            pass
+
+    def get(self, sid):
+        if not self.is_valid_key(sid):
+            return self.new()
+        cached = self.cache.get(sid)
+        data = None
+        with self.cursor() as cr:
+            if cached is not None:
+                cr.execute("SELECT version FROM http_session WHERE sid=%s", (sid,))
+                row = cr.fetchone()
+                if row and row[0] == cached[0]:
+                    data = cached[1]
+            if data is None:
+                cr.execute("SELECT version, data FROM http_session WHERE sid=%s", (sid,))
+                row = cr.fetchone()
+                if row is None:
+                    return self.session_class({}, sid, False)
+                data = str(row[1])
+                self.cache[sid] = (row[0], data)
+        try:
+            data = pickle.loads(data)
+        except Exception:
+            data = {}
+        return self.session_class(data, sid, False)
+
+    def list(self):
+        with self.cursor() as cr:
+            cr.execute("SELECT sid FROM http_session")
+            return [row[0] for row in cr.fetchall()]
+
+    def gc(self):
+        with self.cursor() as cr:
+            cr.execute("""DELETE FROM http_session WHERE sid IN (
+                              SELECT sid FROM http_session WHERE expiry < %s LIMIT %s)""",
+                       (datetime.datetime.utcnow(), self.gc_batch_size))
+        _gc_files(self.path)
 
 #----------------------------------------------------------
 # WSGI Layer
@@ -1405,8 +1548,17 @@ class Root(object):
     def session_store(self):
         # Setup http sessions
         path = openerp.tools.config.session_dir
+        if openerp.tools.config.get('session_store') == 'postgresql':
+            db_name = openerp.tools.config.get('session_db')
+            if db_name:
+                _logger.debug('HTTP sessions stored in database: %s', db_name)
+                return PostgreSQLSessionStore(
+                    db_name, path, session_class=OpenERPSession,
+                    cache_size=int(openerp.tools.config.get('session_cache_size') or 1024))
+            _logger.warning("No session_db configured for the postgresql session store, "
+                            "storing HTTP sessions in files")
         _logger.debug('HTTP sessions stored in: %s', path)
-        return werkzeug.contrib.sessions.FilesystemSessionStore(path, session_class=OpenERPSession)
+        return FilesystemSessionStore(path, session_class=OpenERPSession)
 
     @lazy_property
     def nodb_routing_map(self):
@@ -31,7 +31,8 @@ import pickle
 import pytz
 import re
 import time
-from collections import defaultdict, MutableMapping
+from collections import defaultdict, MutableMapping, OrderedDict
+from cStringIO import StringIO
 from inspect import getmembers, currentframe
 from operator import itemgetter
 
@@ -950,6 +951,25 @@ class BaseModel(object):
             self = self.with_context(export_raw_data=True)
         return {'datas': self.__export_rows(fields_to_export)}
 
+    @api.multi
+    def _export_data_chunks(self, fields_to_export, raw_data=False):
+        """ Export fields for selected objects, like :meth:`~.export_data`,
+            but generate the rows by chunks of ``PREFETCH_MAX`` records. The
+            record cache is invalidated between chunks, so that the memory
+            used by a large export remains bounded.
+
+            :param fields_to_export: list of fields
+            :param raw_data: True to return value in native Python type
+            :return: an iterator over lists of rows
+        """
+        fields_to_export = map(fix_import_export_id_paths, fields_to_export)
+        if raw_data:
+            self = self.with_context(export_raw_data=True)
+        for sub_ids in tools.misc.split_every(PREFETCH_MAX, self.ids):
+            self.invalidate_cache()
+            yield self.browse(sub_ids).__export_rows(fields_to_export)
+        self.invalidate_cache()
+
     def import_data(self, cr, uid, fields, datas, mode='init', current_module='', noupdate=False, context=None, filename=None):
         """
         .. deprecated:: 7.0
@@ -1795,15 +1815,27 @@ class BaseModel(object):
             values = defaults
         return values
 
+    @api.model
+    def _default_is_callable(self, name):
+        """ Return whether the default value of field ``name`` is computed by a
+        function, and may thus differ from one record to another. """
+        if 'default_' + name in self._context:
+            return False
+        model, field = self, self._fields.get(name)
+        if field is not None and field.inherited:
+            field = field.related_field
+            model = self.env[field.model_name]
+        return field is not None and callable(model._defaults.get(field.name))
+
     def clear_caches(self):
         """ Clear the caches
 
         This clears the caches associated to methods decorated with
-        ``tools.ormcache`` or ``tools.ormcache_multi``.
+        ``tools.ormcache`` or ``tools.ormcache_multi`` on this model, and the
+        caches of other models that depend on it.
         """
         try:
-            self.pool.cache.clear()
-            self.pool._any_cache_cleared = True
+            self.pool.clear_cache_partitions(self._name)
         except AttributeError:
             pass
 
@@ -4102,7 +4134,7 @@ class BaseModel(object):
     # TODO: Should set perm to user.xxx
     #
     @api.model
-    @api.returns('self', lambda value: value.id)
+    @api.returns('self', lambda self, value, vals, *args, **kwargs: value.ids if isinstance(vals, list) else value.id)
     def create(self, vals):
         """ create(vals) -> record
 
@@ -4111,13 +4143,15 @@ class BaseModel(object):
         The new record is initialized using the values from ``vals`` and
         if necessary those from :meth:`~.default_get`.
 
-        :param dict vals:
+        :param vals:
             values for the model's fields, as a dictionary::
 
                 {'field_name': field_value, ...}
 
-            see :meth:`~.write` for details
-        :return: new record created
+            see :meth:`~.write` for details; a list of such dictionaries
+            creates several records at once, using as few INSERT queries as
+            possible
+        :return: new record created (or records, when given a list)
         :raise AccessError: * if user has no create rights on the requested object
                             * if user tries to bypass access rules for create on the requested object
         :raise ValidateError: if user tries to enter invalid value for a field that is not in selection
@@ -4125,44 +4159,237 @@ class BaseModel(object):
         """
         self.check_access_rights('create')
 
-        # add missing defaults, and drop fields that may not be set by user
-        vals = self._add_missing_default_values(vals)
-        for field in itertools.chain(MAGIC_COLUMNS, ('parent_left', 'parent_right')):
-            vals.pop(field, None)
+        vals_list = vals if isinstance(vals, list) else [vals]
 
-        # split up fields into old-style and pure new-style ones
-        old_vals, new_vals, unknown = {}, {}, []
-        for key, val in vals.iteritems():
-            field = self._fields.get(key)
-            if field:
-                if field.column or field.inherited:
-                    old_vals[key] = val
-                if field.inverse and not field.inherited:
-                    new_vals[key] = val
+        # defaults only depend on the fields that are missing, compute them
+        # once per distinct set of given fields, unless some of them are
+        # computed by a function and may differ from one record to another
+        defaults = {}
+        old_vals_list, new_vals_list, unknown = [], [], set()
+        for values in vals_list:
+            # add missing defaults, and drop fields that may not be set by user
+            keys = frozenset(values)
+            if keys in defaults:
+                values = dict(defaults[keys], **values)
             else:
-                unknown.append(key)
+                values = self._add_missing_default_values(values)
+                if len(vals_list) > 1:
+                    missing = [name for name in values if name not in keys]
+                    if not any(self._default_is_callable(name) for name in missing):
+                        defaults[keys] = dict((name, values[name]) for name in missing)
+            for field in itertools.chain(MAGIC_COLUMNS, ('parent_left', 'parent_right')):
+                values.pop(field, None)
+
+            # split up fields into old-style and pure new-style ones
+            old_vals, new_vals = {}, {}
+            for key, val in values.iteritems():
+                field = self._fields.get(key)
+                if field:
+                    if field.column or field.inherited:
+                        old_vals[key] = val
+                    if field.inverse and not field.inherited:
+                        new_vals[key] = val
+                else:
+                    unknown.add(key)
+            old_vals_list.append(old_vals)
+            new_vals_list.append(new_vals)
 
         if unknown:
             _logger.warning("%s.create() includes unknown fields: %s", self._name, ', '.join(sorted(unknown)))
 
-        # create record with old-style fields
-        record = self.browse(self._create(old_vals))
+        # create records with old-style fields
+        records = self.browse(self._create_batch(old_vals_list))
 
         # put the values of pure new-style fields into cache, and inverse them
-        record._cache.update(record._convert_to_cache(new_vals))
-        for key in new_vals:
-            self._fields[key].determine_inverse(record)
+        for record, new_vals in itertools.izip(records, new_vals_list):
+            record._cache.update(record._convert_to_cache(new_vals))
+            for key in new_vals:
+                self._fields[key].determine_inverse(record)
 
-        return record
+        return records
 
     def _create(self, cr, user, vals, context=None):
         # low-level implementation of create()
+        return self._create_batch(cr, user, [vals], context=context)[0]
+
+    def _create_batch(self, cr, user, vals_list, context=None):
+        # low-level implementation of create() for several records; the
+        # records are inserted with one multi-row INSERT per distinct set of
+        # columns, and the post-processing is done once for all of them
         if not context:
             context = {}
 
         if self.is_transient():
             self._transient_vacuum(cr, user)
 
+        rows = [self._create_prepare(cr, user, vals, context) for vals in vals_list]
+
+        # group rows by columns, and insert each group in as few queries as possible
+        groups = OrderedDict()
+        for index, (vals, updates, upd_todo) in enumerate(rows):
+            groups.setdefault(tuple(u[:2] for u in updates), []).append(index)
+
+        ids = [None] * len(rows)
+        for columns, indexes in groups.iteritems():
+            group_rows = [rows[index] for index in indexes]
+            group_ids = None
+            if context.get('create_copy'):
+                group_ids = self._create_copy(cr, columns, group_rows)
+            if group_ids is None:
+                group_ids = self._create_insert(cr, columns, group_rows)
+            for index, id_new in itertools.izip(indexes, group_ids):
+                ids[index] = id_new
+
+        recs = self.browse(cr, user, ids, context)
+
+        if context.get('lang') and context['lang'] != 'en_US':
+            # add translations for context['lang']
+            for id_new, (vals, updates, upd_todo) in itertools.izip(ids, rows):
+                for field in vals:
+                    column = self._columns[field]
+                    if column._classic_write and column.translate and not callable(column.translate):
+                        self.pool['ir.translation']._set_ids(
+                            cr, user, self._name+','+field, 'model',
+                            context['lang'], [id_new], vals[field], vals[field],
+                        )
+
+        if self._parent_store and not context.get('defer_parent_store_computation'):
+            if self.pool._init:
+                self.pool._init_parent[self._name] = True
+            else:
+                # records with the same parent are put next to each other
+                siblings = defaultdict(list)
+                for id_new, (vals, updates, upd_todo) in itertools.izip(ids, rows):
+                    siblings[vals.get(self._parent_name, False)].append(id_new)
+                for parent, sibling_ids in siblings.iteritems():
+                    self._parent_store_insert(cr, parent, sibling_ids)
+                recs.invalidate_cache(['parent_left', 'parent_right'])
+
+        # invalidate and mark new-style fields to recompute; do this before
+        # setting other fields, because it can require the value of computed
+        # fields, e.g., a one2many checking constraints on records
+        recs.modified(self._fields)
+
+        # default element in context must be remove when call a one2many or many2many
+        rel_context = context.copy()
+        for c in context.items():
+            if c[0].startswith('default_'):
+                del rel_context[c[0]]
+
+        result = []
+        field_names = set(self._inherits.values())
+        upd_names = set()
+        for id_new, (vals, updates, upd_todo) in itertools.izip(ids, rows):
+            # call the 'set' method of fields which are not classic_write
+            upd_todo.sort(lambda x, y: self._columns[x].priority-self._columns[y].priority)
+            for field in upd_todo:
+                result += self._columns[field].set(cr, self, id_new, field, vals[field], user, rel_context) or []
+            field_names.update(vals)
+            upd_names.update(upd_todo)
+
+        # for recomputing new-style fields
+        recs.modified(upd_names)
+
+        # check Python constraints
+        recs._validate_fields(field_names)
+
+        result += self._store_get_values(cr, user, ids, list(field_names), context)
+        recs.env.recompute_old.extend(result)
+
+        if recs.env.recompute and context.get('recompute', True):
+            done = []
+            while recs.env.recompute_old:
+                sorted_recompute_old = sorted(recs.env.recompute_old)
+                recs.env.clear_recompute_old()
+                for __, model_name, ids2, fields2 in sorted_recompute_old:
+                    if not (model_name, ids2, fields2) in done:
+                        self.pool[model_name]._store_set_values(
+                            cr, user, ids2, fields2, context)
+                        done.append((model_name, ids2, fields2))
+
+            # recompute new-style fields
+            recs.recompute()
+
+        if self._log_create and recs.env.recompute and context.get('recompute', True):
+            for id_new, name in self.name_get(cr, user, ids, context=context):
+                message = self._description + " '" + name + "' " + _("created.")
+                self.log(cr, user, id_new, message, True, context=context)
+
+        self.check_access_rule(cr, user, ids, 'create', context=context)
+        self.create_workflow(cr, user, ids, context=context)
+        return ids
+
+    def _create_insert(self, cr, columns, rows):
+        """ Insert the prepared ``rows`` (see :meth:`_create_prepare`), which
+            all assign the same ``columns``, and return their ids.
+        """
+        ids = []
+        template = '(%s)' % ', '.join(column[1] for column in columns)
+        for sub_rows in cr.split_for_in_conditions(rows):
+            # the list of tuples used in this formatting corresponds to
+            # tuple(field_name, format, value)
+            # In some case, for example (id, create_date, write_date) we does not
+            # need to read the third value of the tuple, because the real value is
+            # encoded in the second value (the format).
+            params = [u[2] for row in sub_rows for u in row[1] if len(u) > 2]
+            cr.execute(
+                """INSERT INTO "%s" (%s) VALUES %s RETURNING id""" % (
+                    self._table,
+                    ', '.join('"%s"' % column[0] for column in columns),
+                    ', '.join([template] * len(sub_rows)),
+                ),
+                tuple(params)
+            )
+            # ids come from the sequence, in the order of the rows
+            ids.extend(id_new for id_new, in sorted(cr.fetchall()))
+        return ids
+
+    def _create_copy(self, cr, columns, rows):
+        """ Insert the prepared ``rows`` (see :meth:`_create_prepare`), which
+            all assign the same ``columns``, with PostgreSQL's ``COPY``, and
+            return their ids. Return ``None`` if some value cannot be written
+            in the text format of ``COPY``.
+        """
+        lines = []
+        for vals, updates, upd_todo in rows:
+            try:
+                lines.append([_copy_format(u[2]) if len(u) > 2 else None for u in updates])
+            except ValueError:
+                return None
+
+        # the ids are taken from the sequence beforehand, and SQL formulas
+        # (like the creation date) are evaluated once for all rows
+        cr.execute("SELECT nextval(%s) FROM generate_series(1, %s)", (self._sequence, len(rows)))
+        ids = sorted(id_new for id_new, in cr.fetchall())
+        formulas = {}
+        for index, (name, format) in enumerate(columns):
+            if name == 'id':
+                for line, id_new in itertools.izip(lines, ids):
+                    line[index] = str(id_new)
+            elif format != '%s':
+                if format not in formulas:
+                    cr.execute("SELECT %s" % format)
+                    formulas[format] = _copy_format(cr.fetchone()[0])
+                for line in lines:
+                    line[index] = formulas[format]
+
+        data = StringIO()
+        for line in lines:
+            data.write('\t'.join(line))
+            data.write('\n')
+        data.seek(0)
+        cr.copy_expert('COPY "%s" (%s) FROM STDIN' % (
+            self._table, ', '.join('"%s"' % column[0] for column in columns),
+        ), data)
+        return ids
+
+    def _create_prepare(self, cr, user, vals, context):
+        """ Prepare the creation of a record with the old-style values ``vals``:
+            create or update its parent records (``_inherits``), and return a
+            tuple ``(vals, updates, upd_todo)`` where ``updates`` is the list of
+            column assignments for the INSERT and ``upd_todo`` the list of fields
+            to set once the record exists.
+        """
         tocreate = {}
         for v in self._inherits:
             if self._inherits[v] not in vals:
@@ -4271,111 +4498,35 @@ class BaseModel(object):
             updates.append(('create_date', "(now() at time zone 'UTC')"))
             updates.append(('write_date', "(now() at time zone 'UTC')"))
 
-        # the list of tuples used in this formatting corresponds to
-        # tuple(field_name, format, value)
-        # In some case, for example (id, create_date, write_date) we does not
-        # need to read the third value of the tuple, because the real value is
-        # encoded in the second value (the format).
-        cr.execute(
-            """INSERT INTO "%s" (%s) VALUES(%s) RETURNING id""" % (
-                self._table,
-                ', '.join('"%s"' % u[0] for u in updates),
-                ', '.join(u[1] for u in updates)
-            ),
-            tuple([u[2] for u in updates if len(u) > 2])
-        )
-
-        id_new, = cr.fetchone()
-        recs = self.browse(cr, user, id_new, context)
-
-        if context.get('lang') and context['lang'] != 'en_US':
-            # add translations for context['lang']
-            for field in vals:
-                column = self._columns[field]
-                if column._classic_write and column.translate and not callable(column.translate):
-                    self.pool['ir.translation']._set_ids(
-                        cr, user, self._name+','+field, 'model',
-                        context['lang'], recs.ids, vals[field], vals[field],
-                    )
-
-        if self._parent_store and not context.get('defer_parent_store_computation'):
-            if self.pool._init:
-                self.pool._init_parent[self._name] = True
-            else:
-                parent = vals.get(self._parent_name, False)
-                if parent:
-                    cr.execute('select parent_right from '+self._table+' where '+self._parent_name+'=%s order by '+(self._parent_order or self._order), (parent,))
-                    pleft_old = None
-                    result_p = cr.fetchall()
-                    for (pleft,) in result_p:
-                        if not pleft:
-                            break
-                        pleft_old = pleft
-                    if not pleft_old:
-                        cr.execute('select parent_left from '+self._table+' where id=%s', (parent,))
-                        pleft_old = cr.fetchone()[0]
-                    pleft = pleft_old
-                else:
-                    cr.execute('select max(parent_right) from '+self._table)
-                    pleft = cr.fetchone()[0] or 0
-                cr.execute('update '+self._table+' set parent_left=parent_left+2 where parent_left>%s', (pleft,))
-                cr.execute('update '+self._table+' set parent_right=parent_right+2 where parent_right>%s', (pleft,))
-                cr.execute('update '+self._table+' set parent_left=%s,parent_right=%s where id=%s', (pleft+1, pleft+2, id_new))
-                recs.invalidate_cache(['parent_left', 'parent_right'])
-
-        # invalidate and mark new-style fields to recompute; do this before
-        # setting other fields, because it can require the value of computed
-        # fields, e.g., a one2many checking constraints on records
-        recs.modified(self._fields)
-
-        # call the 'set' method of fields which are not classic_write
-        upd_todo.sort(lambda x, y: self._columns[x].priority-self._columns[y].priority)
-
-        # default element in context must be remove when call a one2many or many2many
-        rel_context = context.copy()
-        for c in context.items():
-            if c[0].startswith('default_'):
-                del rel_context[c[0]]
-
-        result = []
-        for field in upd_todo:
-            result += self._columns[field].set(cr, self, id_new, field, vals[field], user, rel_context) or []
-
-        # for recomputing new-style fields
-        recs.modified(upd_todo)
-
-        # check Python constraints
-        recs._validate_fields(vals)
-
-        result += self._store_get_values(cr, user, [id_new],
-                list(set(vals.keys() + self._inherits.values())),
-                context)
-        recs.env.recompute_old.extend(result)
-
-        if recs.env.recompute and context.get('recompute', True):
-            done = []
-            while recs.env.recompute_old:
-                sorted_recompute_old = sorted(recs.env.recompute_old)
-                recs.env.clear_recompute_old()
-                for __, model_name, ids, fields2 in sorted_recompute_old:
-                    if not (model_name, ids, fields2) in done:
-                        self.pool[model_name]._store_set_values(
-                            cr, user, ids, fields2, context)
-                        done.append((model_name, ids, fields2))
-
-            # recompute new-style fields
-            recs.recompute()
-
-        if self._log_create and recs.env.recompute and context.get('recompute', True):
-            message = self._description + \
-                " '" + \
-                self.name_get(cr, user, [id_new], context=context)[0][1] + \
-                "' " + _("created.")
-            self.log(cr, user, id_new, message, True, context=context)
-
-        self.check_access_rule(cr, user, [id_new], 'create', context=context)
-        self.create_workflow(cr, user, [id_new], context=context)
-        return id_new
+        # sort columns, so that records with the same fields are inserted together
+        updates.sort(key=itemgetter(0))
+        return vals, updates, upd_todo
+
+    def _parent_store_insert(self, cr, parent, ids):
+        """ Insert the new records ``ids`` as the last children of ``parent``
+            in the tree of ``parent_left``/``parent_right``, making room for
+            all of them at once.
+        """
+        if parent:
+            cr.execute('select parent_right from '+self._table+' where '+self._parent_name+'=%s order by '+(self._parent_order or self._order), (parent,))
+            pleft_old = None
+            result_p = cr.fetchall()
+            for (pleft,) in result_p:
+                if not pleft:
+                    break
+                pleft_old = pleft
+            if not pleft_old:
+                cr.execute('select parent_left from '+self._table+' where id=%s', (parent,))
+                pleft_old = cr.fetchone()[0]
+            pleft = pleft_old
+        else:
+            cr.execute('select max(parent_right) from '+self._table)
+            pleft = cr.fetchone()[0] or 0
+        width = 2 * len(ids)
+        cr.execute('update '+self._table+' set parent_left=parent_left+%s where parent_left>%s', (width, pleft))
+        cr.execute('update '+self._table+' set parent_right=parent_right+%s where parent_right>%s', (width, pleft))
+        for index, id_new in enumerate(ids):
+            cr.execute('update '+self._table+' set parent_left=%s,parent_right=%s where id=%s', (pleft+2*index+1, pleft+2*index+2, id_new))
 
     def _store_get_values(self, cr, uid, ids, fields, context):
         """Returns an ordered list of fields.function to call due to
@@ -4545,9 +4696,7 @@ class BaseModel(object):
                 domain = [('active', '=', 1)]
 
         if domain:
-            e = expression.expression(cr, user, domain, self, context)
-            tables = e.get_tables()
-            where_clause, where_params = e.to_sql()
+            tables, where_clause, where_params = expression.domain_to_sql(cr, user, domain, self, context)
             where_clause = where_clause and [where_clause] or []
         else:
             where_clause, where_params, tables = [], [], ['"%s"' % self._table]
@@ -5845,17 +5994,123 @@ class BaseModel(object):
             fs = self.env[field.model_name]._field_computed[field]
             ns = [f.name for f in fs if f.store]
             # evaluate fields, and group record ids by update
+            existing = recs.exists()
+            existing._recompute_prefetch(fs)
             updates = defaultdict(set)
-            for rec in recs.exists():
+            for rec in existing:
                 vals = rec._convert_to_write({n: rec[n] for n in ns})
                 updates[frozendict(vals)].add(rec.id)
             # update records in batch when possible
             with recs.env.norecompute():
-                for vals, ids in updates.iteritems():
-                    recs.browse(ids)._write(dict(vals))
+                if len(updates) > 1 and recs._write_multi_allowed(ns):
+                    existing._write_multi(updates)
+                else:
+                    for vals, ids in updates.iteritems():
+                        existing.browse(ids)._write(dict(vals))
             # mark computed fields as done
             map(recs._recompute_done, fs)
 
+    @api.multi
+    def _recompute_prefetch(self, fields):
+        """ Fetch in cache the records on which ``fields`` depend for the
+            records ``self``, in order to prefetch them in batch rather than
+            record by record while computing ``fields``.
+        """
+        paths = set()
+        for field in fields:
+            for path in field.depends:
+                names = path.split('.')
+                paths.update('.'.join(names[:index]) for index in xrange(1, len(names)))
+        for path in sorted(paths):
+            model = self
+            for name in path.split('.'):
+                field = model._fields.get(name)
+                model = field and field.relational and self.env[field.comodel_name]
+                if not model:
+                    break
+            else:
+                try:
+                    self.mapped(path)
+                except (AccessError, MissingError):
+                    # the computation will tell whether those records matter
+                    pass
+
+    @api.model
+    def _write_multi_allowed(self, names):
+        """ Return whether the fields ``names`` can be written with
+            :meth:`_write_multi`, i.e., whether they are plain columns of the
+            model's table without side effects on other fields or models.
+        """
+        cr, uid, context = self.env.args
+        if self._parent_store and self._parent_name in names:
+            return False
+        if context.get('lang') and context['lang'] != 'en_US' and \
+                len(self.env['res.lang'].get_installed()) > 1:
+            return False
+        for name in names:
+            column = self._columns.get(name)
+            if column is None or not column._classic_write or hasattr(column, '_fnct_inv') \
+                    or column.translate or column.write:
+                return False
+        for trigger in self.pool._store_function.get(self._name, []):
+            if not trigger[3] or set(names).intersection(trigger[3]):
+                return False
+        return True
+
+    @api.multi
+    def _write_multi(self, updates):
+        """ Write different values on the records of ``self`` with a single
+            ``UPDATE ... FROM (VALUES ...)`` query per batch of records.
+
+            :param updates: a dictionary mapping frozen dictionaries of values
+                to write (as returned by :meth:`_convert_to_write`) to the ids
+                of the records to write them on
+        """
+        cr, uid, context = self.env.args
+        names = sorted(set(name for vals in updates for name in vals))
+        self.check_field_access_rights('write', names)
+        self.check_access_rule('write')
+
+        recs = self.browse(id for ids in updates.itervalues() for id in ids)
+        modified_fields = list(names)
+        if self._log_access:
+            modified_fields += ['write_date', 'write_uid']
+        recs.modified(modified_fields)
+
+        # one row (id, value1, value2, ...) per record
+        rows = []
+        for vals, ids in updates.iteritems():
+            values = []
+            for name in names:
+                column = self._columns[name]
+                if hasattr(column, 'selection') and vals[name]:
+                    self._check_selection_field_value(name, vals[name])
+                values.append(column._symbol_set[1](vals[name]))
+            rows.extend([id] + values for id in ids)
+
+        row_pattern = '(%%s, %s)' % ', '.join(
+            '%%s::%s' % get_pg_type(self._columns[name])[0] for name in names)
+        assignments = ['"%s"=v."%s"' % (name, name) for name in names]
+        if self._log_access:
+            assignments.append('"write_uid"=%s' % int(uid))
+            assignments.append('"write_date"=(now() at time zone \'UTC\')')
+        for sub_rows in cr.split_for_in_conditions(rows):
+            query = 'UPDATE "%s" SET %s FROM (VALUES %s) AS v(id, %s) WHERE "%s".id = v.id' % (
+                self._table, ', '.join(assignments),
+                ', '.join([row_pattern] * len(sub_rows)),
+                ', '.join('"%s"' % name for name in names), self._table,
+            )
+            cr.execute(query, [value for row in sub_rows for value in row])
+            if cr.rowcount != len(sub_rows):
+                raise MissingError(_('One of the records you are trying to modify has already been deleted (Document type: %s).') % self._description)
+
+        recs.modified(names)
+        recs._validate_fields(names)
+        # recompute new-style fields
+        if recs.env.recompute and context.get('recompute', True):
+            recs.recompute()
+        recs.step_workflow()
+
     #
     # Generic onchange method
     #
@@ -6245,6 +6500,26 @@ PGERROR_TO_OE = defaultdict(
     '23505': convert_pgerror_23505,
 })
 
+def _copy_format(value):
+    """ Format ``value`` for the text format of PostgreSQL's ``COPY``, or raise
+        ``ValueError`` if the value has no obvious representation.
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (int, long)):
+        return str(value)
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, basestring):
+        if isinstance(value, unicode):
+            value = value.encode('utf-8')
+        return value.replace('\\', '\\\\').replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
+    raise ValueError(value)
+
 def _normalize_ids(arg, atoms={int, long, str, unicode, NewId}):
     """ Normalizes the ids argument for ``browse`` (v7 and v8) to a tuple.
 
@@ -7,15 +7,30 @@
 from collections import Mapping, defaultdict
 import logging
 import os
+import select
 import threading
+import time
+
+import psycopg2
 
 import openerp
 from .. import SUPERUSER_ID
 from openerp.tools import assertion_report, lazy_property, classproperty, config, topological_sort
+from openerp.tools.cache import partitioned_lru
 from openerp.tools.lru import LRU
 
 _logger = logging.getLogger(__name__)
 
+# number of cache signals kept in table base_cache_signaling_log; a process
+# that lags behind more signals than this clears its whole cache
+CACHE_SIGNALING_LOG_SIZE = 1000
+
+# channel of the notifications of registry and cache changes
+SIGNALING_CHANNEL = 'base_signaling'
+
+# delay in seconds before listening again to a database after a failure
+SIGNALING_RETRY_DELAY = 10
+
 class Registry(Mapping):
     """ Model registry for a particular database.
 
@@ -50,15 +65,18 @@ class Registry(Mapping):
         # Inter-process signaling (used only when openerp.multi_process is True):
         # The `base_registry_signaling` sequence indicates the whole registry
         # must be reloaded.
-        # The `base_cache_signaling sequence` indicates all caches must be
-        # invalidated (i.e. cleared).
+        # The `base_cache_signaling sequence` indicates some caches must be
+        # invalidated (i.e. cleared); which ones is given by the table
+        # `base_cache_signaling_log`.
         self.base_registry_signaling_sequence = None
         self.base_cache_signaling_sequence = None
 
-        self.cache = LRU(8192)
-        # Flag indicating if at least one model cache has been cleared.
+        self.cache = partitioned_lru(1024, 8192)
+        # Cache partitions that have been cleared, as a set of pairs
+        # (model_name, method_name); method_name is None for all the partitions
+        # of the model, and (None, None) stands for the whole cache.
         # Useful only in a multi-process context.
-        self._any_cache_cleared = False
+        self._cleared_caches = set()
 
         cr = self.cursor()
         has_unaccent = openerp.modules.db.has_unaccent(cr)
@@ -209,14 +227,24 @@ class Registry(Mapping):
         self.cache.clear()
         for model in self.models.itervalues():
             model.clear_caches()
+        self._cleared_caches = {(None, None)}
+
+    def clear_cache_partitions(self, model_name, method_name=None):
+        """ Clear the cache partitions affected by a change on the model
+        ``model_name``, or only on its method ``method_name`` if given. See
+        :meth:`openerp.tools.cache.partitioned_lru.invalidate`.
+        """
+        self.cache.invalidate(model_name, method_name)
+        if (None, None) not in self._cleared_caches:
+            self._cleared_caches.add((model_name, method_name))
 
     # Useful only in a multi-process context.
     def reset_any_cache_cleared(self):
-        self._any_cache_cleared = False
+        self._cleared_caches = set()
 
     # Useful only in a multi-process context.
     def any_cache_cleared(self):
-        return self._any_cache_cleared
+        return bool(self._cleared_caches)
 
     @classmethod
     def setup_multi_process_signaling(cls, cr):
@@ -226,15 +254,20 @@ class Registry(Mapping):
         # Inter-process signaling:
         # The `base_registry_signaling` sequence indicates the whole registry
         # must be reloaded.
-        # The `base_cache_signaling sequence` indicates all caches must be
-        # invalidated (i.e. cleared).
+        # The `base_cache_signaling sequence` indicates some caches must be
+        # invalidated (i.e. cleared). The table `base_cache_signaling_log`
+        # gives the cache partitions cleared by each value of the sequence.
         cr.execute("""SELECT sequence_name FROM information_schema.sequences WHERE sequence_name='base_registry_signaling'""")
         if not cr.fetchall():
             cr.execute("""CREATE SEQUENCE base_registry_signaling INCREMENT BY 1 START WITH 1""")
             cr.execute("""SELECT nextval('base_registry_signaling')""")
             cr.execute("""CREATE SEQUENCE base_cache_signaling INCREMENT BY 1 START WITH 1""")
             cr.execute("""SELECT nextval('base_cache_signaling')""")
-        
+        cr.execute("""SELECT table_name FROM information_schema.tables WHERE table_name='base_cache_signaling_log'""")
+        if not cr.fetchall():
+            cr.execute("""CREATE TABLE base_cache_signaling_log (sequence bigint NOT NULL, model varchar, method varchar)""")
+            cr.execute("""CREATE INDEX base_cache_signaling_log_sequence_index ON base_cache_signaling_log (sequence)""")
+
         cr.execute("""
                     SELECT base_registry_signaling.last_value,
                            base_cache_signaling.last_value
@@ -263,9 +296,13 @@ class Registry(Mapping):
         self.test_cr = None
         RegistryManager.leave_test_mode()
 
-    def cursor(self):
+    def cursor(self, readonly=False):
         """ Return a new cursor for the database. The cursor itself may be used
             as a context manager to commit/rollback and close automatically.
+
+            :param readonly: whether the cursor may be opened on a replica of
+                the database, if one is configured and available; the cursor
+                must not be used to modify the database.
         """
         cr = self.test_cr
         if cr is not None:
@@ -275,6 +312,13 @@ class Registry(Mapping):
             # cursor itself in its method close().
             cr.acquire()
             return cr
+        if readonly:
+            db = openerp.sql_db.db_connect_replica(self.db_name)
+            if db is not None:
+                try:
+                    return db.cursor()
+                except psycopg2.OperationalError:
+                    openerp.sql_db.set_replica_available(db.dsn, False)
         return self._db.cursor()
 
 class DummyRLock(object):
@@ -288,6 +332,127 @@ class DummyRLock(object):
     def __exit__(self, type, value, traceback):
         self.release()
 
+class SignalingListener(object):
+    """ Listener of the registry and cache changes signaled by other processes.
+
+        The changes are notified on the channel SIGNALING_CHANNEL of each
+        database with the new value of the sequence ``base_registry_signaling``
+        or ``base_cache_signaling``. The listener keeps one connection per
+        database, and a thread that processes the notifications as they come,
+        in order to keep the last signaled values of the sequences in memory.
+    """
+    _instance = None
+    _inherited = []
+
+    @classmethod
+    def get_instance(cls):
+        """ Return the listener of the current process. """
+        instance = cls._instance
+        if instance is None or instance.pid != os.getpid():
+            if instance is not None:
+                # the connections of the parent process must not be closed by
+                # the garbage collector, as it would close them in the parent
+                cls._inherited.append(instance)
+            instance = cls._instance = cls()
+        return instance
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.connections = {}           # {db_name: connection}
+        self.sequences = {}             # {db_name: (registry_sequence, cache_sequence)}
+        self.failures = {}              # {db_name: time of the last failure}
+        self.thread = None
+        self.wakeup = os.pipe()         # wakes up the thread when connections change
+
+    def signaled(self, db_name):
+        """ Return the last values of the sequences ``(base_registry_signaling,
+            base_cache_signaling)`` signaled on ``db_name``, or ``None`` if the
+            database cannot be listened to.
+        """
+        with self.lock:
+            if db_name not in self.connections:
+                if time.time() - self.failures.get(db_name, 0) < SIGNALING_RETRY_DELAY:
+                    return None
+                self._listen(db_name)
+            else:
+                # process the notifications received since the last poll of
+                # the thread; this reads from the socket without round-trip
+                self._poll(db_name)
+            return self.sequences.get(db_name)
+
+    def unlisten(self, db_name):
+        """ Stop listening to ``db_name``. """
+        with self.lock:
+            self._close(db_name)
+
+    def _listen(self, db_name):
+        try:
+            cnx = psycopg2.connect(dsn=openerp.sql_db.dsn(db_name)[1])
+            cnx.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            cr = cnx.cursor()
+            cr.execute('LISTEN "%s"' % SIGNALING_CHANNEL)
+            # the changes signaled before listening
+            cr.execute("""SELECT base_registry_signaling.last_value,
+                                 base_cache_signaling.last_value
+                          FROM base_registry_signaling, base_cache_signaling""")
+            self.sequences[db_name] = cr.fetchone()
+            cr.close()
+        except psycopg2.Error:
+            _logger.warning("Cannot listen to the signaling of database %s", db_name, exc_info=True)
+            self.failures[db_name] = time.time()
+            return
+        self.connections[db_name] = cnx
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="openerp.signaling")
+            self.thread.daemon = True
+            self.thread.start()
+        os.write(self.wakeup[1], '.')
+
+    def _close(self, db_name):
+        cnx = self.connections.pop(db_name, None)
+        self.sequences.pop(db_name, None)
+        if cnx is not None:
+            if not cnx.closed:
+                cnx.close()
+            os.write(self.wakeup[1], '.')
+
+    def _poll(self, db_name):
+        cnx = self.connections[db_name]
+        try:
+            cnx.poll()
+        except psycopg2.Error:
+            _logger.warning("Lost the signaling connection of database %s", db_name)
+            self.failures[db_name] = time.time()
+            self._close(db_name)
+            return
+        registry_sequence, cache_sequence = self.sequences[db_name]
+        for notify in cnx.notifies:
+            kind, _, value = notify.payload.partition(':')
+            if kind == 'registry':
+                registry_sequence = max(registry_sequence, int(value))
+            elif kind == 'cache':
+                cache_sequence = max(cache_sequence, int(value))
+        del cnx.notifies[:]
+        self.sequences[db_name] = (registry_sequence, cache_sequence)
+
+    def _run(self):
+        while True:
+            with self.lock:
+                fds = dict((cnx.fileno(), db_name) for db_name, cnx in self.connections.iteritems())
+            try:
+                readable = select.select(list(fds) + [self.wakeup[0]], [], [])[0]
+            except (select.error, ValueError):
+                # a connection has been closed in the meantime
+                continue
+            with self.lock:
+                for fd in readable:
+                    if fd == self.wakeup[0]:
+                        os.read(fd, 512)
+                    elif fds[fd] in self.connections:
+                        self._poll(fds[fd])
+
+
 class RegistryManager(object):
     """ Model registries manager.
 
@@ -414,6 +579,8 @@ class RegistryManager(object):
             if db_name in cls.registries:
                 cls.registries[db_name].clear_caches()
                 del cls.registries[db_name]
+            if openerp.multi_process:
+                SignalingListener.get_instance().unlisten(db_name)
 
     @classmethod
     def delete_all(cls):
@@ -449,6 +616,14 @@ class RegistryManager(object):
         changed = False
         if openerp.multi_process and db_name in cls.registries:
             registry = cls.get(db_name)
+            # no round-trip to the database if no change has been signaled
+            signaled = SignalingListener.get_instance().signaled(db_name)
+            if signaled is not None and \
+                    registry.base_registry_signaling_sequence is not None and \
+                    registry.base_cache_signaling_sequence is not None and \
+                    signaled[0] <= registry.base_registry_signaling_sequence and \
+                    signaled[1] <= registry.base_cache_signaling_sequence:
+                return False
             cr = registry.cursor()
             try:
                 cr.execute("""
@@ -471,8 +646,7 @@ class RegistryManager(object):
                 # has been reload.
                 elif registry.base_cache_signaling_sequence is not None and registry.base_cache_signaling_sequence != c:
                     changed = True
-                    _logger.info("Invalidating all model caches after database signaling.")
-                    registry.clear_caches()
+                    cls._invalidate_signaled_caches(cr, registry, registry.base_cache_signaling_sequence, c)
                     registry.reset_any_cache_cleared()
                 registry.base_registry_signaling_sequence = r
                 registry.base_cache_signaling_sequence = c
@@ -480,19 +654,51 @@ class RegistryManager(object):
                 cr.close()
         return changed
 
+    @classmethod
+    def _invalidate_signaled_caches(cls, cr, registry, old, new):
+        """ Clear the cache partitions signaled by the values of the sequence
+        `base_cache_signaling` in the range ]old, new]. Clear the whole cache
+        if a full clear was signaled, or if some value in the range has no
+        record in `base_cache_signaling_log` (e.g. the log has been pruned).
+        """
+        cr.execute("""SELECT sequence, model, method FROM base_cache_signaling_log
+                      WHERE sequence > %s AND sequence <= %s""", (old, new))
+        rows = cr.fetchall()
+        if new < old or len(set(row[0] for row in rows)) < new - old or \
+                any(model is None for _, model, _ in rows):
+            _logger.info("Invalidating all model caches after database signaling.")
+            registry.clear_caches()
+            return
+        partitions = set((model, method) for _, model, method in rows)
+        _logger.info("Invalidating model caches %s after database signaling.",
+                     ", ".join(sorted("%s.%s" % (model, method or '*') for model, method in partitions)))
+        for model, method in partitions:
+            registry.cache.invalidate(model, method)
+
     @classmethod
     def signal_caches_change(cls, db_name):
         if openerp.multi_process and db_name in cls.registries:
             # Check the registries if any cache has been cleared and signal it
-            # through the database to other processes.
+            # through the database to other processes, together with the
+            # cleared partitions.
             registry = cls.get(db_name)
             if registry.any_cache_cleared():
                 _logger.info("At least one model cache has been cleared, signaling through the database.")
+                cleared = registry._cleared_caches
+                if (None, None) in cleared:
+                    cleared = {(None, None)}
                 cr = registry.cursor()
                 r = 1
                 try:
                     cr.execute("select nextval('base_cache_signaling')")
                     r = cr.fetchone()[0]
+                    for model, method in cleared:
+                        cr.execute("""INSERT INTO base_cache_signaling_log (sequence, model, method)
+                                      VALUES (%s, %s, %s)""", (r, model, method))
+                    cr.execute("DELETE FROM base_cache_signaling_log WHERE sequence <= %s",
+                               (r - CACHE_SIGNALING_LOG_SIZE,))
+                    cr.execute("SELECT pg_notify(%s, %s)", (SIGNALING_CHANNEL, 'cache:%s' % r))
+                    cr.commit()
                 finally:
                     cr.close()
                 registry.base_cache_signaling_sequence = r
@@ -508,6 +714,8 @@ class RegistryManager(object):
             try:
                 cr.execute("select nextval('base_registry_signaling')")
                 r = cr.fetchone()[0]
+                cr.execute("SELECT pg_notify(%s, %s)", (SIGNALING_CHANNEL, 'registry:%s' % r))
+                cr.commit()
             finally:
                 cr.close()
             registry.base_registry_signaling_sequence = r
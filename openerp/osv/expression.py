@@ -1312,3 +1312,125 @@ class expression(object):
             query = '(%s) AND %s' % (joins, query)
 
         return query, tools.flatten(params)
+
+
+# --------------------------------------------------
+# Compiled domains
+# --------------------------------------------------
+
+# operators and column types of the terms that can be compiled
+COMPILABLE_OPERATORS = ('=', '!=', '<=', '<', '>', '>=', '=like', '=ilike',
+                        'like', 'not like', 'ilike', 'not ilike', 'in', 'not in')
+COMPILABLE_TYPES = ('boolean', 'integer', 'float', 'monetary', 'char', 'text',
+                    'html', 'selection', 'date', 'datetime', 'many2one')
+WILDCARD_OPERATORS = ('like', 'ilike', 'not like', 'not ilike')
+
+def _term_shape(model, left, operator, right):
+    """ Return the shape of the term ``(left, operator, right)``, i.e., the
+        properties of ``right`` that determine the SQL translation of the
+        term, or ``None`` if the term cannot be compiled.
+    """
+    if not isinstance(left, basestring) or operator not in COMPILABLE_OPERATORS:
+        return None
+    if left != 'id':
+        column = model._columns.get(left)
+        if column is None or column._type not in COMPILABLE_TYPES or \
+                (isinstance(column, fields.function) and not column.store) or \
+                (column.translate and not callable(column.translate)):
+            return None
+    if operator in ('in', 'not in'):
+        if not isinstance(right, (list, tuple)) or \
+                any(isinstance(item, (list, tuple, dict)) for item in right) or \
+                (left == 'id' or column._type == 'many2one') and \
+                any(isinstance(item, basestring) for item in right):
+            return None
+        values = [item for item in right if not item == False]
+        return (left, operator, 'list', len(values), len(values) < len(right))
+    if right is None or isinstance(right, bool):
+        return (left, operator, right)
+    if isinstance(right, (list, tuple, dict)):
+        return None
+    if left == 'id' or column._type == 'many2one':
+        if isinstance(right, basestring):
+            return None
+    elif column._type == 'datetime' and isinstance(right, basestring) and len(right) == 10:
+        return None
+    if operator in WILDCARD_OPERATORS:
+        # an empty pattern also matches NULL values
+        return (left, operator, 'value', bool(right) or not isinstance(right, basestring))
+    return (left, operator, 'value')
+
+def _term_params(model, left, operator, right):
+    """ Return the SQL parameters of a term that can be compiled, as they are
+        generated by ``expression.__leaf_to_sql()``.
+    """
+    column = model._columns.get(left) if left != 'id' else None
+    if operator in ('in', 'not in'):
+        values = [item for item in right if not item == False]
+        return values if column is None else map(column._symbol_set[1], values)
+    if column is not None and column._type == 'boolean' and \
+            ((operator == '=' and right is False) or (operator == '!=' and right is True)):
+        return []
+    if (right is False or right is None) and operator in ('=', '!='):
+        return []
+    if column is None:
+        return [right]
+    if operator in WILDCARD_OPERATORS:
+        if isinstance(right, unicode):
+            right = right.encode('utf-8')
+        return ['%%%s%%' % right]
+    return [column._symbol_set[1](right)]
+
+def domain_to_sql(cr, uid, domain, model, context=None):
+    """ Return the tables, where clause and where parameters of the SQL
+        translation of ``domain`` on ``model``, as given by an
+        :class:`expression`.
+
+        Domains made of terms on the columns of ``model`` only are translated
+        once per shape, that is, once for all the domains that only differ by
+        their values. The translation is cached in the registry, and only the
+        parameters of the query are computed for the other domains.
+    """
+    domain = distribute_not(normalize_domain(domain))
+    shape = []
+    for term in domain:
+        if is_operator(term):
+            shape.append(term)
+            continue
+        left, operator, right = term
+        operator = operator.lower()
+        term_shape = _term_shape(model, left, '!=' if operator == '<>' else operator, right)
+        if term_shape is None:
+            shape = None
+            break
+        shape.append(term_shape)
+
+    if shape is not None:
+        shape = tuple(shape)
+        cache = model.pool.cache.partition((model._name, 'domain_to_sql'), depends=())
+        compiled = cache.get(shape)
+        if compiled is not None:
+            tables, where_clause = compiled
+            where_params = tools.flatten([
+                _term_params(model, term_shape[0], term_shape[1], term[2])
+                for term, term_shape in zip(domain, shape)
+                if not is_operator(term)
+            ])
+            return list(tables), where_clause, where_params
+
+    e = expression(cr, uid, domain, model, context)
+    tables = e.get_tables()
+    where_clause, where_params = e.to_sql()
+
+    if shape is not None:
+        params = tools.flatten([
+            _term_params(model, term_shape[0], term_shape[1], term[2])
+            for term, term_shape in zip(domain, shape)
+            if not is_operator(term)
+        ])
+        # only cache the translations that can be replayed
+        if params == where_params:
+            cache[shape] = (tuple(tables), where_clause)
+        else:
+            _logger.debug("Cannot compile domain %s on %s", domain, model._name)
+    return tables, where_clause, where_params
@@ -2,7 +2,7 @@
 
 from functools import wraps
 import logging
-from psycopg2 import IntegrityError, OperationalError, errorcodes
+from psycopg2 import IntegrityError, InternalError, OperationalError, errorcodes
 import random
 import threading
 import time
@@ -19,6 +19,9 @@ _logger = logging.getLogger(__name__)
 PG_CONCURRENCY_ERRORS_TO_RETRY = (errorcodes.LOCK_NOT_AVAILABLE, errorcodes.SERIALIZATION_FAILURE, errorcodes.DEADLOCK_DETECTED)
 MAX_TRIES_ON_CONCURRENCY_FAILURE = 5
 
+# methods that do not modify the database, and may be executed on a replica
+READONLY_METHODS = ('read', 'search', 'search_count', 'search_read', 'read_group', 'name_get', 'name_search', 'fields_get')
+
 def dispatch(method, params):
     (db, uid, passwd ) = params[0:3]
 
@@ -175,13 +178,23 @@ def execute_kw(db, uid, obj, method, args, kw=None):
 @check
 def execute(db, uid, obj, method, *args, **kw):
     threading.currentThread().dbname = db
-    with openerp.registry(db).cursor() as cr:
-        if method.startswith('_'):
-            raise UserError(_('Private methods (such as %s) cannot be called remotely.') % (method,))
-        res = execute_cr(cr, uid, obj, method, *args, **kw)
-        if res is None:
-            _logger.info('The method %s of the object %s can not return `None` !', method, obj)
-        return res
+    readonly = method in READONLY_METHODS
+    while True:
+        with openerp.registry(db).cursor(readonly=readonly) as cr:
+            if method.startswith('_'):
+                raise UserError(_('Private methods (such as %s) cannot be called remotely.') % (method,))
+            try:
+                res = execute_cr(cr, uid, obj, method, *args, **kw)
+            except InternalError, e:
+                if not (cr.replica and e.pgcode == errorcodes.READ_ONLY_SQL_TRANSACTION):
+                    raise
+                # the method writes after all, execute it on the primary database
+                _logger.info('%s.%s cannot be executed on a replica, retrying on the primary database', obj, method)
+                readonly = False
+                continue
+            if res is None:
+                _logger.info('The method %s of the object %s can not return `None` !', method, obj)
+            return res
 
 def exec_workflow_cr(cr, uid, obj, signal, *args):
     res_id = args[0]
@@ -758,6 +758,8 @@ class WorkerCron(Worker):
         # The variable db_index is keeping track of the next database to
         # process.
         self.db_index = 0
+        # number of threads running the jobs of a database
+        self.job_threads = max(int(config.get('cron_worker_threads') or 2), 1)
 
     def sleep(self):
         # Really sleep once all the databases have been processed.
@@ -785,8 +787,18 @@ class WorkerCron(Worker):
                 start_time = time.time()
                 start_rss, start_vms = memory_info(psutil.Process(os.getpid()))
 
+            # jobs are leased individually, so that several threads may run
+            # the jobs of the database in parallel
             import openerp.addons.base as base
-            base.ir.ir_cron.ir_cron._acquire_job(db_name)
+            threads = [
+                threading.Thread(target=base.ir.ir_cron.ir_cron._acquire_job, args=(db_name,),
+                                 name="openerp.service.cron.%s.%d" % (self.pid, i))
+                for i in range(self.job_threads)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
             openerp.modules.registry.RegistryManager.delete(db_name)
 
             # dont keep cursors in multi database mode
@@ -8,8 +8,10 @@ the database, *not* a database abstraction toolkit. Database abstraction is what
 the ORM does, in fact.
 """
 
-from contextlib import contextmanager
+from collections import deque
+from contextlib import closing, contextmanager
 from functools import wraps
+import itertools
 import logging
 import urlparse
 import uuid
@@ -48,6 +50,7 @@ from tools.func import frame_codeinfo
 from datetime import datetime as mdt
 from datetime import timedelta
 import threading
+import time
 from inspect import currentframe
 
 import re
@@ -127,6 +130,7 @@ class Cursor(object):
 
     """
     IN_MAX = 1000   # decent limit on size of IN queries - guideline = Oracle limit
+    replica = False # whether the cursor is on a read-only replica of the database
 
     def check(f):
         @wraps(f)
@@ -433,8 +437,16 @@ class ConnectionPool(object):
         Keep a set of connections to pg databases open, and reuse them
         to open cursors for all transactions.
 
-        The connections are *not* automatically closed. Only a close_db()
-        can trigger that.
+        The idle connections are kept in a free list per dsn, the most recently
+        given back connection being reused first. When the pool is full,
+        borrow() waits for a connection to be given back, up to ``timeout``
+        seconds, before raising a PoolError. Waiting borrowers are served in
+        order of arrival.
+
+        Idle connections are closed after ``max_idle`` seconds, and all
+        connections after ``max_lifetime`` seconds; a value of 0 disables the
+        corresponding limit. Connections are closed lazily, when the pool is
+        used. A close_db() closes the connections to a database.
     """
 
     def locked(fun):
@@ -447,113 +459,245 @@ class ConnectionPool(object):
                 self._lock.release()
         return _locked
 
-    def __init__(self, maxconn=64):
-        self._connections = []
+    def __init__(self, maxconn=64, timeout=5, max_idle=0, max_lifetime=0):
         self._maxconn = max(maxconn, 1)
+        self._timeout = timeout
+        self._max_idle = max_idle
+        self._max_lifetime = max_lifetime
         self._lock = threading.Lock()
+        self._idle = {}                 # {dsn: [(connection, idle_since)]}
+        self._used = {}                 # {connection: dsn}
+        self._count = 0                 # number of connections, opened or being opened
+        self._waiters = deque()         # waiting borrowers, in order of arrival
+        self._stats = dict.fromkeys(['borrowed', 'created', 'waited', 'timeouts'], 0)
+        self._stats['wait_time'] = 0.0
 
     def __repr__(self):
-        used = len([1 for c, u in self._connections[:] if u])
-        count = len(self._connections)
-        return "ConnectionPool(used=%d/count=%d/max=%d)" % (used, count, self._maxconn)
+        return "ConnectionPool(used=%d/count=%d/max=%d/waiting=%d)" % (
+            len(self._used), self._count, self._maxconn, len(self._waiters))
 
     def _debug(self, msg, *args):
         _logger.debug(('%r ' + msg), self, *args)
 
     @locked
-    def borrow(self, dsn):
-        # free dead and leaked connections
-        for i, (cnx, _) in tools.reverse_enumerate(self._connections):
-            if cnx.closed:
-                self._connections.pop(i)
-                self._debug('Removing closed connection at index %d: %r', i, cnx.dsn)
+    def stats(self):
+        """ Return the usage statistics of the pool as a dictionary with:
+
+            * ``'used'``, ``'idle'``, ``'count'``, ``'maxconn'``: the current
+              number of borrowed, idle and total connections, and the maximum;
+            * ``'waiting'``: the number of borrowers currently waiting;
+            * ``'borrowed'``, ``'created'``: the number of borrowed and created
+              connections since the pool was started;
+            * ``'waited'``, ``'timeouts'``, ``'wait_time'``: the number of
+              borrowers that had to wait, of those who gave up, and the total
+              time spent waiting (in seconds).
+        """
+        return dict(self._stats,
+                    used=len(self._used),
+                    idle=sum(len(entries) for entries in self._idle.itervalues()),
+                    count=self._count,
+                    maxconn=self._maxconn,
+                    waiting=len(self._waiters))
+
+    def _expired(self, cnx, idle_since=None):
+        now = time.time()
+        if self._max_lifetime and now - cnx._created_at > self._max_lifetime:
+            return True
+        if self._max_idle and idle_since is not None and now - idle_since > self._max_idle:
+            return True
+        return False
+
+    def _close(self, cnx):
+        """ Close ``cnx`` and free its slot in the pool. """
+        # psycopg2 2.4.4 and earlier do not allow closing a closed connection
+        if not cnx.closed:
+            cnx.close()
+        self._count -= 1
+
+    def _pop_idle(self, dsn):
+        """ Return an idle connection to ``dsn``, or ``None``. """
+        entries = self._idle.get(dsn)
+        while entries:
+            cnx, idle_since = entries.pop()
+            if cnx.closed or self._expired(cnx, idle_since):
+                self._debug('Removing expired connection to %r', cnx.dsn)
+                self._close(cnx)
                 continue
+            return cnx
+        return None
+
+    def _reserve(self):
+        """ Reserve a slot for a new connection, closing the oldest idle
+            connection if the pool is full. Return whether that succeeded.
+        """
+        if self._count < self._maxconn:
+            self._count += 1
+            return True
+        oldest = None
+        for dsn, entries in self._idle.iteritems():
+            if entries and (oldest is None or entries[0][1] < self._idle[oldest][0][1]):
+                oldest = dsn
+        if oldest is None:
+            return False
+        cnx, _ = self._idle[oldest].pop(0)
+        self._debug('Removing old connection to %r', cnx.dsn)
+        self._close(cnx)
+        self._count += 1
+        return True
+
+    def _free_leaked(self):
+        # connections of cursors garbage collected without being closed
+        for cnx, dsn in self._used.items():
             if getattr(cnx, 'leaked', False):
                 delattr(cnx, 'leaked')
-                self._connections.pop(i)
-                self._connections.append((cnx, False))
+                del self._used[cnx]
+                self._idle.setdefault(dsn, []).append((cnx, time.time()))
                 _logger.info('%r: Free leaked connection to %r', self, cnx.dsn)
 
-        for i, (cnx, used) in enumerate(self._connections):
-            if not used and cnx._original_dsn == dsn:
-                try:
-                    cnx.reset()
-                except psycopg2.OperationalError:
-                    self._debug('Cannot reset connection at index %d: %r', i, cnx.dsn)
-                    # psycopg2 2.4.4 and earlier do not allow closing a closed connection
-                    if not cnx.closed:
-                        cnx.close()
-                    continue
-                self._connections.pop(i)
-                self._connections.append((cnx, True))
-                self._debug('Borrow existing connection to %r at index %d', cnx.dsn, i)
+    def _serve_waiters(self):
+        """ Hand over the available connections and slots to the waiting
+            borrowers, in order of arrival.
+        """
+        while self._waiters:
+            waiter = self._waiters[0]
+            cnx = self._pop_idle(waiter.dsn)
+            if cnx is None and not self._reserve():
+                break
+            self._waiters.popleft()
+            waiter.served = True
+            waiter.cnx = cnx
+            waiter.condition.notify()
+
+    def _wait(self, dsn):
+        """ Wait for an idle connection to ``dsn`` or a free slot, and return
+            the connection, or ``None`` for a slot.
+        """
+        waiter = _Waiter(self._lock, dsn)
+        self._waiters.append(waiter)
+        self._stats['waited'] += 1
+        start = time.time()
+        deadline = start + self._timeout
+        try:
+            while not waiter.served:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self._waiters.remove(waiter)
+                    self._stats['timeouts'] += 1
+                    raise PoolError('The Connection Pool Is Full')
+                waiter.condition.wait(remaining)
+        finally:
+            self._stats['wait_time'] += time.time() - start
+        return waiter.cnx
 
+    def borrow(self, dsn):
+        with self._lock:
+            self._stats['borrowed'] += 1
+            # do not overtake the waiting borrowers
+            cnx = None if self._waiters else self._pop_idle(dsn)
+            if cnx is None:
+                self._free_leaked()
+                if self._waiters:
+                    self._serve_waiters()
+                else:
+                    cnx = self._pop_idle(dsn)
+                if cnx is None and (self._waiters or not self._reserve()):
+                    self._debug('Waiting for a connection to %r', dsn)
+                    cnx = self._wait(dsn)
+            if cnx is not None:
+                self._used[cnx] = dsn
+
+        # connections are reset and opened outside of the lock
+        if cnx is not None:
+            try:
+                cnx.reset()
+                self._debug('Borrow existing connection to %r', cnx.dsn)
                 return cnx
-
-        if len(self._connections) >= self._maxconn:
-            # try to remove the oldest connection not used
-            for i, (cnx, used) in enumerate(self._connections):
-                if not used:
-                    self._connections.pop(i)
+            except psycopg2.OperationalError:
+                self._debug('Cannot reset connection to %r', cnx.dsn)
+                with self._lock:
+                    self._used.pop(cnx, None)
+                    # keep the slot for the new connection
                     if not cnx.closed:
                         cnx.close()
-                    self._debug('Removing old connection at index %d: %r', i, cnx.dsn)
-                    break
-            else:
-                # note: this code is called only if the for loop has completed (no break)
-                raise PoolError('The Connection Pool Is Full')
 
         try:
             result = psycopg2.connect(dsn=dsn, connection_factory=PsycoConnection)
         except psycopg2.Error:
             _logger.info('Connection to the database failed')
+            with self._lock:
+                self._count -= 1
+                self._serve_waiters()
             raise
         result._original_dsn = dsn
-        self._connections.append((result, True))
+        result._created_at = time.time()
+        with self._lock:
+            self._used[result] = dsn
+            self._stats['created'] += 1
         self._debug('Create new connection')
         return result
 
     @locked
     def give_back(self, connection, keep_in_pool=True):
         self._debug('Give back connection to %r', connection.dsn)
-        for i, (cnx, used) in enumerate(self._connections):
-            if cnx is connection:
-                self._connections.pop(i)
-                if keep_in_pool:
-                    self._connections.append((cnx, False))
-                    self._debug('Put connection to %r in pool', cnx.dsn)
-                else:
-                    self._debug('Forgot connection to %r', cnx.dsn)
-                    cnx.close()
-                break
-        else:
+        dsn = self._used.pop(connection, None)
+        if dsn is None:
             raise PoolError('This connection does not below to the pool')
+        if keep_in_pool and not connection.closed and not self._expired(connection):
+            self._idle.setdefault(dsn, []).append((connection, time.time()))
+            self._debug('Put connection to %r in pool', connection.dsn)
+        else:
+            self._debug('Forgot connection to %r', connection.dsn)
+            self._close(connection)
+        self._serve_waiters()
 
     @locked
     def close_all(self, dsn=None):
         count = 0
         last = None
-        for i, (cnx, used) in tools.reverse_enumerate(self._connections):
-            if dsn is None or cnx._original_dsn == dsn:
-                cnx.close()
-                last = self._connections.pop(i)[0]
+        for key, entries in self._idle.items():
+            if dsn is None or key == dsn:
+                for cnx, _ in entries:
+                    self._close(cnx)
+                    last = cnx
+                    count += 1
+                del self._idle[key]
+        for cnx, key in self._used.items():
+            if dsn is None or key == dsn:
+                del self._used[cnx]
+                self._close(cnx)
+                last = cnx
                 count += 1
         _logger.info('%r: Closed %d connections %s', self, count,
                     (dsn and last and 'to %r' % last.dsn) or '')
+        self._serve_waiters()
+
+
+class _Waiter(object):
+    """ A borrower waiting for a connection in a ConnectionPool. """
+    __slots__ = ['condition', 'dsn', 'served', 'cnx']
+
+    def __init__(self, lock, dsn):
+        self.condition = threading.Condition(lock)
+        self.dsn = dsn
+        self.served = False
+        self.cnx = None
 
 
 class Connection(object):
     """ A lightweight instance of a connection to postgres
     """
-    def __init__(self, pool, dbname, dsn):
+    def __init__(self, pool, dbname, dsn, replica=False):
         self.dbname = dbname
         self.dsn = dsn
+        self.replica = replica
         self.__pool = pool
 
     def cursor(self, serialized=True):
         cursor_type = serialized and 'serialized ' or ''
         _logger.debug('create %scursor to %r', cursor_type, self.dsn)
-        return Cursor(self.__pool, self.dbname, self.dsn, serialized=serialized)
+        cr = Cursor(self.__pool, self.dbname, self.dsn, serialized=serialized)
+        cr.replica = self.replica
+        return cr
 
     def test_cursor(self, serialized=True):
         cursor_type = serialized and 'serialized ' or ''
@@ -596,21 +740,105 @@ def dsn(db_or_uri):
 
 _Pool = None
 
-def db_connect(to, allow_uri=False):
+def _get_pool():
     global _Pool
     if _Pool is None:
-        _Pool = ConnectionPool(int(tools.config['db_maxconn']))
+        _Pool = ConnectionPool(
+            int(tools.config['db_maxconn']),
+            timeout=float(tools.config.get('db_pool_timeout') or 5),
+            max_idle=float(tools.config.get('db_pool_max_idle') or 0),
+            max_lifetime=float(tools.config.get('db_pool_max_lifetime') or 0),
+        )
+    return _Pool
 
+def db_connect(to, allow_uri=False):
     db, uri = dsn(to)
     if not allow_uri and db != to:
         raise ValueError('URI connections not allowed')
-    return Connection(_Pool, db, uri)
+    return Connection(_get_pool(), db, uri)
+
+# Streaming replicas of the databases, given by the option ``db_replicas`` as
+# a comma-separated list of ``host[:port]``. Their replication lag is checked
+# every REPLICA_CHECK_INTERVAL seconds, and a replica lagging more than
+# ``db_replica_max_lag`` seconds is not used until it catches up.
+REPLICA_CHECK_INTERVAL = 10
+_replica_status = {}                    # {uri: (checked_at, available)}
+_replica_counter = itertools.count()
+
+def replica_dsns(db_name):
+    """ Return the uris of the configured replicas of the database ``db_name``. """
+    uris = []
+    for replica in (tools.config.get('db_replicas') or '').split(','):
+        host, _, port = replica.strip().partition(':')
+        if not host:
+            continue
+        _dsn = 'host=%s ' % host
+        if port or tools.config['db_port']:
+            _dsn += 'port=%s ' % (port or tools.config['db_port'])
+        for p in ('user', 'password'):
+            cfg = tools.config['db_' + p]
+            if cfg:
+                _dsn += '%s=%s ' % (p, cfg)
+        uris.append('%sdbname=%s' % (_dsn, db_name))
+    return uris
+
+def set_replica_available(uri, available):
+    """ Record the status of the replica ``uri``. """
+    if not available and _replica_status.get(uri, (0, True))[1]:
+        _logger.warning('Replica %r is unavailable, using the primary database', uri)
+    _replica_status[uri] = (time.time(), available)
+
+def _replica_available(db_name, uri):
+    checked_at, available = _replica_status.get(uri, (0, False))
+    if time.time() - checked_at < REPLICA_CHECK_INTERVAL:
+        return available
+    max_lag = float(tools.config.get('db_replica_max_lag') or 10)
+    try:
+        with closing(Connection(_get_pool(), db_name, uri).cursor()) as cr:
+            # the functions pg_last_xlog_*_location are named
+            # pg_last_wal_*_lsn since PostgreSQL 10
+            if cr._cnx.server_version >= 100000:
+                receive, replay = 'pg_last_wal_receive_lsn', 'pg_last_wal_replay_lsn'
+            else:
+                receive, replay = 'pg_last_xlog_receive_location', 'pg_last_xlog_replay_location'
+            # an up-to-date replica has replayed all it has received
+            cr.execute("""SELECT CASE WHEN %s() = %s()
+                                      THEN 0
+                                      ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+                                 END""" % (receive, replay))
+            lag = cr.fetchone()[0] or 0
+    except psycopg2.Error:
+        _logger.warning('Cannot check the replica %r', uri, exc_info=True)
+        available = False
+    else:
+        available = lag <= max_lag
+        if not available:
+            _logger.info('Replica %r is lagging by %.1f seconds', uri, lag)
+    set_replica_available(uri, available)
+    return available
+
+def db_connect_replica(db_name):
+    """ Return a connection to an available replica of the database
+        ``db_name``, or ``None`` if there is none. The replicas are used in
+        turn.
+    """
+    uris = replica_dsns(db_name)
+    if not uris:
+        return None
+    start = next(_replica_counter)
+    for index in xrange(len(uris)):
+        uri = uris[(start + index) % len(uris)]
+        if _replica_available(db_name, uri):
+            return Connection(_get_pool(), db_name, uri, replica=True)
+    return None
 
 def close_db(db_name):
     """ You might want to call openerp.modules.registry.RegistryManager.delete(db_name) along this function."""
     global _Pool
     if _Pool:
         _Pool.close_all(dsn(db_name)[1])
+        for uri in replica_dsns(db_name):
+            _Pool.close_all(uri)
 
 def close_all():
     global _Pool
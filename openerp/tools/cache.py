@@ -7,6 +7,9 @@ from collections import defaultdict
 from decorator import decorator
 from inspect import formatargspec, getargspec
 import logging
+import threading
+
+from lru import LRU
 
 _logger = logging.getLogger(__name__)
 
@@ -28,6 +31,91 @@ class ormcache_counter(object):
 STAT = defaultdict(ormcache_counter)
 
 
+class partitioned_lru(object):
+    """ Storage of the ormcache entries of a registry. The entries of a cached
+    method are stored in their own partition, which is an LRU identified by
+    the pair ``(model_name, method_name)``. Every partition has its own size,
+    so that a busy method cannot evict the entries of the other ones, and can
+    be cleared without affecting the other partitions.
+
+    A partition may declare the models it depends on. Such a partition is
+    only cleared by a change on its own model or on one of its dependencies.
+    A partition that declares no dependency is cleared by any change, since
+    its dependencies are unknown.
+
+    The mapping interface (``cache[key]``) gives access to a default
+    partition, meant for entries that are not related to a cached method
+    (like the cached website pages). The default partition is cleared by any
+    change, too.
+    """
+    def __init__(self, size, default_size):
+        self._lock = threading.RLock()
+        self.size = size
+        self.default = LRU(default_size)
+        self.partitions = {}            # {(model_name, method_name): LRU}
+        self.depends = {}               # {(model_name, method_name): frozenset or None}
+
+    def partition(self, key, size=None, depends=None):
+        """ Return the partition of ``key``, and create it if necessary. """
+        try:
+            return self.partitions[key]
+        except KeyError:
+            with self._lock:
+                if key not in self.partitions:
+                    self.depends[key] = None if depends is None else frozenset(depends)
+                    self.partitions[key] = LRU(size or self.size)
+                return self.partitions[key]
+
+    def iterpartitions(self):
+        """ Iterate over the pairs ``(key, partition)``. """
+        return self.partitions.items()
+
+    def invalidate(self, model_name, method_name=None):
+        """ Clear the partitions that are affected by a change on the model
+        ``model_name``: the partition of its method ``method_name`` (or all its
+        partitions if ``method_name`` is ``None``), the partitions that depend
+        on the model, and the partitions without declared dependencies.
+        """
+        self.default.clear()
+        for key, lru in self.partitions.items():
+            depends = self.depends[key]
+            if depends is None or model_name in depends or \
+                    (key[0] == model_name and method_name in (None, key[1])):
+                lru.clear()
+
+    def clear(self):
+        """ Clear all the partitions. """
+        self.default.clear()
+        for lru in self.partitions.values():
+            lru.clear()
+
+    def __contains__(self, key):
+        return key in self.default
+
+    def __getitem__(self, key):
+        return self.default[key]
+
+    def __setitem__(self, key, value):
+        self.default[key] = value
+
+    def __delitem__(self, key):
+        del self.default[key]
+
+    def get(self, key, default=None):
+        return self.default.get(key, default)
+
+
+def _on_replica(model, *args):
+    """ Return whether a cached method of ``model`` is called with a cursor on
+    a replica of the database. The values computed on a replica are not
+    stored: the replica may lag behind the primary database, and the values
+    could be stale already when the primary database clears the cache.
+    """
+    env = getattr(model, 'env', None)
+    cr = env.cr if env is not None else (args[0] if args else None)
+    return bool(getattr(cr, 'replica', False))
+
+
 class ormcache(object):
     """ LRU cache decorator for model methods.
     The parameters are strings that represent expressions referring to the
@@ -37,6 +125,19 @@ class ormcache(object):
         def _compute_domain(self, cr, uid, model_name, mode="read"):
             ...
 
+    The entries of the method are stored in their own partition of the
+    registry cache (see :class:`partitioned_lru`). The optional parameters
+    ``size`` and ``depends`` give the maximum number of entries of the
+    partition, and the names of the models whose changes invalidate the
+    cached values, besides the model of the method itself::
+
+        @ormcache('uid', 'model_name', 'mode', size=2048, depends=('res.groups',))
+        def _compute_domain(self, cr, uid, model_name, mode="read"):
+            ...
+
+    When ``depends`` is not given, the entries are invalidated by any cache
+    clearing on any model.
+
     For the sake of backward compatibility, the decorator supports the named
     parameter `skiparg`::
 
@@ -47,6 +148,8 @@ class ormcache(object):
     def __init__(self, *args, **kwargs):
         self.args = args
         self.skiparg = kwargs.get('skiparg')
+        self.size = kwargs.get('size')
+        self.depends = kwargs.get('depends')
 
     def __call__(self, method):
         self.method = method
@@ -71,7 +174,9 @@ class ormcache(object):
 
     def lru(self, model):
         counter = STAT[(model.pool.db_name, model._name, self.method)]
-        return model.pool.cache, (model._name, self.method), counter
+        key = (model._name, self.method.__name__)
+        lru = model.pool.cache.partition(key, self.size, self.depends)
+        return lru, (model._name, self.method), counter
 
     def lookup(self, method, *args, **kwargs):
         d, key0, counter = self.lru(args[0])
@@ -82,17 +187,17 @@ class ormcache(object):
             return r
         except KeyError:
             counter.miss += 1
-            value = d[key] = self.method(*args, **kwargs)
+            value = self.method(*args, **kwargs)
+            if not _on_replica(*args):
+                d[key] = value
             return value
         except TypeError:
             counter.err += 1
             return self.method(*args, **kwargs)
 
     def clear(self, model, *args):
-        """ Clear the registry cache """
-        d, key0, _ = self.lru(model)
-        d.clear()
-        model.pool._any_cache_cleared = True
+        """ Clear the cache partition of the method """
+        model.pool.clear_cache_partitions(model._name, self.method.__name__)
 
 
 class ormcache_context(ormcache):
@@ -172,6 +277,8 @@ class ormcache_multi(ormcache):
             result.update(method(*args, **kwargs))
 
             # store those new results back in the cache
+            if _on_replica(*args):
+                return result
             for i in missed:
                 key = base_key + (i,)
                 d[key] = result[i]
@@ -201,8 +308,9 @@ def log_ormcache_stats(sig=None, frame=None):
     me_dbname = me.dbname
     entries = defaultdict(int)
     for dbname, reg in RegistryManager.registries.iteritems():
-        for key in reg.cache.iterkeys():
-            entries[(dbname,) + key[:2]] += 1
+        for _, lru in reg.cache.iterpartitions():
+            for key in lru.iterkeys():
+                entries[(dbname,) + key[:2]] += 1
     for key, count in sorted(entries.items()):
         dbname, model_name, method = key
         me.dbname = dbname
@@ -212,6 +320,10 @@ def log_ormcache_stats(sig=None, frame=None):
 
     me.dbname = me_dbname
 
+    from openerp.tools.safe_eval import _code_cache, _code_cache_stat as stat
+    _logger.info("%6d entries, %6d hit, %6d miss, %6d err, %4.1f%% ratio, for safe_eval",
+                 len(_code_cache), stat.hit, stat.miss, stat.err, stat.ratio)
+
 
 def get_cache_key_counter(bound_method, *args, **kwargs):
     """ Return the cache, key and stat counter for the given call. """
@@ -20,6 +20,8 @@ from psycopg2 import OperationalError
 from types import CodeType
 import logging
 
+from .cache import ormcache_counter
+from .lru import LRU
 from .misc import ustr
 
 import openerp
@@ -66,6 +68,12 @@ _SAFE_OPCODES = _EXPR_OPCODES.union(set(opmap[x] for x in [
 
 _logger = logging.getLogger(__name__)
 
+# validated code objects of safe_eval(), by (expression, mode); the sandbox
+# checks are thus performed once per distinct expression
+_CODE_CACHE_SIZE = 8192
+_code_cache = LRU(_CODE_CACHE_SIZE)
+_code_cache_stat = ormcache_counter()
+
 def _get_opcodes(codeobj):
     """_get_opcodes(codeobj) -> [opcodes]
 
@@ -161,6 +169,23 @@ def test_expr(expr, allowed_codes, mode="eval"):
     return code_obj
 
 
+def _safe_code(expr, mode):
+    """ Return the code object of ``expr`` validated by :func:`test_expr`
+    with the opcodes allowed in :func:`safe_eval`. """
+    key = (expr, mode)
+    try:
+        code_obj = _code_cache[key]
+        _code_cache_stat.hit += 1
+        return code_obj
+    except KeyError:
+        _code_cache_stat.miss += 1
+        code_obj = _code_cache[key] = test_expr(expr, _SAFE_OPCODES, mode=mode)
+        return code_obj
+    except TypeError:
+        _code_cache_stat.err += 1
+        return test_expr(expr, _SAFE_OPCODES, mode=mode)
+
+
 def const_eval(expr):
     """const_eval(expression) -> value
 
@@ -293,7 +318,7 @@ def safe_eval(expr, globals_dict=None, locals_dict=None, mode="eval", nocopy=Fal
         if locals_dict is None:
             locals_dict = {}
         locals_dict.update(_BUILTINS)
-    c = test_expr(expr, _SAFE_OPCODES, mode=mode)
+    c = _safe_code(expr, mode)
     try:
         return eval(c, globals_dict, locals_dict)
     except openerp.exceptions.except_orm: